@@ -0,0 +1,123 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import time # EN : Throughput measurement - FR : Mesure du débit
+from collections import deque # EN : Queue of the chunks being scored - FR : File des morceaux en cours
+from concurrent.futures import ProcessPoolExecutor # EN : Worker processes - FR : Processus de travail
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+from model_artifact_santo import ARTIFACT_PATH, load_artifact # EN : Versioned model artifact - FR : Artefact versionné du modèle
+from forest_engine_santo import INTERVAL_QUANTILES, predict_interval # EN : Intervals from the tree predictions - FR : Intervalles des prédictions des arbres
+
+# --- EN Setting up logging - FR Configuration de la journalisation
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+_model = None  # EN Model loaded once per worker process - FR Modèle chargé une fois par processus
+_quantiles = None  # EN Quantiles of the tree predictions written next to the price - FR Quantiles écrits à côté du prix
+
+
+def _init_worker(model_path, quantiles=None):
+    """Load the serving pipeline in each worker process."""
+    global _model, _quantiles
+    _model = load_artifact(model_path)['model']
+    _quantiles = quantiles
+
+
+def score_chunk(chunk):
+    """Predicted price of each raw Kangaroo row of `chunk` (and its interval when quantiles are asked)."""
+    if _quantiles:
+        prices, bounds = predict_interval(_model, chunk, _quantiles)  # EN Same pass over the trees - FR Même passage sur les arbres
+        result = pd.DataFrame({'predicted_price': prices}, index=chunk.index)
+        for position, quantile in enumerate(_quantiles):
+            result[f'price_p{round(quantile * 100):02d}'] = bounds[:, position]
+    else:
+        result = pd.DataFrame({'predicted_price': _model.predict(chunk)}, index=chunk.index)
+    for column in ('id', 'Id', 'ID'):
+        if column in chunk.columns:
+            result.insert(0, column, chunk[column].to_numpy())
+            break
+    return result
+
+
+def read_chunks(input_path, chunksize):
+    """Yield the raw listings of a CSV or Parquet file by chunks of `chunksize` rows."""
+    if input_path.endswith('.parquet'):
+        import pyarrow.parquet as pq # EN Only needed for Parquet inputs - FR Seulement pour les fichiers Parquet
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunksize)
+
+
+class PredictionWriter:
+    """Append the predictions to a CSV or Parquet output file."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet_writer = None
+        self.rows = 0
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    def write(self, predictions):
+        if self.output_path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(predictions, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            predictions.to_csv(self.output_path, index=False, mode='w' if self.rows == 0 else 'a', header=self.rows == 0)
+        self.rows += len(predictions)
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+
+def batch_scoring(input_path, output_path, model_path=ARTIFACT_PATH, workers=None, chunksize=50_000, quantiles=None):
+    """Score every listing of `input_path` and stream the predictions to `output_path`.
+
+    EN : At most two chunks per worker are in flight, so memory stays bounded by the
+    chunk size whatever the input size. The output keeps the input order.
+    With `quantiles` (e.g. (0.1, 0.9)), a forest model also writes the quantiles of its
+    tree predictions as `price_p10`, `price_p90` columns.
+    FR : Au plus deux morceaux par processus sont en cours : la mémoire dépend de la
+    taille des morceaux et non du fichier. L'ordre des lignes est conservé.
+    """
+    workers = workers or os.cpu_count()
+    writer = PredictionWriter(output_path)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, quantiles)) as executor:
+        pending = deque()
+        for chunk in read_chunks(input_path, chunksize):
+            pending.append(executor.submit(score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                writer.write(pending.popleft().result())
+        while pending:
+            writer.write(pending.popleft().result())
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    rows_per_second = writer.rows / elapsed if elapsed else float('inf')
+    logging.info(f"{writer.rows} listings scored in {elapsed:.2f} s ({rows_per_second:,.0f} rows/s) with {workers} workers.")
+    logging.info(f"Predictions saved in: {output_path}")
+    return writer.rows, rows_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch valuation of a raw Kangaroo-format CSV or Parquet file.")
+    parser.add_argument('input', help="Raw listings (.csv or .parquet).")
+    parser.add_argument('output', help="Predictions file (.csv or .parquet).")
+    parser.add_argument('--model', default=ARTIFACT_PATH, help="Model artifact saved by main_santo.py.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: all cores).")
+    parser.add_argument('--chunksize', type=int, default=50_000, help="Rows per chunk.")
+    parser.add_argument('--intervals', action='store_true', help="Also write the P10 and P90 of the forest trees (price_p10, price_p90).")
+    args = parser.parse_args()
+    batch_scoring(args.input, args.output, model_path=args.model, workers=args.workers, chunksize=args.chunksize,
+                  quantiles=INTERVAL_QUANTILES if args.intervals else None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import tempfile # EN : Temporary files of the benchmarks - FR : Fichiers temporaires des benchmarks
+import time # EN : Timing of the benchmarks - FR : Chronométrage des benchmarks
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+from data_cleaning_santo import BINARY_COLUMNS, TRUE_VALS, FALSE_VALS, TOP_LOCALITIES, normalize_binary_columns, bucket_localities
+
+
+def best_time(function, repeat=3):
+    """Best wall time of `repeat` calls of `function` (and its last result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def print_table(title, rows, columns):
+    """Print the benchmark results in the same table layout as main_santo."""
+    name_width = max([15] + [len(name) for name, _ in rows])
+    width = name_width + 4 + 13 * len(columns)
+    print(title)
+    print("-" * width)
+    print(f"| {'Case':<{name_width}} |" + "".join(f" {column:>10} |" for column in columns))
+    print("-" * width)
+    for name, values in rows:
+        print(f"| {name:<{name_width}} |" + "".join(f" {value:10.4f} |" if isinstance(value, float) else f" {value:>10} |" for value in values))
+    print("-" * width)
+
+
+# --- 1. EN : Binary and locality normalization - FR : Normalisation des colonnes binaires et des localités ---
+
+def synthetic_cleaning_frame(rows, seed=42):
+    """Frame shaped like the cleaning input: binary columns as strings and 300 localities."""
+    rng = np.random.default_rng(seed)
+    binary_values = np.array(TRUE_VALS + FALSE_VALS + ['nan'], dtype=object)
+    df = pd.DataFrame({column: binary_values[rng.integers(0, len(binary_values), rows)] for column in BINARY_COLUMNS})
+    weights = 1 / np.arange(1, 301)
+    df['locality'] = rng.choice([f'Locality {i}' for i in range(300)], rows, p=weights / weights.sum())
+    return df
+
+
+def bench_cleaning_loops(rows=1_000_000):
+    """Row-wise `apply` (previous implementation) against the vectorized normalization."""
+    df = synthetic_cleaning_frame(rows)
+    top_localities = df['locality'].value_counts().nlargest(TOP_LOCALITIES).index
+
+    def apply_binary():
+        result = df[BINARY_COLUMNS].copy()
+        for column in BINARY_COLUMNS:
+            result[column] = result[column].apply(lambda x: 1 if x in TRUE_VALS else (0 if x in FALSE_VALS else 0)).astype(int)
+        return result
+
+    apply_binary_time, expected = best_time(apply_binary, repeat=1)
+    vector_binary_time, result = best_time(lambda: normalize_binary_columns(df[BINARY_COLUMNS].copy()))
+    pd.testing.assert_frame_equal(expected, result)
+
+    apply_locality_time, expected = best_time(lambda: df['locality'].apply(lambda x: x if x in top_localities else 'Other'), repeat=1)
+    vector_locality_time, result = best_time(lambda: bucket_localities(df['locality'], top_localities))
+    pd.testing.assert_series_equal(expected, result)
+
+    print_table(f"Cleaning loops on {rows:,} rows (seconds)", [
+        ('binary x12', (apply_binary_time, vector_binary_time, apply_binary_time / vector_binary_time)),
+        ('locality', (apply_locality_time, vector_locality_time, apply_locality_time / vector_locality_time)),
+    ], ['APPLY', 'VECTOR', 'SPEEDUP'])
+
+
+# --- 2. EN : Model artifact codecs - FR : Codecs de l'artefact du modèle ---
+
+def synthetic_training_frame(rows, features=100, seed=42):
+    """Numeric features and a price, shaped like the cleaned dataset.
+
+    EN : Coordinates in Belgium and a habitable surface are included, the columns the
+    SpatialFeatures step of the registry models needs.
+    FR : Des coordonnées en Belgique et une surface habitable sont incluses, colonnes
+    nécessaires à l'étape SpatialFeatures des modèles du registre.
+    """
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.random((rows, features), dtype=np.float32), columns=[f'feature_{i}' for i in range(features)])
+    X['latitude'] = rng.uniform(49.5, 51.5, rows).astype(np.float32)
+    X['longitude'] = rng.uniform(2.5, 6.4, rows).astype(np.float32)
+    X['habitablesurface'] = rng.uniform(40, 300, rows).round().astype(np.float32)
+    y = 50_000 + 700_000 * X.iloc[:, :10].mean(axis=1) + 1_000 * X['habitablesurface'] + rng.normal(0, 50_000, rows)
+    return X, y
+
+
+def bench_artifact(rows=20_000, n_estimators=200, max_depth=20):
+    """Size, save time and cold load time of the model artifact for each joblib codec."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from preprocessing_santo import FeatureImputer
+    from model_artifact_santo import save_artifact, load_artifact
+
+    X, y = synthetic_training_frame(rows)
+    model = Pipeline([('impute', FeatureImputer()),
+                      ('model', RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, n_jobs=-1, random_state=42))])
+    model.fit(X, y)
+
+    codecs = [('none + mmap', 0, True), ('none', 0, False), ('zlib 3', ('zlib', 3), False),
+              ('gzip 3', ('gzip', 3), False), ('lzma 3', ('lzma', 3), False), ('lzma 9', ('lzma', 9), False)]
+    try:
+        import lz4 # noqa: F401 - EN Optional joblib codec - FR Codec optionnel de joblib
+        codecs.insert(2, ('lz4 3', ('lz4', 3), False))
+    except ImportError:
+        pass
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, compress, mmap in codecs:
+            path = os.path.join(directory, 'model.pkl')
+            save_time, _ = best_time(lambda: save_artifact(model, path, compress=compress), repeat=1)
+            load_time, artifact = best_time(lambda: load_artifact(path, mmap=mmap))
+            assert np.allclose(artifact['model'].predict(X.head(100)), model.predict(X.head(100)))
+            results.append((name, (os.path.getsize(path) / 1e6, save_time, load_time)))
+    print_table(f"Model artifact, {n_estimators} trees, max_depth={max_depth}, {rows:,} rows", results, ['SIZE MB', 'SAVE s', 'LOAD s'])
+
+
+# --- 3. EN : Models of the registry - FR : Modèles du registre ---
+
+def bench_models(rows=None, data_path='data/Kangaroo_cleaned.csv', models=('linear', 'gradient_boosting', 'random_forest')):
+    """Fit time, single-row latency, batch throughput, size and accuracy of each model on the same split.
+
+    EN : Uses the cleaned dataset when it exists (first `rows` rows), synthetic data otherwise.
+    FR : Utilise le jeu nettoyé s'il existe, des données synthétiques sinon.
+    """
+    import pickle
+    from sklearn.base import clone
+    from model_registry_santo import MODELS
+    from preprocessing_santo import split_frame
+
+    if os.path.exists(data_path):
+        from dataset_cache_santo import load_dataset
+        df = load_dataset(data_path)
+        df = df.head(rows) if rows else df
+    else:
+        X, y = synthetic_training_frame(rows or 20_000)
+        df = X.assign(price=y)
+    X_train, X_test, y_train, y_test = split_frame(df)
+    single_row = X_test.iloc[[0]]
+
+    results = []
+    for key in models:
+        name, model, train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae = MODELS[key](df)
+        fit_time, _ = best_time(lambda: clone(model).fit(X_train, y_train), repeat=1)
+        latencies = [best_time(lambda: model.predict(single_row), repeat=1)[0] for _ in range(200)]
+        batch_time, _ = best_time(lambda: model.predict(X_test))
+        results.append((name, (fit_time, float(np.median(latencies) * 1000), round(len(X_test) / batch_time),
+                               len(pickle.dumps(model)) / 1e6, float(test_r2), round(test_rmse), round(test_mae))))
+    print_table(f"Models on {len(X_train):,} train / {len(X_test):,} test rows", results,
+                ['FIT s', 'ROW ms', 'ROWS/s', 'SIZE MB', 'TEST R2', 'TEST RMSE', 'TEST MAE'])
+
+
+# --- 4. EN : Memory of the dtype policy - FR : Mémoire de la politique de types ---
+
+def peak_memory(function):
+    """Peak memory (MB) allocated by `function` as traced by tracemalloc (NumPy and pandas buffers included), and its result."""
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        result = function()
+        return tracemalloc.get_traced_memory()[1] / 1e6, result
+    finally:
+        tracemalloc.stop()
+
+
+def legacy_dtypes(df):
+    """The cleaned dataset with the previous dtypes: int64 binaries and float64 features."""
+    return df.astype({column: np.int64 if column in BINARY_COLUMNS else np.float64
+                      for column, dtype in df.dtypes.items() if not pd.api.types.is_bool_dtype(dtype)})
+
+
+def legacy_prepare(df):
+    """Previous training preparation: full `drop` copy, split, reindex + fillna copies, float32 array."""
+    from sklearn.model_selection import train_test_split
+    X_train, X_test, y_train, y_test = train_test_split(df.drop(columns='price'), df['price'], test_size=0.2, random_state=42)
+    fill_values = X_train.median().to_dict()
+    return [X.reindex(columns=X_train.columns).fillna(fill_values).to_numpy(dtype=np.float32) for X in (X_train, X_test)]
+
+
+def compact_prepare(df):
+    """Current training preparation: `split_frame` and the float32 FeatureImputer."""
+    from preprocessing_santo import FeatureImputer, split_frame
+    X_train, X_test, y_train, y_test = split_frame(df)
+    imputer = FeatureImputer().fit(X_train)
+    return [imputer.transform(X) for X in (X_train, X_test)]
+
+
+def bench_memory(rows=200_000, data_path='data/Kangaroo.csv'):
+    """Peak memory of the cleaning and of the training preparation, previous against compact dtypes.
+
+    EN : The previous cleaning is replayed by switching off `strip_strings` (categoricals)
+    and `compact_features`. Uses the full Kangaroo file when it exists.
+    FR : L'ancien nettoyage est rejoué en désactivant `strip_strings` et `compact_features`.
+    """
+    from unittest import mock
+    import data_cleaning_santo as cleaning
+
+    results = []
+    if os.path.exists(data_path):
+        with tempfile.TemporaryDirectory() as directory:
+            output_path = os.path.join(directory, 'cleaned.csv')
+            with mock.patch.object(cleaning, 'strip_strings', lambda values: values.astype(str).str.strip()), \
+                 mock.patch.object(cleaning, 'compact_features', lambda df: df):
+                legacy_peak, legacy = peak_memory(lambda: cleaning.data_cleaning(data_path, output_path))
+            compact_peak, df = peak_memory(lambda: cleaning.data_cleaning(data_path, output_path))
+        legacy = legacy_dtypes(legacy)
+        results.append(('cleaning', (legacy_peak, compact_peak, legacy_peak / compact_peak)))
+    else:
+        X, y = synthetic_training_frame(rows, features=20)
+        df = X.assign(**{column: (X['feature_0'] > 0.5).astype(np.uint8) for column in BINARY_COLUMNS}, price=y)
+        legacy = legacy_dtypes(df)
+        df['price'] = df['price'].astype(np.float64)
+
+    legacy_size, compact_size = legacy.memory_usage(deep=True).sum() / 1e6, df.memory_usage(deep=True).sum() / 1e6
+    results.append(('cleaned frame', (legacy_size, compact_size, legacy_size / compact_size)))
+    legacy_peak, _ = peak_memory(lambda: legacy_prepare(legacy))
+    compact_peak, _ = peak_memory(lambda: compact_prepare(df))
+    results.append(('train/test prep', (legacy_peak, compact_peak, legacy_peak / compact_peak)))
+    print_table(f"Peak memory on {len(df):,} cleaned rows x {df.shape[1]} columns (MB)", results, ['PREVIOUS', 'COMPACT', 'RATIO'])
+
+
+# --- 5. EN : Start-up of the Streamlit app - FR : Démarrage de l'application Streamlit ---
+
+APP_PATH = 'streamlit_immo-eliza_santo.py'
+
+STARTUP_SCRIPTS = {
+    # EN What the app did before its first render - FR Ce que faisait l'application avant son premier affichage
+    'previous': "from PIL import Image; from dataset_cache_santo import load_dataset; "
+                "from model_artifact_santo import load_artifact; Image.open('logo.png').load(); "
+                "df = load_dataset('data/Kangaroo_cleaned.csv'); load_artifact()['model']; "
+                "sorted(c.replace('province_', '') for c in df.columns if c.startswith('province_'))",
+    # EN What it does now: metadata only, the model waits for the first prediction - FR Maintenant : métadonnées seulement
+    'lazy': "from model_artifact_santo import load_metadata; import prediction_cache_santo; "
+            "sorted(load_metadata()['provinces'])",
+    'first predict': "from model_artifact_santo import load_artifact; from prediction_cache_santo import PredictionCache, wizard_listing; "
+                     "PredictionCache(load_artifact()['model']).predict(wizard_listing(2, 1, 100, False, False, False, False, 2000, 'House', 'C', 'Good', 'Brussels'))",
+}
+
+
+def _cold_run(code, repeat):
+    """Best wall time of `code` in a fresh Python process (imports included)."""
+    import subprocess
+    import sys
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.abspath(__file__)), os.environ.get('PYTHONPATH', '')]))
+    return best_time(lambda: subprocess.run([sys.executable, '-c', code], check=True, env=env), repeat=repeat)[0]
+
+
+def bench_startup(rows=None, repeat=3):
+    """Time to first render of the Streamlit app, in fresh processes.
+
+    EN : Replays the start-up work of the previous and of the lazy app without Streamlit,
+    then, when Streamlit is installed, renders the first page with its AppTest runner.
+    FR : Rejoue le démarrage de l'ancienne et de la nouvelle application, puis affiche la
+    première page avec AppTest si Streamlit est installé.
+    """
+    from model_artifact_santo import ARTIFACT_PATH
+    if not os.path.exists(ARTIFACT_PATH):
+        print(f"{ARTIFACT_PATH} not found: run main_santo.py first.")
+        return
+    baseline = _cold_run("pass", repeat)  # EN Python start-up alone - FR Démarrage de Python seul
+    results = [('python', (baseline, 0.0))]
+    for name, code in STARTUP_SCRIPTS.items():
+        wall = _cold_run(code, repeat)
+        results.append((name, (wall, wall - baseline)))
+    try:
+        import streamlit # noqa: F401 - EN Optional: only for the real first render - FR Optionnel : seulement pour le vrai premier affichage
+        app = os.path.join(os.path.dirname(os.path.abspath(__file__)), APP_PATH)
+        wall = _cold_run(f"from streamlit.testing.v1 import AppTest; AppTest.from_file({app!r}, default_timeout=120).run()", repeat)
+        results.append(('app first page', (wall, wall - baseline)))
+    except ImportError:
+        print("Streamlit is not installed: the app itself is not rendered.")
+    print_table("Cold start of the app (seconds, fresh process)", results, ['WALL', 'WITHOUT PY'])
+
+
+# --- 6. EN : Spatial features - FR : Variables spatiales ---
+
+def synthetic_listings(rows, seed=42):
+    """Listings spread over Belgium around 50 towns, with a surface and a price."""
+    rng = np.random.default_rng(seed)
+    towns = np.column_stack([rng.uniform(49.6, 51.4, 50), rng.uniform(2.6, 6.3, 50)])
+    town = rng.integers(0, len(towns), rows)
+    surface = rng.uniform(40, 300, rows)
+    X = pd.DataFrame({'latitude': towns[town, 0] + rng.normal(0, 0.05, rows),
+                      'longitude': towns[town, 1] + rng.normal(0, 0.08, rows),
+                      'habitablesurface': surface})
+    return X, surface * rng.uniform(1_500, 4_500, rows)
+
+
+def _brute_force_spatial(spatial, X_train, y_train, X_query, own):
+    """Same features by computing every distance (reference of the KD-tree)."""
+    from spatial_features_santo import unit_vectors, chord_length
+    points = unit_vectors(X_train['latitude'].to_numpy(), X_train['longitude'].to_numpy())
+    price_per_m2 = y_train / X_train['habitablesurface'].to_numpy()
+    queries = unit_vectors(X_query['latitude'].to_numpy(), X_query['longitude'].to_numpy())
+    distances = np.sqrt(((queries[:, None, :] - points[None, :, :]) ** 2).sum(axis=2))
+    distances[np.arange(len(own))[own >= 0], own[own >= 0]] = np.inf  # EN Leave the row itself out - FR Exclure la ligne elle-même
+    nearest = np.argsort(distances, axis=1, kind='stable')[:, :spatial.n_neighbors]
+    return np.median(price_per_m2[nearest], axis=1), (distances <= chord_length(spatial.radius_km)).sum(axis=1)
+
+
+def bench_spatial(rows=1_000_000, queries=1_000):
+    """Build and query throughput of the KD-tree features, single-listing latency, and a brute-force check."""
+    from spatial_features_santo import SpatialFeatures
+
+    # EN Correctness on a small sample: training rows (self left out) and new rows - FR Vérification sur un petit échantillon
+    X_small, y_small = synthetic_listings(20_000, seed=1)
+    spatial = SpatialFeatures()
+    training = spatial.fit_transform(X_small, y_small).iloc[:500]
+    expected = _brute_force_spatial(spatial, X_small, y_small, X_small.iloc[:500], np.arange(500))
+    np.testing.assert_allclose(training['nearby_price_per_m2'], expected[0], rtol=1e-6)
+    np.testing.assert_array_equal(training['nearby_listings'], expected[1])
+    X_new, _ = synthetic_listings(500, seed=2)
+    serving = spatial.transform(X_new)
+    expected = _brute_force_spatial(spatial, X_small, y_small, X_new, np.full(500, -1))
+    np.testing.assert_allclose(serving['nearby_price_per_m2'], expected[0], rtol=1e-6)
+    np.testing.assert_array_equal(serving['nearby_listings'], expected[1])
+
+    X, y = synthetic_listings(rows)
+    X_new, _ = synthetic_listings(rows // 10, seed=43)
+    spatial = SpatialFeatures()
+    build_time, _ = best_time(lambda: SpatialFeatures().fit(X, y), repeat=1)
+    training_time, _ = best_time(lambda: spatial.fit_transform(X, y), repeat=1)
+    serving_time, _ = best_time(lambda: spatial.transform(X_new), repeat=1)
+    latencies = []
+    for position in range(queries):
+        row = X_new.iloc[[position]]
+        start = time.perf_counter()
+        spatial.transform(row)
+        latencies.append(time.perf_counter() - start)
+
+    print_table(f"KD-tree spatial features on {rows} listings (k={spatial.n_neighbors}, radius {spatial.radius_km} km)", [
+        ('build tree', (build_time, int(rows / build_time))),
+        ('training rows', (training_time, int(rows / training_time))),
+        ('new rows', (serving_time, int(len(X_new) / serving_time))),
+        ('one listing p50', (float(np.median(latencies)), int(1 / np.median(latencies)))),
+        ('one listing p99', (float(np.percentile(latencies, 99)), int(1 / np.percentile(latencies, 99)))),
+    ], ['SECONDS', 'ROWS / s'])
+
+
+# --- 7. EN : Flat forest inference engine - FR : Moteur d'inférence de forêt à plat ---
+
+def synthetic_forest(rows, n_estimators, max_depth):
+    """Forest fitted on the synthetic training frame, with the serving settings of the saved artifacts."""
+    from sklearn.ensemble import RandomForestRegressor
+    X, y = synthetic_training_frame(rows)
+    X = X.to_numpy()
+    forest = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, n_jobs=-1, random_state=42).fit(X, y)
+    return forest.set_params(n_jobs=None), X
+
+
+def bench_engine(rows=20_000, n_estimators=200, max_depth=20, repeat=200):
+    """Latency of `model.predict` against the FlatForest engine, from one row to a large batch."""
+    from forest_engine_santo import FlatForest
+
+    forest, X = synthetic_forest(rows, n_estimators, max_depth)
+    build_time, engine = best_time(lambda: FlatForest(forest), repeat=1)
+    np.testing.assert_array_equal(engine.predict(X), forest.predict(X))  # EN Same values, bit for bit - FR Mêmes valeurs, au bit près
+
+    results = []
+    for batch in (1, 10, 100, 1_000, 10_000):
+        calls = max(1, repeat // batch)
+        sklearn_time, _ = best_time(lambda: [forest.predict(X[:batch]) for _ in range(calls)])
+        engine_time, _ = best_time(lambda: [engine.predict(X[:batch]) for _ in range(calls)])
+        results.append((f"{batch} rows", (sklearn_time / calls * 1e3, engine_time / calls * 1e3, sklearn_time / engine_time)))
+    print_table(f"Forest inference, {n_estimators} trees, max_depth={max_depth} (ms per call); engine built in "
+                f"{build_time:.2f} s, {engine.nbytes / 1e6:.0f} MB of node arrays",
+                results, ['SKLEARN', 'ENGINE', 'SPEED-UP'])
+
+
+# --- 8. EN : Prediction intervals - FR : Intervalles de prédiction ---
+
+def bench_intervals(rows=20_000, n_estimators=200, max_depth=20, repeat=200):
+    """Cost of the P10/P90 interval on top of `predict`, for the sklearn trees and for the FlatForest engine."""
+    from forest_engine_santo import FlatForest, summarize, tree_predictions
+
+    forest, X = synthetic_forest(rows, n_estimators, max_depth)
+    engine = FlatForest(forest)
+    mean, _ = summarize(tree_predictions(forest, X))
+    np.testing.assert_array_equal(mean, forest.predict(X))  # EN The interval pass gives the same price - FR Le même prix
+
+    results = []
+    for name, predict, interval, batch in (
+            ('sklearn 10000', forest.predict, lambda rows: summarize(tree_predictions(forest, rows)), 10_000),
+            ('sklearn 1', forest.predict, lambda rows: summarize(tree_predictions(forest, rows)), 1),
+            ('engine 1', engine.predict, engine.predict_interval, 1),
+            ('engine 100', engine.predict, engine.predict_interval, 100)):
+        calls = max(1, repeat // batch)
+        predict_time, _ = best_time(lambda: [predict(X[:batch]) for _ in range(calls)])
+        interval_time, _ = best_time(lambda: [interval(X[:batch]) for _ in range(calls)])
+        results.append((name, (predict_time / calls * 1e3, interval_time / calls * 1e3,
+                               (interval_time - predict_time) / predict_time * 100)))
+    print_table(f"P10/P90 from the tree predictions, {n_estimators} trees (ms per call)", results, ['PREDICT', 'INTERVAL', 'OVERHEAD %'])
+
+
+# --- 9. EN : Headless figures - FR : Figures sans affichage ---
+
+def synthetic_cleaned_frame(rows, features=100, seed=42):
+    """Cleaned-like frame: price, float32 features and the one-hot type column."""
+    X, y = synthetic_training_frame(rows, features, seed)
+    X['type_HOUSE'] = np.random.default_rng(seed).random(rows) < 0.6
+    X['price'] = y.to_numpy()
+    return X
+
+
+def legacy_visualizations(df, output_dir):
+    """Previous figures: seaborn KDE over every price and the annotated heatmap of every column."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.figure(figsize=(10, 3))
+    sns.histplot(df['price'], bins=100, kde=True)
+    plt.savefig(os.path.join(output_dir, 'distribution_prix.png'), bbox_inches='tight')
+    plt.close()
+    plt.figure(figsize=(18, 12))
+    sns.heatmap(df.corr(numeric_only=True), annot=True, fmt='.2f', cmap='coolwarm', linewidths=0.5, vmin=-1, vmax=1, annot_kws={"size": 6})
+    plt.savefig(os.path.join(output_dir, 'heatmap_correlation.png'), bbox_inches='tight')
+    plt.close()
+
+
+def bench_visualizations(rows=2_000_000, legacy_rows=100_000):
+    """Headless report on `rows` rows against the previous figures on `legacy_rows` rows."""
+    from data_visualization_santo import create_visualizations
+    df = synthetic_cleaned_frame(rows)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_time, _ = best_time(lambda: legacy_visualizations(df.head(legacy_rows), directory), repeat=1)
+        results.append((f"previous {legacy_rows}", (legacy_time,)))
+        for size in (legacy_rows, rows):
+            report_time, _ = best_time(lambda: create_visualizations(df.head(size), directory), repeat=1)
+            results.append((f"headless {size}", (report_time,)))
+    print_table(f"Figures of a cleaned frame with {df.shape[1]} columns (seconds)", results, ['SECONDS'])
+
+
+# --- 10. EN : Encoding of the categorical columns - FR : Encodage des variables catégorielles ---
+
+def bench_encoding(rows=None, data_path='data/Kangaroo.csv'):
+    """Cleaning time and memory, CSV size and gradient boosting fit of the one-hot and integer-code encodings.
+
+    EN : 'one_hot' is the dense get_dummies path with TOP_LOCALITIES localities, also run with
+    the CODES_TOP_LOCALITIES cap of the 'codes' path to show what lifting the cap costs it;
+    'codes' trains the native-categorical gradient boosting. Needs the Kangaroo and Giraffe files.
+    FR : 'one_hot' est l'encodage dense (aussi avec la limite de localités du chemin 'codes'),
+    'codes' entraîne le gradient boosting à catégories natives.
+    """
+    from unittest import mock
+    import data_cleaning_santo as cleaning
+    from model_gradient_boosting_regressor_building_santo import build_gradient_boosting_model
+
+    if not os.path.exists(data_path):
+        print(f"{data_path} not found: the encoding benchmark cleans the raw Kangaroo file.")
+        return
+    from dataset_cache_santo import load_dataset
+    load_dataset(data_path, compact=False)  # EN Columnar cache and Giraffe store built before the timings - FR Caches construits avant les mesures
+    cleaning.LookupStore.open(cleaning.GIRAFFE_PATH, 'propertyId', cleaning.GIRAFFE_COLUMNS)
+    cases = [('one_hot', 'one_hot', cleaning.TOP_LOCALITIES), (f'one_hot {cleaning.CODES_TOP_LOCALITIES} loc.', 'one_hot', cleaning.CODES_TOP_LOCALITIES),
+             ('codes', 'codes', cleaning.CODES_TOP_LOCALITIES)]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, 'cleaned.csv')
+        for name, encoding, localities in cases:
+            with mock.patch.object(cleaning, 'TOP_LOCALITIES', localities):
+                start = time.perf_counter()
+                peak, df = peak_memory(lambda: cleaning.data_cleaning(data_path, output_path, encoding=encoding))
+                clean_time = time.perf_counter() - start
+            df = df.head(rows) if rows else df
+            start = time.perf_counter()
+            _, _, _, _, _, test_rmse, _, _ = build_gradient_boosting_model(df, native_categories=encoding == 'codes')
+            fit_time = time.perf_counter() - start
+            results.append((name, (df.shape[1], clean_time, peak, df.memory_usage(deep=True).sum() / 1e6,
+                                   os.path.getsize(output_path) / 1e6, fit_time, round(test_rmse))))
+    print_table(f"Encodings of {len(df):,} cleaned rows (gradient boosting fit and test RMSE)", results,
+                ['COLUMNS', 'CLEAN s', 'PEAK MB', 'FRAME MB', 'CSV MB', 'FIT s', 'TEST RMSE'])
+
+
+BENCHMARKS = {
+    'cleaning': bench_cleaning_loops,
+    'artifact': bench_artifact,
+    'models': bench_models,
+    'memory': bench_memory,
+    'startup': bench_startup,
+    'spatial': bench_spatial,
+    'engine': bench_engine,
+    'intervals': bench_intervals,
+    'visualizations': bench_visualizations,
+    'encoding': bench_encoding,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Immo Eliza performance benchmarks.")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS), help="Benchmark to run.")
+    parser.add_argument('--rows', type=int, default=None, help="Number of synthetic rows (default: per benchmark).")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](**({'rows': args.rows} if args.rows else {}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import hashlib # EN : Fingerprint of the dataset and of the model - FR : Empreinte du dataset et du modèle
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import shutil # EN : Removal of the old fold caches - FR : Suppression des anciens caches de folds
+import time # EN : Fit timing of the folds - FR : Chronométrage des folds
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+from joblib import Parallel, delayed, dump, hash as joblib_hash, load # EN : One fold per worker process - FR : Un fold par processus
+from sklearn.base import clone
+from sklearn.model_selection import RepeatedKFold
+from hyperparameter_search_santo import evaluate_model, log_table
+
+CV_DIR = 'data/cache/cv'  # EN One directory per dataset fingerprint - FR Un dossier par empreinte du dataset
+N_SPLITS = 5
+MAX_DATASETS = 3  # EN Fold caches kept, the least recently used are removed - FR Caches gardés, les moins récents sont supprimés
+
+
+def data_fingerprint(df):
+    """Hash of the values, columns and dtypes of the cleaned dataset."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(repr(list(df.dtypes.astype(str).items())).encode())
+    return digest.hexdigest()[:16]
+
+
+def share_frame(df, directory, target='price'):
+    """Write the features (float32) and the target (float64) as .npy files read through memory maps by the workers.
+
+    EN : The workers open the same files with `mmap_mode='r'` and copy only the rows
+    of their fold, instead of receiving a pickled copy of the whole frame.
+    FR : Les processus ouvrent les mêmes fichiers en mémoire partagée et ne copient que
+    les lignes de leur fold, au lieu de recevoir tout le dataset sérialisé.
+    """
+    features_path = os.path.join(directory, 'features.npy')
+    target_path = os.path.join(directory, 'target.npy')
+    if not (os.path.exists(features_path) and os.path.exists(target_path)):
+        features = df.columns != target
+        np.save(features_path, df.loc[:, features].to_numpy(dtype=np.float32))
+        np.save(target_path, df[target].to_numpy(dtype=np.float64))
+    return features_path, target_path
+
+
+def fold_indices(directory, n_rows, n_splits=N_SPLITS, n_repeats=1, seed=42):
+    """(train, test) row positions of each fold, computed once per dataset and settings."""
+    path = os.path.join(directory, f'folds_{n_splits}x{n_repeats}_{seed}.joblib')
+    if os.path.exists(path):
+        return load(path)
+    folds = list(RepeatedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=seed).split(np.arange(n_rows)))
+    dump(folds, path)
+    return folds
+
+
+def _fold_frame(features, columns, dtypes, rows):
+    """Rows of the memory-mapped features as a frame with the dtypes of the cleaned dataset."""
+    return pd.DataFrame(features[rows], columns=columns).astype(dtypes)
+
+
+def _run_fold(estimator, features_path, target_path, columns, dtypes, train, test, model_path):
+    """Fit (or load from the cache) the model of one fold and score it; runs in a worker process."""
+    features = np.load(features_path, mmap_mode='r')
+    target = np.load(target_path, mmap_mode='r')
+    X_train, X_test = _fold_frame(features, columns, dtypes, train), _fold_frame(features, columns, dtypes, test)
+    y_train, y_test = np.asarray(target[train]), np.asarray(target[test])
+
+    cached = os.path.exists(model_path)
+    start = time.perf_counter()
+    if cached:
+        model = load(model_path)
+    else:
+        model = clone(estimator).fit(X_train, y_train)
+        dump(model, model_path)
+    fit_time = time.perf_counter() - start
+    train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae = evaluate_model(model, X_train, X_test, y_train, y_test)
+    return {'train_r2': train_r2, 'test_r2': test_r2, 'train_rmse': train_rmse, 'test_rmse': test_rmse,
+            'train_mae': train_mae, 'test_mae': test_mae, 'fit_s': fit_time, 'cached': cached}
+
+
+def _prune_cache(cv_dir, keep, max_datasets):
+    """Remove the least recently used dataset directories beyond `max_datasets`."""
+    directories = [os.path.join(cv_dir, name) for name in os.listdir(cv_dir) if os.path.isdir(os.path.join(cv_dir, name))]
+    directories.sort(key=os.path.getmtime, reverse=True)
+    for directory in [d for d in directories if d != keep][max(max_datasets - 1, 0):]:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def cross_validate(model, df, n_splits=N_SPLITS, n_repeats=1, n_jobs=-1, seed=42, cv_dir=CV_DIR, max_datasets=MAX_DATASETS):
+    """K-fold (optionally repeated) evaluation of an unfitted copy of `model` on the cleaned dataset.
+
+    EN : The folds run in parallel worker processes sharing the memory-mapped feature
+    matrix. The fold indices and the fitted model of each fold are cached by dataset
+    fingerprint and model parameters, so a second run on the same data only scores the
+    cached models. Logs a per-fold table with the mean and standard deviation, and
+    returns the mean and standard deviation of each metric.
+    FR : Les folds tournent en parallèle dans des processus qui partagent la matrice en
+    mémoire partagée. Les indices et les modèles de chaque fold sont mis en cache : une
+    nouvelle exécution sur les mêmes données ne fait que les évaluer.
+    """
+    start = time.perf_counter()
+    directory = os.path.join(cv_dir, data_fingerprint(df))
+    estimator = clone(model)
+    model_dir = os.path.join(directory, 'models', joblib_hash(estimator))
+    os.makedirs(model_dir, exist_ok=True)
+    os.utime(directory)  # EN Most recently used - FR Utilisé le plus récemment
+    _prune_cache(cv_dir, directory, max_datasets)
+
+    features_path, target_path = share_frame(df, directory)
+    folds = fold_indices(directory, len(df), n_splits, n_repeats, seed)
+    columns = df.columns[df.columns != 'price']
+    dtypes = df[columns].dtypes.to_dict()
+
+    workers = min(len(folds), os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+    scores = Parallel(n_jobs=workers)(
+        delayed(_run_fold)(estimator, features_path, target_path, columns, dtypes, train, test,
+                           os.path.join(model_dir, f'fold_{index}.joblib'))
+        for index, (train, test) in enumerate(folds))
+
+    metrics = ['train_r2', 'test_r2', 'train_rmse', 'test_rmse', 'train_mae', 'test_mae']
+    summary = {}
+    for metric in metrics:
+        values = np.array([score[metric] for score in scores])
+        summary[f'cv_{metric}_mean'], summary[f'cv_{metric}_std'] = float(values.mean()), float(values.std())
+
+    rows = [(f"fold {index % n_splits + 1}" + (f" r{index // n_splits + 1}" if n_repeats > 1 else ""),
+             tuple(score[metric] for metric in metrics) + ('cached' if score['cached'] else f"{score['fit_s']:.1f}",))
+            for index, score in enumerate(scores)]
+    rows += [(statistic, tuple(summary[f'cv_{metric}_{statistic}'] for metric in metrics) + ('',))
+             for statistic in ('mean', 'std')]
+    log_table(f"{n_splits}-fold cross-validation" + (f" x{n_repeats}" if n_repeats > 1 else "") +
+              f" in {time.perf_counter() - start:.1f} s ({sum(score['cached'] for score in scores)}/{len(scores)} folds cached)",
+              ['TRAIN R2', 'TEST R2', 'TRAIN RMSE', 'TEST RMSE', 'TRAIN MAE', 'TEST MAE', 'FIT s'], rows)
+    return summary
@@ -1,139 +1,612 @@
 # --- 1.1. EN : Importing libraries - FR : Importation des bibliothèques ---
 
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
 import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
 import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
-from sklearn.preprocessing import LabelEncoder # EN : Importing the LabelEncoder from sklearn - FR : Importation de LabelEncoder de sklearn
+import json # EN : Importing the JSON library - FR : Importation de la bibliothèque JSON
+import hashlib # EN : Importing the hashlib library - FR : Importation de la bibliothèque hashlib
 import logging  # EN: For logging errors and information - FR: Pour enregistrer les erreurs et informations
+from dataset_cache_santo import load_dataset, save_dataset # EN : Columnar cache of the datasets - FR : Cache colonnaire des datasets
+from profiling_santo import stage # EN : Stage timing of the training runs - FR : Chronométrage des étapes de l'entraînement
+
+# EN : Settings shared by the in-memory and the chunked cleaning - FR : Paramètres partagés par le nettoyage en mémoire et par morceaux
+GIRAFFE_PATH = "data/Giraffe.csv"  # Chemin relatif pour le fichier Giraffe
+GIRAFFE_COLUMNS = ['latitude', 'longitude', 'cadastralIncome', 'primaryEnergyConsumptionPerSqm']
+
+COLUMNS_TO_DROP = ['url', 'unnamed:_0', 'id','monthlycost', 'hasbalcony', 'accessibledisabledpeople', 
+                   'roomcount', 'diningroomsurface', 'streetfacadewidth', 'kitchensurface', 
+                   'floorcount', 'hasdiningroom', 'hasdressingroom', 'hasattic','diningroomsurface',
+                   'haslivingroom','livingroomsurface','gardenorientation','hasbasement',
+                   'streetfacadewidth','kitchensurface']
+
+REQUIRED_COLUMNS = ['price', 'habitablesurface', 'floodzonetype', 'latitude', 'longitude']
+
+BINARY_COLUMNS = [
+    'haslift', 'hasheatpump', 
+    'hasphotovoltaicpanels', 'hasthermicpanels', 'hasgarden', 
+    'hasairconditioning', 'hasarmoreddoor', 'hasvisiophone',
+    'hasoffice', 'hasswimmingpool', 'hasfireplace', 'hasterrace'
+]
+
+TRUE_VALS = ['True', 'true', True, '1', 1, 'yes', 'Yes', 'oui', 'Oui']
+FALSE_VALS = ['False', 'false', False, '0', 0, 'no', 'No', 'non', 'Non']  # EN Like any unknown value, they give 0 - FR Comme toute valeur inconnue, elles donnent 0
+
+EPC_ORDER = ['A+', 'A', 'B', 'C', 'D', 'E', 'F', 'G']
+
+TOP_LOCALITIES = 50
+
+# EN : 'one_hot' writes one 0/1 column per category; 'codes' keeps one integer code column per
+# categorical column (-1 for a missing or unknown value), the vocabulary being the state categories.
+# FR : 'one_hot' écrit une colonne 0/1 par catégorie ; 'codes' garde une colonne de codes entiers
+# par variable catégorielle (-1 si absente ou inconnue), le vocabulaire étant les catégories de l'état.
+ENCODINGS = ('one_hot', 'codes')
+CODES_TOP_LOCALITIES = 254  # EN One histogram bin per locality code in HistGradientBoostingRegressor (max_bins=255, 'Other' included) - FR Un bin par code de localité
+
+CATEGORICAL_COLUMNS = [
+    'type', 'subtype', 'province', 'locality',
+    'buildingcondition', 'floodzonetype', 'heatingtype',
+    'kitchentype', 'gardenorientation', 'terraceorientation'
+]
+
+# EN : Vectorized normalization shared by the cleaning paths - FR : Normalisation vectorisée partagée par les nettoyages
+def normalize_binary_columns(df):
+    """Convert every binary column to 0/1 (uint8) in one batched `isin` (1 only for TRUE_VALS)."""
+    columns = [column for column in BINARY_COLUMNS if column in df.columns]
+    if columns:
+        df[columns] = df[columns].isin(TRUE_VALS).astype(np.uint8)
+    return df
+
+
+def bucket_localities(localities, top_localities):
+    """Keep the top localities and replace the other ones by 'Other'."""
+    if isinstance(localities.dtype, pd.CategoricalDtype):
+        # EN Each distinct locality is bucketed once - FR Chaque localité distincte est traitée une fois
+        buckets = localities.cat.categories.where(localities.cat.categories.isin(top_localities), 'Other')
+        codes, categories = pd.factorize(buckets)
+        return pd.Series(pd.Categorical.from_codes(codes[localities.cat.codes], categories), index=localities.index, name=localities.name)
+    return localities.where(localities.isin(top_localities), 'Other')
+
+
+def strip_strings(values):
+    """`values.astype(str).str.strip()`, as a categorical when the column only holds strings.
+
+    EN : Each distinct string is converted once and the rows keep a small integer code.
+    A missing value becomes the 'nan' category, like `astype(str)`: the one-hot
+    encoding and the fitted models use it as the "unknown" category.
+    FR : Chaque texte distinct n'est converti qu'une fois ; une valeur manquante devient
+    la catégorie 'nan', comme avec `astype(str)`.
+    """
+    if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+        return values.astype(str).str.strip()  # EN Mixed values (True and 1.0 are equal keys) - FR Valeurs mixtes
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    stripped_codes, categories = pd.factorize(pd.Index(uniques).astype(str).str.strip())
+    return pd.Series(pd.Categorical.from_codes(stripped_codes[codes], categories), index=values.index, name=values.name)
+
+
+def compact_features(df):
+    """Dtype policy of the cleaned dataset: one-hot bool, binaries uint8, other features float32, price float64."""
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        if column == 'price' or pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype):
+            continue
+        if column in BINARY_COLUMNS:
+            dtypes[column] = np.uint8
+        elif column in CATEGORICAL_COLUMNS:
+            dtypes[column] = np.int16  # EN Category codes of the 'codes' encoding - FR Codes des catégories de l'encodage 'codes'
+        elif column == 'epcscore':
+            dtypes[column] = np.int8  # EN Codes -1..7 of EPC_ORDER - FR Codes -1..7 de EPC_ORDER
+        else:
+            dtypes[column] = np.float32
+    return df.astype(dtypes) if dtypes else df
+
 
 # EN : DataManager class to handle data operations - FR : Classe DataManager pour gérer les opérations sur les données
 class DataManager:
     @staticmethod
-    def merge_columnsFrom(main_df, path_to_csv, id_col, from_id_col, from_columns_to_merge, verbose=0):
-        """Load columns from other dataset."""
+    def merge_columnsFrom(main_df, path_to_csv, id_col, from_id_col, from_columns_to_merge, verbose=0, store=None):
+        """Load columns from other dataset.
+
+        EN : The columns are read from a `LookupStore` built once from `path_to_csv`;
+        chunked callers can pass an already opened `store`.
+        FR : Les colonnes sont lues depuis un `LookupStore` construit une seule fois.
+        """
         if verbose:
             print(f"DataManager::merge_columnsFrom -> Columns to merge : {from_columns_to_merge}")
             print(f"DataManager::merge_columnsFrom -> Columns before merge : {main_df.columns.to_list()}")
         
         main_df[id_col] = pd.to_numeric(main_df[id_col], errors='coerce').astype('Int64')
 
-        # Vérification de l'existence du fichier avant de le charger
+        if store is None:
+            store = LookupStore.open(path_to_csv, from_id_col, from_columns_to_merge)
+            if store is None:
+                return None  # Arrêter l'exécution si le chargement échoue
+
+        main_df = store.merge(main_df, id_col, from_columns_to_merge)
+
+        if verbose:
+            print(f"DataManager::merge_columnsFrom -> columns merged successfully: {main_df.columns.to_list()}")
+        return main_df
+
+
+# EN : Id-keyed lookup store saved next to the source CSV - FR : Table de correspondance par id enregistrée à côté du CSV source
+class LookupStore:
+    """Sorted id array and one value array per column, built once from a CSV.
+
+    EN : The arrays are saved as .npy files in `data/cache/` and opened with memory
+    mapping. The store is rebuilt when the source file changes (mtime, then hash).
+    FR : Les tableaux sont enregistrés en .npy dans `data/cache/` et ouverts en mémoire
+    partagée. La table est reconstruite si le fichier source change (mtime, puis hash).
+    """
+
+    def __init__(self, directory, meta):
+        self.directory = directory
+        self.meta = meta
+        self.ids = np.load(os.path.join(directory, 'ids.npy'), mmap_mode='r')
+        self.columns = {}
+        for column in meta['columns']:
+            path = os.path.join(directory, f'{column}.npy')
+            if meta['dtypes'][column] == 'object':
+                self.columns[column] = np.load(path, allow_pickle=True)
+            else:
+                self.columns[column] = np.load(path, mmap_mode='r')
+
+    @staticmethod
+    def directory_for(path_to_csv, from_id_col):
+        """Folder of the store built from `path_to_csv` on `from_id_col`."""
+        name = os.path.splitext(os.path.basename(path_to_csv))[0]
+        return os.path.join(os.path.dirname(path_to_csv), 'cache', f'{name}.{from_id_col}.store')
+
+    @staticmethod
+    def file_hash(path):
+        """SHA-256 of a file, read by blocks."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @classmethod
+    def open(cls, path_to_csv, from_id_col, from_columns_to_merge):
+        """Open the store of `path_to_csv`, (re)building it if it is missing or stale."""
         if not os.path.exists(path_to_csv):
             logging.error(f"File not found: {path_to_csv}")
-            return None  # Arrêter l'exécution si le fichier n'existe pas
-        
-        from_df = pd.read_csv(path_to_csv)
-        
+            return None
+
+        directory = cls.directory_for(path_to_csv, from_id_col)
+        meta_path = os.path.join(directory, 'meta.json')
+        source = os.stat(path_to_csv)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if set(from_columns_to_merge) <= set(meta['columns']) and meta['size'] == source.st_size:
+                if meta['mtime_ns'] == source.st_mtime_ns:
+                    return cls(directory, meta)
+                # EN Touched but maybe not modified: compare the content - FR Fichier touché : comparer le contenu
+                if meta['sha256'] == cls.file_hash(path_to_csv):
+                    meta['mtime_ns'] = source.st_mtime_ns
+                    with open(meta_path, 'w') as f:
+                        json.dump(meta, f)
+                    return cls(directory, meta)
+            from_columns_to_merge = list(dict.fromkeys(meta['columns'] + from_columns_to_merge))
+
+        return cls.build(path_to_csv, from_id_col, from_columns_to_merge)
+
+    @classmethod
+    def build(cls, path_to_csv, from_id_col, from_columns_to_merge):
+        """Parse the CSV once and save the sorted ids and the value columns."""
+        logging.info(f"Building the lookup store of {path_to_csv}...")
+        source = os.stat(path_to_csv)
+        from_df = pd.read_csv(path_to_csv, usecols=lambda column: column in [from_id_col] + from_columns_to_merge)
+
         # Vérification de l'existence des colonnes dans le fichier source
         if from_id_col not in from_df.columns:
             logging.error(f"Column '{from_id_col}' not found in source file.")
             return None  # Arrêter l'exécution si la colonne de fusion est manquante
-        
-        from_df = from_df[[from_id_col] + from_columns_to_merge]
-        from_df = from_df.rename(columns={from_id_col: 'from_id'})
-        from_df = from_df.drop_duplicates(subset=['from_id'], keep='first')
 
-        main_df = main_df.merge(from_df, left_on=id_col, right_on='from_id', how='left')
-        main_df = main_df.drop(columns=['from_id'])
+        # EN Same rows as drop_duplicates(keep='first'), then sorted by id - FR Mêmes lignes que drop_duplicates, triées par id
+        from_df = from_df.drop_duplicates(subset=[from_id_col], keep='first')
+        missing_id = from_df[from_id_col].isna()
+        na_rows = from_df[missing_id]
+        from_df = from_df[~missing_id].sort_values(from_id_col, kind='stable')
+        if len(na_rows):
+            from_df = pd.concat([from_df, na_rows])  # EN A missing id matches the missing id of the source, as in merge - FR Un id manquant correspond à l'id manquant de la source
 
-        if verbose:
-            print(f"DataManager::merge_columnsFrom -> columns merged successfully: {main_df.columns.to_list()}")
-        return main_df
+        directory = cls.directory_for(path_to_csv, from_id_col)
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'ids.npy'), from_df[from_id_col].iloc[:len(from_df) - len(na_rows)].to_numpy().astype(np.int64))
+        dtypes = {}
+        for column in from_columns_to_merge:
+            values = from_df[column].to_numpy()
+            dtypes[column] = str(values.dtype)
+            np.save(os.path.join(directory, f'{column}.npy'), values, allow_pickle=values.dtype == object)
 
-# EN : Function to clean the data - FR : Fonction pour nettoyer les données
-def data_cleaning(filepath, output_path):
-    # 1.2. EN : Importing the CSV file and reading it using Pandas - FR : Importation du fichier csv et lecture grâce à Pandas
-    df = pd.read_csv(filepath)
-    
-    # Renommer les colonnes
-    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_') # EN Renaming columns - FR Renommer les colonnes
+        meta = {
+            'source': path_to_csv,
+            'mtime_ns': source.st_mtime_ns,
+            'size': source.st_size,
+            'sha256': cls.file_hash(path_to_csv),
+            'id_column': from_id_col,
+            'columns': from_columns_to_merge,
+            'dtypes': dtypes,
+            'na_row': len(from_df) - 1 if len(na_rows) else -1,
+        }
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        return cls(directory, meta)
 
-    # 1.2.2. EN : Check the structure of the DataFrame and merge with the main DataFrame - FR : Vérifier la structure du DataFrame et fusionner avec le DataFrame principal
-    df = DataManager.merge_columnsFrom(
+    def positions(self, ids):
+        """Row of each id in the value arrays, -1 when the id is unknown."""
+        ids = pd.array(ids, dtype='Int64')
+        missing = ids.isna()
+        values = ids.to_numpy(dtype=np.int64, na_value=0)
+        if len(self.ids) == 0:
+            return np.where(missing, self.meta['na_row'], -1)
+        rows = np.minimum(np.searchsorted(self.ids, values), len(self.ids) - 1)
+        rows = np.where(~missing & (self.ids[rows] == values), rows, -1)
+        rows[missing] = self.meta['na_row']
+        return rows
+
+    def lookup(self, ids, columns=None):
+        """DataFrame of the `columns` for each id, NaN for unknown ids (left merge)."""
+        rows = self.positions(ids)
+        unknown = rows < 0
+        result = {}
+        for column in columns or self.meta['columns']:
+            values = np.asarray(self.columns[column])[np.where(unknown, 0, rows)]
+            if unknown.any():
+                # EN Same upcast as a pandas left merge - FR Même conversion qu'une fusion pandas
+                if values.dtype.kind in 'iu':
+                    values = values.astype('float64')
+                elif values.dtype.kind == 'b':
+                    values = values.astype(object)
+                values[unknown] = np.nan
+            result[column] = values
+        return pd.DataFrame(result)
+
+    def merge(self, main_df, id_col, columns=None):
+        """Left merge of the store columns on `main_df[id_col]`."""
+        values = self.lookup(main_df[id_col], columns)
+        values.index = main_df.index
+        return pd.concat([main_df, values], axis=1).reset_index(drop=True)
+
+
+# --- EN : Global cleaning settings, computed on the whole file - FR : Paramètres globaux du nettoyage, calculés sur tout le fichier ---
+
+def rename_columns(df):
+    """Lower case column names without spaces."""
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    return df
+
+
+def merge_giraffe(df, store=None, verbose=0):
+    """Add the GIRAFFE_COLUMNS to `df` by its 'id' column."""
+    return DataManager.merge_columnsFrom(
         main_df=df,
-        path_to_csv="data/Giraffe.csv",  # Chemin relatif pour le fichier Giraffe
+        path_to_csv=GIRAFFE_PATH,
         id_col="id",
         from_id_col="propertyId",
-        from_columns_to_merge=[
-            'latitude',
-            'longitude',
-            'cadastralIncome',
-            'primaryEnergyConsumptionPerSqm'
-        ],
-        verbose=1
+        from_columns_to_merge=GIRAFFE_COLUMNS,
+        verbose=verbose,
+        store=store
     )
-    if df is None:  # Si la fusion échoue, retourner None
-        return None
 
-    # 1.3. EN : Remove duplicates and unnecessary columns - FR : Supprimer les doublons et des colonnes inutiles
-    df = df.drop_duplicates() # EN Remove duplicates - FR Supprimer les doublons
-    df = df.drop(columns=['url', 'unnamed:_0', 'id','monthlycost', 'hasbalcony', 'accessibledisabledpeople', 
-                          'roomcount', 'diningroomsurface', 'streetfacadewidth', 'kitchensurface', 
-                          'floorcount', 'hasdiningroom', 'hasdressingroom', 'hasattic','diningroomsurface',
-                          'haslivingroom','livingroomsurface','gardenorientation','hasbasement',
-                          'streetfacadewidth','kitchensurface']) # EN Drop unnecessary columns - FR Supprimer les colonnes inutiles
+
+def _read_chunks(filepath, chunksize, giraffe_store):
+    """Yield the raw chunks of `filepath`, renamed and merged with Giraffe."""
+    for chunk in pd.read_csv(filepath, chunksize=chunksize):
+        yield merge_giraffe(rename_columns(chunk), store=giraffe_store)
+
+
+def _unify_dtype(first, second):
+    """Dtype of a column read in two chunks, as a single read would infer it."""
+    if first == second:
+        return first
+    numeric = [pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d) for d in (first, second)]
+    return np.dtype('float64') if all(numeric) else np.dtype('object')
+
+
+def _row_hashes(df):
+    """Hash every row so that duplicates can be found across chunks."""
+    canonical = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            canonical[column] = values.astype('float64')  # EN 3 and 3.0 are the same value - FR 3 et 3.0 sont la même valeur
+        else:
+            canonical[column] = values.astype(str)
+    return pd.util.hash_pandas_object(pd.DataFrame(canonical), index=False).to_numpy()
+
+
+class SeenRows:
+    """Hashes of the rows already read, in sorted blocks merged like a binary counter.
+
+    EN : Checking a chunk costs a binary search per block (at most log2 of the chunk
+    count blocks) and adding it merges only the small blocks, so the index is never
+    sorted again as a whole; it holds 8 bytes per unique row.
+    FR : Vérifier un morceau coûte une recherche dichotomique par bloc et l'ajouter ne
+    fusionne que les petits blocs : l'index n'est jamais retrié en entier.
+    """
+
+    def __init__(self):
+        self.blocks = []
+
+    def first_seen(self, hashes):
+        """Mask of the rows not seen before (nor earlier in `hashes`); their hashes are added."""
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        for block in self.blocks:
+            found = block[np.minimum(np.searchsorted(block, hashes), len(block) - 1)] == hashes
+            keep &= ~found
+        added = np.sort(hashes[keep])
+        while self.blocks and len(self.blocks[-1]) <= len(added):
+            added = np.sort(np.concatenate([self.blocks.pop(), added]), kind='mergesort')
+        if len(added):
+            self.blocks.append(added)
+        return keep
+
+
+def _missing_pattern(df):
+    """Bit mask of the REQUIRED_COLUMNS that are missing in each row."""
+    pattern = np.zeros(len(df), dtype=np.int64)
+    for bit, column in enumerate(REQUIRED_COLUMNS):
+        if column in df.columns:
+            pattern |= df[column].isna().to_numpy().astype(np.int64) << bit
+    return pattern
+
+
+def _value_stats(df, pattern, positions, columns):
+    """Count of each value (and its first row) per missing pattern, for the categorical columns."""
+    stats = {}
+    for column in columns:
+        if column in df.columns:
+            frame = pd.DataFrame({'pattern': pattern, 'value': df[column].to_numpy(dtype=object), 'position': positions})
+            stats[column] = frame.groupby(['pattern', 'value'], sort=False, dropna=False)['position'].agg(['size', 'min']).reset_index()
+    return stats
+
+
+def fit_cleaning_state(chunks, encoding='one_hot'):
+    """Compute every global setting of the cleaning from renamed and merged chunks.
+
+    EN : `chunks` is any iterable of frames (a whole DataFrame is a list of one chunk).
+    The state holds the column dtypes, the columns kept by the
+    80% threshold, the `floodzonetype` LabelEncoder classes, the top localities and the
+    categories of each one-hot column. Only aggregates are kept in memory. With
+    `encoding='codes'` the categories are the vocabulary of the code columns and up to
+    CODES_TOP_LOCALITIES localities are kept instead of TOP_LOCALITIES.
+    FR : L'état contient les dtypes, les colonnes gardées (seuil de 80 %),
+    les classes du LabelEncoder, les localités principales et les catégories du one-hot.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding '{encoding}'. Available encodings: {', '.join(ENCODINGS)}")
+    max_localities = TOP_LOCALITIES if encoding == 'one_hot' else CODES_TOP_LOCALITIES
+    stat_columns = [column for column in CATEGORICAL_COLUMNS if column not in COLUMNS_TO_DROP]
+    dtypes = {}
+    seen_rows = SeenRows()
+    notnull_counts = None
+    row_count = 0
+    position = 0
+    value_stats = {column: [] for column in stat_columns}
+
+    for chunk in chunks:
+        for column, dtype in chunk.dtypes.items():
+            dtypes[column] = _unify_dtype(dtypes.get(column, dtype), dtype)
+
+        # 1.3. EN : Duplicates are dropped against every previous chunk - FR : Les doublons sont cherchés dans tous les morceaux précédents
+        keep = seen_rows.first_seen(_row_hashes(chunk))
+        positions = np.arange(position, position + len(chunk))[keep]
+        position += len(chunk)
+        chunk = chunk[keep].drop(columns=COLUMNS_TO_DROP)
+
+        # 1.5. EN : Non-null counts for the 80% threshold - FR : Valeurs non nulles pour le seuil de 80 %
+        counts = chunk.notna().sum()
+        notnull_counts = counts if notnull_counts is None else notnull_counts.add(counts, fill_value=0)
+        row_count += len(chunk)
+
+        for column, stats in _value_stats(chunk, _missing_pattern(chunk), positions, stat_columns).items():
+            value_stats[column].append(stats)
+
+    # 1.4. EN : String columns are converted with astype(str), so they never miss a value - FR : Les colonnes texte n'ont plus de valeurs manquantes
+    object_columns = [column for column in notnull_counts.index if dtypes[column] == object]
+    notnull_counts[object_columns] = row_count
+    kept_columns = [column for column in notnull_counts.index if notnull_counts[column] >= row_count * 0.8]
+
+    # 1.8. EN : A row survives if its missing required values are only in string columns - FR : Une ligne est gardée si ses valeurs manquantes requises sont du texte
+    allowed_bits = sum(1 << bit for bit, column in enumerate(REQUIRED_COLUMNS) if column in object_columns)
+
+    categories = {}
+    floodzone_classes = None
+    top_localities = None
+    for column in stat_columns:
+        if column not in kept_columns or not value_stats[column]:
+            continue
+        stats = pd.concat(value_stats[column], ignore_index=True)
+        stats = stats[(stats['pattern'] & ~allowed_bits) == 0]
+        if column in object_columns:
+            stats['value'] = stats['value'].astype(str).str.strip()
+        stats = stats.dropna(subset=['value'])
+        counts = stats.groupby('value', sort=False).agg(size=('size', 'sum'), first=('min', 'min')).sort_values('first')['size']
+
+        if column == 'floodzonetype':
+            # EN Same classes as LabelEncoder: sorted unique values - FR Mêmes classes que LabelEncoder
+            floodzone_classes = np.unique(counts.index.to_numpy())
+            categories[column] = list(range(len(floodzone_classes)))
+        elif column == 'locality':
+            # EN Same order as value_counts(): first appearance, then by count - FR Même ordre que value_counts()
+            top_localities = counts.sort_values(ascending=False).nlargest(max_localities).index
+            localities = counts.index.where(counts.index.isin(top_localities), 'Other')
+            categories[column] = sorted(set(localities))
+        else:
+            categories[column] = sorted(counts.index)
+
+    return {
+        'dtypes': dtypes,
+        'object_columns': object_columns,
+        'kept_columns': kept_columns,
+        'floodzone_classes': floodzone_classes,
+        'top_localities': top_localities,
+        'categories': categories,
+        'encoding': encoding,
+        'max_localities': max_localities,
+    }
+
+
+# --- EN : Cleaning of a frame with the global settings - FR : Nettoyage d'un DataFrame avec les paramètres globaux ---
+
+def clean_frame(df, state, training=True):
+    """Clean a renamed and merged frame with the settings of `fit_cleaning_state`.
+
+    EN : With `training=False` (scoring new listings) no row is dropped, missing raw
+    columns are added as empty and unknown categories get no one-hot column.
+    FR : Avec `training=False` (nouvelles annonces), aucune ligne n'est supprimée et les
+    colonnes absentes sont ajoutées vides.
+    """
+    if not training:
+        df = df.reindex(columns=list(state['dtypes']))
+    for column, dtype in state['dtypes'].items():
+        if df[column].dtype != dtype:
+            if not training and isinstance(dtype, np.dtype) and dtype.kind in 'iub' and df[column].isna().any():
+                dtype = np.dtype('object') if dtype.kind == 'b' else np.dtype('float64')  # EN Missing values in a new listing - FR Valeurs manquantes d'une nouvelle annonce
+            df[column] = df[column].astype(dtype)
+
+    # 1.3. EN : Remove unnecessary columns - FR : Supprimer des colonnes inutiles
+    df = df.drop(columns=COLUMNS_TO_DROP) # EN Drop unnecessary columns - FR Supprimer les colonnes inutiles
 
     # 1.4. EN : Remove spaces in strings - FR : Supprimer les espaces dans les chaînes de caractères
-    for column in df.select_dtypes(include=['object']).columns: # EN Remove leading and trailing spaces from string columns - FR Supprimer les espaces de début et de fin des colonnes de chaîne
-        df[column] = df[column].astype(str).str.strip() # EN Convert all columns to string and remove leading and trailing spaces - FR Convertir toutes les colonnes en chaîne et supprimer les espaces de début et de fin
+    for column in df.columns:
+        if column in state['object_columns']:
+            df[column] = strip_strings(df[column]) # EN Convert all columns to string and remove leading and trailing spaces - FR Convertir toutes les colonnes en chaîne et supprimer les espaces de début et de fin
 
     # 1.5. EN : Remove columns with too many missing values - FR : Supprimer les colonnes avec trop de valeurs manquantes
-    df = df.dropna(thresh=len(df)*0.8, axis=1) # EN Drop columns with more than 80% missing values - FR Supprimer les colonnes avec plus de 80 % de valeurs manquantes
+    df = df[state['kept_columns']]
 
     # 1.8. EN : Remove missing values in price, habitableSurface, and floodzonetype - FR : Supprimer les valeurs manquantes dans price, habitableSurface, et floodzonetype
-    df = df.dropna(subset=['price', 'habitablesurface', 'floodzonetype', 'latitude', 'longitude'])  # Drop rows with missing critical values
+    if training:
+        df = df.dropna(subset=REQUIRED_COLUMNS)  # Drop rows with missing critical values
 
     # 1.9. EN : Convert binary columns to 0/1 - FR : Convertir les colonnes binaires en 0/1
-    binary_columns = [
-        'haslift', 'hasheatpump', 
-        'hasphotovoltaicpanels', 'hasthermicpanels', 'hasgarden', 
-        'hasairconditioning', 'hasarmoreddoor', 'hasvisiophone',
-        'hasoffice', 'hasswimmingpool', 'hasfireplace', 'hasterrace'
-    ]  # EN Get the binary columns - FR Obtenir les colonnes binaires
-
-    true_vals = ['True', 'true', True, '1', 1, 'yes', 'Yes', 'oui', 'Oui']
-    false_vals = ['False', 'false', False, '0', 0, 'no', 'No', 'non', 'Non']
-
-    for column in binary_columns:
-        if column in df.columns:
-            df[column] = df[column].apply(lambda x: 1 if x in true_vals else (0 if x in false_vals else 0)).astype(int)
+    df = normalize_binary_columns(df)
 
     # 1.10.1. EN : Convert 'epcscore' to an ordered categorical and then to numeric codes - FR : Convertir 'epcscore' en catégorique ordonné puis en codes numériques
     if 'epcscore' in df.columns:
-        epc_order = ['A+', 'A', 'B', 'C', 'D', 'E', 'F', 'G']  # EN Define the order of the categories - FR Définir l'ordre des catégories
-        df['epcscore'] = df['epcscore'].astype(pd.CategoricalDtype(categories=epc_order, ordered=True))  # EN Convert 'epcscore' to categorical with the defined order - FR Convertir 'epcscore' en catégorique avec l'ordre défini
-        df['epcscore'] = df['epcscore'].cat.codes  # EN Convert categorical values to numerical codes - FR Convertir les valeurs catégorielles en codes numériques
+        df['epcscore'] = df['epcscore'].astype(pd.CategoricalDtype(categories=EPC_ORDER, ordered=True)).cat.codes
 
-    # 1.10.2. EN : Encode 'floodzonetype' as integers with LabelEncoder - FR : Encoder 'floodzonetype' en entiers avec LabelEncoder
+    # 1.10.2. EN : Encode 'floodzonetype' as integers, like LabelEncoder - FR : Encoder 'floodzonetype' en entiers, comme LabelEncoder
     if 'floodzonetype' in df.columns:
-        label_encoder = LabelEncoder()  # EN Create a LabelEncoder instance - FR Créer une instance de LabelEncoder
-        df['floodzonetype'] = label_encoder.fit_transform(df['floodzonetype'])  # EN Fit and transform the 'floodzonetype' column - FR Ajuster et transformer la colonne 'floodzonetype'
+        df['floodzonetype'] = pd.Index(state['floodzone_classes']).get_indexer(df['floodzonetype'])  # EN -1 for an unknown value - FR -1 pour une valeur inconnue
 
-    # Réduire le nombre de modalités dans 'locality' aux 50 plus fréquentes
+    # Réduire le nombre de modalités dans 'locality' aux 50 plus fréquentes (254 avec l'encodage 'codes')
     if 'locality' in df.columns:
-        top_localities = df['locality'].value_counts().nlargest(50).index
-        df['locality'] = df['locality'].apply(lambda x: x if x in top_localities else 'Other')
+        df['locality'] = bucket_localities(df['locality'], state['top_localities'])
+
+    # 1.11. EN : One-hot encoding (or integer codes) with the categories of the whole file - FR : Encodage one-hot (ou codes entiers) avec les catégories de tout le fichier
+    cols_to_encode = [col for col in CATEGORICAL_COLUMNS if col in df.columns]
+    if state.get('encoding', 'one_hot') == 'codes':
+        with stage('category_codes') as measured:
+            df = measured.shape(df.assign(**{column: pd.Categorical(df[column], categories=state['categories'][column]).codes
+                                             for column in cols_to_encode}))
+    else:
+        with stage('one_hot') as measured:
+            for column in cols_to_encode:
+                df[column] = pd.Categorical(df[column], categories=state['categories'][column])
+            df = measured.shape(pd.get_dummies(df, columns=cols_to_encode, drop_first=True))
 
-    # 1.11. EN : One-hot Encoding - FR : Encodage One-hot
-    categorical_columns = [
-        'type', 'subtype', 'province', 'locality',
-        'buildingcondition', 'floodzonetype', 'heatingtype',
-        'kitchentype', 'gardenorientation', 'terraceorientation'
-    ]
+    # 1.12. EN : Filter out prices above 1.000.000€ - FR : Filtrer les prix au-delà de 1.000.000€
+    if training:
+        df = df[(df['price'] >= 50000) & (df['price'] <= 1000000)]
+    return compact_features(df)
 
-    # Vérifie si ces colonnes existent encore avant de les encoder
-    cols_to_encode = [col for col in categorical_columns if col in df.columns]
 
-    # Appliquer get_dummies uniquement sur les colonnes encore présentes
-    df = pd.get_dummies(df, columns=cols_to_encode, drop_first=True)
+def vocabulary_path(output_path):
+    """JSON file written next to a cleaned dataset with integer codes: the category of each code."""
+    return os.path.splitext(output_path)[0] + '.vocabulary.json'
 
-    # 1.12. EN : Filter out prices above 1.000.000€ - FR : Filtrer les prix au-delà de 1.000.000€
-    df = df[(df['price'] >= 50000) & (df['price'] <= 1000000)]
 
-    # 1.13. EN : Save the cleaned DataFrame to a CSV file - FR : Enregistrer le DataFrame nettoyé dans un fichier CSV
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path, index=False)
+def save_vocabulary(state, output_path):
+    """Write the vocabulary of the code columns (code i is `vocabulary[column][i]`, -1 missing or unknown)."""
+    vocabulary = {column: [str(category) for category in categories] for column, categories in state['categories'].items()}
+    if state['floodzone_classes'] is not None:  # EN Its categories are the label codes - FR Ses catégories sont les codes du label
+        vocabulary['floodzonetype'] = [str(category) for category in state['floodzone_classes']]
+    with open(vocabulary_path(output_path), 'w') as f:
+        json.dump(vocabulary, f, ensure_ascii=False)
+
+
+# EN : Function to clean the data - FR : Fonction pour nettoyer les données
+def data_cleaning(filepath, output_path, chunksize=None, return_state=False, encoding='one_hot'):
+    """Clean the Kangaroo dataset and save it to `output_path`.
+
+    EN : With `chunksize`, the file is cleaned by chunks with bounded memory
+    (see `data_cleaning_chunked`) and `output_path` is returned instead of the frame:
+    the caller loads it (`load_dataset`) or reads it by chunks.
+    With `return_state`, the fitted cleaning settings are also returned.
+    With `encoding='codes'`, each categorical column is kept as one integer code column
+    and its vocabulary is saved next to the CSV (see `save_vocabulary`).
+    FR : Avec `chunksize`, le fichier est nettoyé par morceaux (voir `data_cleaning_chunked`)
+    et `output_path` est renvoyé au lieu du DataFrame, sans relire le fichier.
+    Avec `return_state`, les paramètres du nettoyage sont aussi retournés.
+    Avec `encoding='codes'`, chaque variable catégorielle reste une colonne de codes entiers.
+    """
+    if chunksize:
+        state = data_cleaning_chunked(filepath, output_path, chunksize, return_state=True, encoding=encoding)
+        if state is None:
+            return None
+        return (output_path, state) if return_state else output_path
+
+    # 1.2. EN : Importing the CSV file (or its columnar cache) using Pandas - FR : Importation du fichier csv (ou de son cache colonnaire) grâce à Pandas
+    with stage('read_csv') as measured:
+        df = measured.shape(load_dataset(filepath, compact=False))
+        df = rename_columns(df) # EN Renaming columns - FR Renommer les colonnes
+
+    # 1.2.2. EN : Check the structure of the DataFrame and merge with the main DataFrame - FR : Vérifier la structure du DataFrame et fusionner avec le DataFrame principal
+    with stage('giraffe_merge') as measured:
+        df = measured.shape(merge_giraffe(df, verbose=1))
+    if df is None:  # Si la fusion échoue, retourner None
+        return None
+
+    # EN : The whole file is a single chunk - FR : Tout le fichier forme un seul morceau
+    with stage('fit_cleaning_state'):
+        state = fit_cleaning_state([df], encoding)
+    with stage('clean_frame') as measured:
+        df = measured.shape(clean_frame(df[SeenRows().first_seen(_row_hashes(df))], state))
+
+    # 1.13. EN : Save the cleaned DataFrame to a CSV file and its columnar cache - FR : Enregistrer le DataFrame nettoyé dans un fichier CSV et son cache colonnaire
+    with stage('save'):
+        save_dataset(df, output_path)
+        if encoding == 'codes':
+            save_vocabulary(state, output_path)
     
     row_count = len(df)
     print(f"Cleaned dataframe saved in: {output_path}")
     print(f"The DataFrame has {row_count} rows.")
-    return df
+    return (df, state) if return_state else df
+
+
+# --- EN : Chunked cleaning with bounded memory - FR : Nettoyage par morceaux avec une mémoire bornée ---
+
+def data_cleaning_chunked(filepath, output_path, chunksize=100_000, return_state=False, encoding='one_hot'):
+    """Clean `filepath` in two passes of `chunksize` rows and append each chunk to `output_path`.
+
+    EN : A first pass computes the global settings, a second one cleans and writes.
+    Gives the same file as `data_cleaning` while only one chunk is held in memory.
+    FR : Une première passe calcule les paramètres globaux, une seconde nettoie et écrit.
+    Donne le même fichier que `data_cleaning` avec un seul morceau en mémoire.
+    """
+    giraffe_store = LookupStore.open(GIRAFFE_PATH, "propertyId", GIRAFFE_COLUMNS)
+    if giraffe_store is None:
+        return None
+    with stage('fit_cleaning_state'):
+        state = fit_cleaning_state(_read_chunks(filepath, chunksize, giraffe_store), encoding)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    row_count = 0
+    seen_rows = SeenRows()  # EN Same duplicates as the first pass, found again - FR Mêmes doublons que la première passe, retrouvés
+    with stage('clean_and_write') as measured:
+        for index, chunk in enumerate(_read_chunks(filepath, chunksize, giraffe_store)):
+            chunk = clean_frame(chunk[seen_rows.first_seen(_row_hashes(chunk))], state)
+            chunk.to_csv(output_path, index=False, mode='w' if index == 0 else 'a', header=index == 0)
+            row_count += len(chunk)
+        measured.count(row_count, len(chunk.columns) if row_count else None)
+    if encoding == 'codes':
+        save_vocabulary(state, output_path)
+
+    print(f"Cleaned dataframe saved in: {output_path}")
+    print(f"The DataFrame has {row_count} rows.")
+    return state if return_state else row_count
@@ -1,74 +1,216 @@
 # EN : Importing libraries - FR : Importation des bibliothèques
+import os
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import time # EN : Rendering time of the report - FR : Durée du rendu du rapport
+from concurrent.futures import ProcessPoolExecutor # EN : One figure per worker process - FR : Une figure par processus
 import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-from matplotlib.ticker import FuncFormatter
 
-def create_visualizations(df, output_dir='figures'):
+SAMPLE_SIZE = 200_000  # EN Rows drawn for the figures that need the raw values (outliers) - FR Lignes tirées pour les valeurs brutes
+HISTOGRAM_BINS = 100
+KDE_GRID = 2048  # EN Fine bins of the binned KDE - FR Classes fines de la KDE sur histogramme
+TOP_K = 20  # EN Features of the heatmap: the most correlated with the price - FR Variables de la heatmap : les plus corrélées au prix
+CHUNK_ROWS = 262_144  # EN Rows per float32 block of the correlations - FR Lignes par bloc float32 des corrélations
+REFERENCE_TYPE = 'APARTMENT'  # EN Type without a one-hot column after drop_first - FR Type sans colonne one-hot après drop_first
 
-	import os
-	os.makedirs(output_dir, exist_ok=True)  # Crée le dossier s'il n'existe pas
 
-	# 2.1. EN : Prices distribution - FR : Distribution des prix
+# 2.0. EN : Data of the figures, computed once on the whole frame - FR : Données des figures, calculées une fois sur tout le dataset
+
+def price_distribution(prices, bins=HISTOGRAM_BINS, grid=KDE_GRID):
+	"""Histogram of every price and its Gaussian KDE computed on fine bins (O(n) + O(grid)), in counts per bar."""
+	prices = np.asarray(prices, dtype=np.float64)
+	prices = prices[np.isfinite(prices)]
+	counts, edges = np.histogram(prices, bins=bins)
+	fine_counts, fine_edges = np.histogram(prices, bins=grid, range=(edges[0], edges[-1]))
+	fine_width = fine_edges[1] - fine_edges[0]
+	# EN Scott's bandwidth, like seaborn - FR Largeur de bande de Scott, comme seaborn
+	bandwidth = prices.std() * len(prices) ** (-1 / 5) if len(prices) > 1 else fine_width
+	offsets = np.arange(-int(np.ceil(4 * bandwidth / fine_width)), int(np.ceil(4 * bandwidth / fine_width)) + 1) * fine_width
+	kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) if bandwidth > 0 else np.ones(1)
+	density = np.convolve(fine_counts, kernel / kernel.sum(), mode='same') / fine_width
+	centers = (fine_edges[:-1] + fine_edges[1:]) / 2
+	return {'counts': counts, 'edges': edges, 'kde_x': centers, 'kde_y': density * (edges[1] - edges[0])}
+
+
+def _centered(values):
+	"""float32 copy of a column minus its mean, missing values at 0 (the mean), and the non-missing count."""
+	values = np.asarray(values, dtype=np.float32)
+	present = ~np.isnan(values)
+	count = int(present.sum())
+	mean = np.float32(values[present].sum(dtype=np.float64) / count) if count else np.float32(0)
+	centered = values - mean
+	centered[~present] = 0
+	return centered, count
+
+
+def _dot(a, b, chunk_rows=CHUNK_ROWS):
+	"""float32 dot product by blocks, summed in float64 (the rounding error stays that of one block)."""
+	return sum(float(np.dot(a[start:start + chunk_rows], b[start:start + chunk_rows])) for start in range(0, len(a), chunk_rows))
+
+
+def top_correlations(df, target='price', top_k=TOP_K, chunk_rows=CHUNK_ROWS):
+	"""Correlation matrix of the target and the `top_k` features most correlated with it.
+
+	EN : The correlation of every feature with the target is computed column by column on
+	float32 copies (O(rows x columns), one column in memory at a time); only the `top_k`
+	kept columns are gathered, by float32 blocks of `chunk_rows` rows, for their matrix.
+	The cost no longer grows with the square of the number of one-hot columns.
+	FR : La corrélation de chaque variable avec la cible est calculée colonne par colonne en
+	float32 ; seules les `top_k` colonnes gardées sont rassemblées par blocs pour la matrice.
+	"""
+	columns = [column for column in df.select_dtypes(include=['number', 'bool']).columns if column != target]
+	price, _ = _centered(df[target].to_numpy())
+	price_norm = np.sqrt(_dot(price, price, chunk_rows))
+	correlations = np.full(len(columns), np.nan)
+	for position, column in enumerate(columns):
+		centered, _ = _centered(df[column].to_numpy())
+		norm = np.sqrt(_dot(centered, centered, chunk_rows))
+		if norm > 0 and price_norm > 0:
+			correlations[position] = _dot(centered, price, chunk_rows) / (norm * price_norm)
+	ranked = [position for position in np.argsort(-np.abs(np.nan_to_num(correlations))) if np.isfinite(correlations[position])]
+	kept = [target] + [columns[position] for position in ranked[:top_k]]
+
+	centered_columns = [_centered(df[column].to_numpy())[0] for column in kept]
+	gram = np.zeros((len(kept), len(kept)))
+	for start in range(0, len(df), chunk_rows):
+		block = np.column_stack([centered[start:start + chunk_rows] for centered in centered_columns])
+		gram += block.T @ block  # EN float32 product per block, summed in float64 - FR Produit float32 par bloc, somme en float64
+	scale = np.sqrt(np.diag(gram))
+	return pd.DataFrame(gram / np.outer(scale, scale), index=kept, columns=kept)
+
+
+def property_types(df, reference_type=REFERENCE_TYPE):
+	"""Type of each listing, from the 'type' column or from its one-hot columns (cleaned frame)."""
+	if 'type' in df.columns:
+		return df['type'].astype(str)
+	one_hot = [column for column in df.columns if column.startswith('type_')]
+	labels = np.full(len(df), reference_type, dtype=object)
+	for column in one_hot:
+		labels[df[column].to_numpy().astype(bool)] = column[len('type_'):]
+	return pd.Series(labels, index=df.index)
+
+
+def box_statistics(prices, types, sample_size=SAMPLE_SIZE, seed=42):
+	"""Quartiles and whiskers of the price per type (matplotlib `bxp` format), outliers from a sample."""
+	frame = pd.DataFrame({'price': np.asarray(prices, dtype=np.float64), 'type': np.asarray(types)}).dropna()
+	stats = []
+	for label, group in frame.groupby('type', sort=True)['price']:
+		values = group.to_numpy()
+		q1, median, q3 = np.percentile(values, [25, 50, 75])
+		low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+		inside = values[(values >= low) & (values <= high)]
+		outliers = values[(values < low) | (values > high)]
+		if len(outliers) > sample_size // 10:
+			outliers = np.random.default_rng(seed).choice(outliers, sample_size // 10, replace=False)
+		stats.append({'label': str(label), 'med': median, 'q1': q1, 'q3': q3, 'fliers': outliers,
+					  'whislo': inside.min() if len(inside) else q1, 'whishi': inside.max() if len(inside) else q3})
+	return stats
+
 
+# 2.1. EN : Rendering, in the main process or in a worker - FR : Rendu, dans le processus principal ou un processus de travail
+
+def _pyplot(headless):
+	import matplotlib
+	if headless:
+		matplotlib.use('Agg')  # EN Non-interactive backend: writes files, never opens a window - FR Backend non interactif
+	import matplotlib.pyplot as plt
+	return plt
+
+
+def _finish(plt, path, headless):
+	plt.savefig(path, bbox_inches='tight')
+	if headless:
+		plt.close()
+	else:
+		plt.show() # EN Show the plot - FR Afficher le tracé
+
+
+def render_price_distribution(data, path, headless=True):
+	from matplotlib.ticker import FuncFormatter
+	plt = _pyplot(headless)
 	plt.figure(figsize=(10, 3)) # EN Set the figure size - FR Définir la taille de la figure
-	sns.histplot(df['price'], bins=100, kde=True) # EN Create a histogram with kernel density estimation - FR Créer un histogramme avec estimation de la densité du noyau
+	plt.stairs(data['counts'], data['edges'], fill=True, alpha=0.5) # EN Histogram of every price - FR Histogramme de tous les prix
+	plt.plot(data['kde_x'], data['kde_y']) # EN Kernel density estimation - FR Estimation de la densité du noyau
 	plt.title('Distribution des prix') # EN Set the title of the plot - FR Définir le titre du tracé
 	plt.xlabel('Prix (en €)') # EN Set the x-axis label - FR Définir l'étiquette de l'axe des x
 	plt.ylabel('Nombre de biens') # EN Set the y-axis label - FR Définir l'étiquette de l'axe des y
-	plt.gca().xaxis.set_major_formatter(ticker.FuncFormatter(lambda x, _: f'{int(x):,}€'))  # Ajout du séparateur de milliers et du symbole €
+	plt.gca().xaxis.set_major_formatter(FuncFormatter(lambda x, _: f'{int(x):,}€'))  # Ajout du séparateur de milliers et du symbole €
 	plt.grid(True) # EN Add grid lines - FR Ajouter des lignes de grille
-	plt.savefig(f'{output_dir}/distribution_prix.png', bbox_inches='tight')
-	plt.show() # EN Show the plot - FR Afficher le tracé
-
-	# 2.2. EN : Correlation heatmap - FR : Heatmap de corrélation
+	_finish(plt, path, headless)
 
-	# Calcul de la matrice de corrélation
-	corr_matrix = df.corr(numeric_only=True)
 
-	# Affichage de la heatmap
+def render_heatmap(corr_matrix, path, headless=True):
+	import seaborn as sns
+	plt = _pyplot(headless)
 	plt.figure(figsize=(18, 12))  # Taille de la figure
-	sns.heatmap(corr_matrix, 
-				annot=True, 
-				fmt='.2f', 
-				cmap='coolwarm', 
-				linewidths=0.5, 
-				vmin=-1, 
-				vmax=1,
+	sns.heatmap(corr_matrix, annot=True, fmt='.2f', cmap='coolwarm', linewidths=0.5, vmin=-1, vmax=1,
 				annot_kws={"size": 6})  # Réduction de la taille de la police
-
-	# Titre et mise en page
-	plt.title('Matrice de Corrélation des Variables', fontsize=16)
+	plt.title(f'Matrice de Corrélation des Variables (prix et {len(corr_matrix) - 1} variables les plus corrélées)', fontsize=16)
 	plt.xticks(rotation=45, ha='right', fontsize=8)
 	plt.yticks(fontsize=8)
 	plt.tight_layout()  # Évite le chevauchement
-	plt.savefig(f'{output_dir}/heatmap_correlation.png', bbox_inches='tight')
-	plt.show()
+	_finish(plt, path, headless)
 
-	# # 2.3. FR : Boxplot pour visualiser la distribution des prix par type de bien
-	# Filtrer les données pour ne garder que 'Appartement' et 'Maison'
-	df_filtered = df[df['type'].isin(['Appartement', 'Maison'])]
 
-	# Boxplot de la distribution des prix par type de bien
+def render_boxplot(stats, path, headless=True):
+	from matplotlib.ticker import FuncFormatter
+	plt = _pyplot(headless)
 	plt.figure(figsize=(10, 6))
-	sns.boxplot(x='type', y='price', data=df_filtered)
+	plt.gca().bxp(stats, showfliers=True) # EN Box plot from the precomputed quartiles - FR Boîte à moustaches à partir des quartiles
 	plt.title('Distribution des prix par type de bien')
 	plt.xlabel('Type de bien')
 	plt.ylabel('Prix')
+	plt.xticks(rotation=45) # Rotation des labels sur l'axe X pour une meilleure lisibilité
+	plt.gca().yaxis.set_major_formatter(FuncFormatter(lambda x, _: f'{x:,.0f}€')) # Formattage des valeurs de l'axe Y en €
+	plt.grid(True)
+	_finish(plt, path, headless)
 
-	# Rotation des labels sur l'axe X pour une meilleure lisibilité
-	plt.xticks(rotation=45)
 
-	# Appliquer le formattage des valeurs de l'axe Y en €
-	plt.gca().yaxis.set_major_formatter(FuncFormatter(lambda x, _: f'{x:,.0f}€'))
+def create_visualizations(df, output_dir='figures', headless=True, top_k=TOP_K, sample_size=SAMPLE_SIZE, workers=None,
+						  reference_type=REFERENCE_TYPE):
+	"""Price distribution, correlation heatmap and price per type figures of a raw or cleaned frame.
+
+	EN : The data of each figure is reduced first (histogram and binned KDE of all the
+	prices, streamed float32 correlations of the `top_k` features most correlated with
+	the price, quartiles per type), so the figures only draw small arrays. In headless
+	mode (default) the non-interactive Agg backend is used and the figures are rendered
+	in parallel worker processes; `headless=False` shows each figure as before.
+	FR : Les données de chaque figure sont d'abord réduites, les figures ne dessinent que de
+	petits tableaux. En mode sans affichage (par défaut), le backend Agg est utilisé et les
+	figures sont rendues en parallèle ; `headless=False` les affiche comme avant.
+	"""
+	os.makedirs(output_dir, exist_ok=True)  # Crée le dossier s'il n'existe pas
+
+	# 2.1. EN : Prices distribution - FR : Distribution des prix
+	# 2.2. EN : Correlation heatmap - FR : Heatmap de corrélation
+	# 2.3. FR : Boxplot de la distribution des prix par type de bien (colonne 'type' ou ses colonnes one-hot)
+	figures = [
+		(render_price_distribution, price_distribution(df['price']), 'distribution_prix.png'),
+		(render_heatmap, top_correlations(df, top_k=top_k), 'heatmap_correlation.png'),
+		(render_boxplot, box_statistics(df['price'], property_types(df, reference_type), sample_size), 'boxplot_prix_par_type.png'),
+	]
+	paths = [os.path.join(output_dir, name) for _, _, name in figures]
+	workers = min(len(figures), os.cpu_count() or 1) if workers is None else workers
+	if headless and workers > 1:
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			for future in [executor.submit(render, data, path, True) for (render, data, _), path in zip(figures, paths)]:
+				future.result()
+	else:
+		for (render, data, _), path in zip(figures, paths):
+			render(data, path, headless)
+	return paths
 
-	# Afficher la grille
-	plt.grid(True)
 
-	# Afficher le graphique
-	plt.savefig(f'{output_dir}/boxplot_prix_par_type.png', bbox_inches='tight')
-	plt.show()
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Figures of a raw or cleaned Immo Eliza dataset.")
+	parser.add_argument('data', nargs='?', default='data/Kangaroo_cleaned.csv', help="Dataset (.csv, cached as Feather).")
+	parser.add_argument('--output', default='figures', help="Folder of the figures.")
+	parser.add_argument('--top-k', type=int, default=TOP_K, help="Features of the correlation heatmap.")
+	parser.add_argument('--workers', type=int, default=None, help="Rendering processes (default: one per figure).")
+	parser.add_argument('--show', action='store_true', help="Show each figure in a window (interactive backend).")
+	args = parser.parse_args()
 
+	from dataset_cache_santo import load_dataset
+	start = time.perf_counter()
+	paths = create_visualizations(load_dataset(args.data), args.output, headless=not args.show, top_k=args.top_k, workers=args.workers)
+	print(f"{len(paths)} figures saved in {args.output} in {time.perf_counter() - start:.2f} s.")
@@ -0,0 +1,116 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import json # EN : Importing the JSON library - FR : Importation de la bibliothèque JSON
+import logging # EN : For logging errors and information - FR : Pour enregistrer les erreurs et informations
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+
+try:
+    import pyarrow as pa # EN : Arrow/Feather columnar files - FR : Fichiers colonnaires Arrow/Feather
+    import pyarrow.feather as feather
+except ImportError:  # EN Without pyarrow every load falls back to CSV - FR Sans pyarrow, tout est lu depuis le CSV
+    pa = None
+    feather = None
+
+CACHE_DIR = 'cache'  # EN Sub-folder next to the CSV files - FR Sous-dossier à côté des fichiers CSV
+COMPRESSION = 'uncompressed'  # EN Read through the memory map without decompression ('lz4' or 'zstd' for smaller files) - FR Lu via le mapping mémoire sans décompression
+DTYPE_POLICY = 2  # EN Version of `compact_dtypes`, the caches of another version are rewritten - FR Version de `compact_dtypes`, les caches d'une autre version sont réécrits
+
+
+def cache_path(csv_path):
+    """Path of the Feather file caching `csv_path`."""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(csv_path), CACHE_DIR, f'{name}.feather')
+
+
+def _source_signature(csv_path):
+    """Size and modification time of the CSV, used to detect a stale cache."""
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def compact_dtypes(df):
+    """Dtype policy of the cleaned dataset, the one of `compact_features`: a frame read from the cache has the dtypes of a freshly cleaned one."""
+    from data_cleaning_santo import compact_features  # EN data_cleaning_santo imports this module - FR data_cleaning_santo importe ce module
+    return compact_features(df)
+
+
+def _restore_missing(df):
+    """Arrow gives None for missing values in object columns, pandas CSV gives NaN."""
+    for column in df.select_dtypes(include=['object']).columns:
+        if df[column].isna().any():
+            df[column] = df[column].where(df[column].notna(), np.nan)
+    return df
+
+
+def write_cache(df, csv_path, compact=True, compression=COMPRESSION):
+    """Write the Feather cache of `csv_path` from a frame equal to its content.
+
+    EN : An uncompressed file is read through the memory map without decompression; a
+    codec ('lz4', 'zstd') gives a smaller file that is decompressed at each read.
+    FR : Un fichier non compressé est lu via le mapping mémoire sans décompression ; un
+    codec donne un fichier plus petit, décompressé à chaque lecture.
+    """
+    if feather is None:
+        return None
+    path = cache_path(csv_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        table = pa.Table.from_pandas(compact_dtypes(df) if compact else df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as error:
+        # EN Mixed-type object columns cannot be stored: keep using the CSV - FR Colonnes de types mélangés : on garde le CSV
+        logging.warning(f"Dataset cache not written for {csv_path}: {error}")
+        return None
+    feather.write_feather(table, path, compression=compression)
+    with open(f'{path}.json', 'w') as f:
+        json.dump({'source': _source_signature(csv_path), 'compact': compact, 'dtype_policy': DTYPE_POLICY,
+                   'compression': compression}, f)
+    return path
+
+
+def read_cache(csv_path, columns=None, compact=None):
+    """Read the Feather cache of `csv_path` with memory mapping, or None when missing, stale or written with another `compact`."""
+    path = cache_path(csv_path)
+    if feather is None or not os.path.exists(path) or not os.path.exists(f'{path}.json'):
+        return None
+    with open(f'{path}.json') as f:
+        meta = json.load(f)
+    if meta['source'] != _source_signature(csv_path):
+        logging.info(f"Dataset cache is stale for {csv_path}, reading the CSV.")
+        return None
+    if 'compression' not in meta:  # EN Written with lz4 before the codec was recorded: rewritten uncompressed - FR Écrit en lz4 avant l'enregistrement du codec
+        logging.info(f"Dataset cache of {csv_path} is compressed, reading the CSV.")
+        return None
+    if compact is not None and (meta.get('compact') != compact or meta.get('dtype_policy') != DTYPE_POLICY):
+        logging.info(f"Dataset cache of {csv_path} has other dtypes (compact={meta.get('compact')}), reading the CSV.")
+        return None
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return _restore_missing(table.to_pandas(split_blocks=True))  # EN No consolidation copy of the mapped columns - FR Pas de copie de consolidation des colonnes mappées
+
+
+def load_dataset(csv_path, compact=True, columns=None, **read_csv_kwargs):
+    """Load a dataset from its columnar cache, or from the CSV (and then write the cache).
+
+    EN : `compact=True` is for the cleaned dataset (dtypes of `compact_features`);
+    raw datasets are loaded with `compact=False` to keep the CSV dtypes.
+    FR : `compact=True` pour le dataset nettoyé ; `compact=False` pour les données brutes.
+    """
+    df = read_cache(csv_path, columns=columns, compact=compact)
+    if df is not None:
+        return df
+
+    df = pd.read_csv(csv_path, **read_csv_kwargs)
+    if not read_csv_kwargs:
+        write_cache(df, csv_path, compact=compact)
+        if compact:
+            df = compact_dtypes(df)
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def save_dataset(df, csv_path, compact=True):
+    """Save `df` as CSV and refresh its columnar cache."""
+    os.makedirs(os.path.dirname(csv_path) or '.', exist_ok=True)
+    df.to_csv(csv_path, index=False)
+    write_cache(df, csv_path, compact=compact)
@@ -0,0 +1,178 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import time # EN : Timing of the importance - FR : Chronométrage de l'importance
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+from data_cleaning_santo import CATEGORICAL_COLUMNS # EN : Prefixes of the one-hot columns - FR : Préfixes des colonnes one-hot
+from forest_engine_santo import CompiledPipeline, compile_pipeline # EN : Node arrays of the forest - FR : Tableaux de nœuds de la forêt
+from prediction_cache_santo import CACHE_SIZE, PredictionCache # EN : Same keys and LRU as the predictions - FR : Mêmes clés et LRU que les prédictions
+
+EXPLANATION_DIR = 'data/cache/explanations'  # EN Importance and baseline per model version - FR Importance et référence par version du modèle
+IMPORTANCE_FIGURE = 'figures/feature_importance_rf.png'
+TOP_CONTRIBUTIONS = 8  # EN Contributions kept per explained listing - FR Contributions gardées par annonce expliquée
+
+
+def feature_group(feature):
+    """Source column of a model feature: 'province_Liège' -> 'province', 'habitablesurface' -> 'habitablesurface'."""
+    for column in CATEGORICAL_COLUMNS:
+        if feature.startswith(column + '_'):
+            return column
+    return feature
+
+
+def group_matrix(features):
+    """Names of the groups and the (features, groups) 0/1 matrix that sums the one-hot columns of a group."""
+    groups, positions = np.unique([feature_group(feature) for feature in features], return_inverse=True)
+    matrix = np.zeros((len(features), len(groups)))
+    matrix[np.arange(len(features)), positions] = 1
+    return groups, matrix
+
+
+# --- 1. EN : Global permutation importance - FR : Importance globale par permutation ---
+
+def _rmse(y_true, y_pred):
+    return float(np.sqrt(np.mean((y_true - y_pred) ** 2)))
+
+
+def _permutation_scores(model, X, y, baseline_rmse, columns, n_repeats, seed):
+    """RMSE increase of each permuted column of `columns`, `n_repeats` times; runs in a worker process."""
+    X = np.array(X)  # EN Own copy: X is a read-only memory map in the workers - FR Copie propre : X est en lecture seule
+    scores = np.empty((len(columns), n_repeats))
+    for position, column in enumerate(columns):
+        rng = np.random.default_rng([seed, column])
+        original = X[:, column].copy()
+        for repeat in range(n_repeats):
+            X[:, column] = original[rng.permutation(len(original))]
+            scores[position, repeat] = _rmse(y, model.predict(X)) - baseline_rmse
+        X[:, column] = original
+    return scores
+
+
+def permutation_importance(model, X, y, feature_names, baseline=None, n_repeats=5, n_jobs=-1, seed=42):
+    """RMSE increase when each feature is shuffled, mean and std over `n_repeats`, sorted by importance.
+
+    EN : The features are split in one group per worker, so the model and X are sent once
+    per worker (joblib memory-maps X). `baseline` (the predictions on the unshuffled X)
+    is computed once and can be passed from a cache.
+    FR : Les variables sont réparties en un groupe par processus : le modèle et X ne sont
+    envoyés qu'une fois par processus. Les prédictions de référence sont calculées une fois.
+    """
+    import pandas as pd
+    from joblib import Parallel, delayed
+    y = np.asarray(y, dtype=np.float64)
+    baseline = model.predict(X) if baseline is None else baseline
+    baseline_rmse = _rmse(y, baseline)
+    workers = min(X.shape[1], os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+    groups = [group for group in np.array_split(np.arange(X.shape[1]), workers) if len(group)]
+    scores = Parallel(n_jobs=workers)(delayed(_permutation_scores)(model, X, y, baseline_rmse, group, n_repeats, seed)
+                                      for group in groups)
+    scores = np.concatenate(scores)
+    return pd.DataFrame({'importance': scores.mean(axis=1), 'std': scores.std(axis=1)},
+                        index=pd.Index(feature_names, name='feature')).sort_values('importance', ascending=False)
+
+
+def global_importance(artifact, df, n_repeats=5, n_jobs=-1, cache_dir=EXPLANATION_DIR):
+    """Permutation importance of the artifact's model on the test split of the cleaned dataset, cached per model version."""
+    from joblib import dump, load
+    from preprocessing_santo import split_frame
+    os.makedirs(cache_dir, exist_ok=True)
+    importance_path = os.path.join(cache_dir, f"importance_{artifact['version']}_{n_repeats}.joblib")
+    if os.path.exists(importance_path):
+        return load(importance_path)
+
+    serving_model = artifact['model']
+    _, X_test, _, y_test = split_frame(df)
+    X = serving_model[1:-1].transform(X_test)  # EN Model features of the test rows - FR Variables du modèle des lignes de test
+    model = serving_model.steps[-1][1]
+    baseline_path = os.path.join(cache_dir, f"baseline_{artifact['version']}.joblib")
+    if os.path.exists(baseline_path):
+        baseline = load(baseline_path)
+    else:
+        baseline = model.predict(X)
+        dump(baseline, baseline_path)
+
+    start = time.perf_counter()
+    importance = permutation_importance(model, X, y_test, artifact['features'], baseline, n_repeats, n_jobs)
+    logging.info(f"Permutation importance of {X.shape[1]} features on {len(X)} rows in {time.perf_counter() - start:.1f} s.")
+    dump(importance, importance_path)
+    return importance
+
+
+def plot_importance(importance, path=IMPORTANCE_FIGURE, top=20):
+    """Horizontal bar chart of the `top` most important features."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    shown = importance.head(top).iloc[::-1]
+    fig, ax = plt.subplots(figsize=(8, 0.35 * len(shown) + 1))
+    ax.barh(shown.index, shown['importance'], xerr=shown['std'], color='#2b7bba')
+    ax.set_xlabel('Hausse de la RMSE quand la variable est permutée (€)')
+    ax.set_title('Importance des variables (permutation, jeu de test)')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fig.savefig(path, bbox_inches='tight')
+    plt.close(fig)
+
+
+# --- 2. EN : Explanation of single predictions - FR : Explication des prédictions ---
+
+class ExplanationCache(PredictionCache):
+    """Bias and largest contributions of each explained listing, cached like the predictions.
+
+    EN : The contributions come from the path decomposition of the FlatForest (one
+    vectorized pass over all trees); the one-hot columns of a categorical column are
+    summed into one contribution. An entry is (bias, ((group, contribution), ...)): the
+    `top` largest contributions, then the sum of the others, so that they add up to the price.
+    FR : Les contributions viennent de la décomposition des chemins de la FlatForest ;
+    les colonnes one-hot d'une même variable sont additionnées.
+    """
+
+    def __init__(self, model, maxsize=CACHE_SIZE, version=None, top=TOP_CONTRIBUTIONS):
+        model = model if isinstance(model, CompiledPipeline) else compile_pipeline(model)
+        if not isinstance(model, CompiledPipeline):
+            raise ValueError("Explanations need a forest model.")
+        super().__init__(model, maxsize, version)
+        self.top = top
+        self.groups, self.group_matrix = group_matrix(model.preprocessing.steps[-1][1].feature_names_)
+
+    def _predict_frame(self, frame):
+        bias, contributions = self.model.engine.contributions(self.model.preprocessing.transform(frame))
+        grouped = contributions @ self.group_matrix
+        entries = []
+        for row_bias, row in zip(bias, grouped):
+            largest = np.argsort(-np.abs(row), kind='stable')[:self.top]
+            shown = tuple((str(self.groups[i]), float(row[i])) for i in largest)
+            entries.append((float(row_bias), shown + (('other features', float(row.sum() - row[largest].sum())),)))
+        return entries
+
+    def explain(self, listing):
+        """(bias, ((group, contribution), ...)) of one raw listing (dict)."""
+        return self._lookup(listing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Permutation importance of the saved model, cached per model version.")
+    parser.add_argument('--model', default=None, help="Model artifact (default: the one of main_santo.py).")
+    parser.add_argument('--data', default='data/Kangaroo_cleaned.csv', help="Cleaned dataset of the training.")
+    parser.add_argument('--repeats', type=int, default=5, help="Shuffles per feature.")
+    parser.add_argument('--figure', default=IMPORTANCE_FIGURE, help="Bar chart of the most important features.")
+    args = parser.parse_args()
+
+    from dataset_cache_santo import load_dataset
+    from model_artifact_santo import ARTIFACT_PATH, load_artifact
+    artifact = load_artifact(args.model or ARTIFACT_PATH)
+    importance = global_importance(artifact, load_dataset(args.data), n_repeats=args.repeats)
+    plot_importance(importance, args.figure)
+
+    logging.info("-" * 45)
+    logging.info(f"| {'Feature':<28} | {'RMSE +':>10} |")
+    logging.info("-" * 45)
+    for feature, row in importance.head(20).iterrows():
+        logging.info(f"| {feature[:28]:<28} | {row['importance']:10.2f} |")
+    logging.info("-" * 45)
+    logging.info(f"Figure saved in {args.figure}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
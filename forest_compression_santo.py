@@ -0,0 +1,265 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import copy # EN : Forests and trees sharing the fitted attributes - FR : Forêts et arbres partageant les attributs ajustés
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import pickle # EN : Serialized size of the models - FR : Taille sérialisée des modèles
+import time # EN : Prediction latency - FR : Latence des prédictions
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+from sklearn.base import clone
+from sklearn.pipeline import Pipeline
+from sklearn.utils import check_random_state
+from sklearn.tree._tree import Tree # EN : Rebuilt trees with fewer nodes - FR : Arbres reconstruits avec moins de nœuds
+from forest_engine_santo import compile_pipeline, is_forest, tree_predictions
+from hyperparameter_search_santo import evaluate_model, log_table
+from preprocessing_santo import split_frame
+
+TOLERANCE = 0.01  # EN Largest relative increase of the out-of-bag RMSE - FR Plus grande hausse relative de la RMSE hors sac
+DEPTH_CAPS = (None, 16, 14, 12, 10, 8)  # EN Depths tried, None keeps the fitted trees - FR Profondeurs essayées, None garde les arbres ajustés
+SELECTION_ROWS = 20_000  # EN Training rows scored by the selection - FR Lignes d'entraînement évaluées par la sélection
+
+
+def node_count(forest):
+    return int(sum(tree.tree_.node_count for tree in forest.estimators_))
+
+
+def node_depths(tree):
+    """Depth of every node of a fitted sklearn tree, one vectorized step per level."""
+    depths = np.zeros(tree.node_count, dtype=np.int64)
+    frontier, depth = np.array([0]), 0
+    while len(frontier):
+        children = np.concatenate([tree.children_left[frontier], tree.children_right[frontier]])
+        frontier, depth = children[children >= 0], depth + 1
+        depths[frontier] = depth
+    return depths
+
+
+def cap_depth(estimator, max_depth):
+    """Copy of a fitted regression tree whose nodes at `max_depth` become leaves, the deeper nodes being removed.
+
+    EN : The value of an internal node is the mean target of its samples, so it is the
+    prediction of the node once it is a leaf. The kept nodes keep their order (a parent
+    before its children) and the node arrays are rebuilt without the removed ones, so the
+    pickle, the FlatForest and the traversal all shrink.
+    FR : La valeur d'un nœud interne est la moyenne de ses échantillons : c'est sa
+    prédiction une fois devenu feuille. Les tableaux de nœuds sont reconstruits sans les
+    nœuds supprimés.
+    """
+    tree = estimator.tree_
+    if max_depth is None or tree.max_depth <= max_depth:
+        return estimator
+    state = tree.__getstate__()
+    nodes = state['nodes']
+    depths = node_depths(tree)
+    keep = depths <= max_depth
+    new_index = np.cumsum(keep) - 1
+    capped_nodes = nodes[keep].copy()
+    leaf = (capped_nodes['left_child'] == -1) | (depths[keep] == max_depth)
+    for child in ('left_child', 'right_child'):
+        capped_nodes[child] = np.where(leaf, -1, new_index[np.maximum(capped_nodes[child], 0)])
+    capped_nodes['feature'][leaf] = -2  # EN TREE_UNDEFINED of sklearn - FR TREE_UNDEFINED de sklearn
+    capped_nodes['threshold'][leaf] = -2
+    if 'missing_go_to_left' in capped_nodes.dtype.names:
+        capped_nodes['missing_go_to_left'][leaf] = 0
+
+    capped_tree = Tree(tree.n_features, np.ones(tree.n_outputs, dtype=np.intp), tree.n_outputs)
+    capped_tree.__setstate__({'max_depth': max_depth, 'node_count': int(keep.sum()),
+                              'nodes': capped_nodes, 'values': state['values'][keep]})
+    capped = copy.copy(estimator)
+    capped.tree_ = capped_tree
+    capped.max_depth = max_depth
+    return capped
+
+
+def with_trees(forest, trees):
+    """Copy of a fitted forest holding `trees` (its other fitted attributes are shared)."""
+    subset = copy.copy(forest)
+    subset.estimators_ = list(trees)
+    subset.n_estimators = len(subset.estimators_)
+    return subset
+
+
+def out_of_bag(forest, n_samples):
+    """Mask (rows, trees) of the training rows each tree of a bagged forest did not draw.
+
+    EN : Redraws the bootstrap of every tree from its `random_state` the way sklearn drew
+    it at fit time (no sample weights), so `n_samples` must be the number of rows the
+    forest was fitted on.
+    FR : Retire le bootstrap de chaque arbre à partir de son `random_state`, comme sklearn
+    lors de l'ajustement ; `n_samples` est le nombre de lignes d'ajustement de la forêt.
+    """
+    if not getattr(forest, 'bootstrap', False):
+        raise ValueError("Out-of-bag rows need a forest fitted with bootstrap=True.")
+    max_samples = forest.max_samples
+    n_drawn = n_samples if max_samples is None else max_samples if isinstance(max_samples, int) else max(int(max_samples * n_samples), 1)
+    mask = np.ones((n_samples, len(forest.estimators_)), dtype=bool)
+    for position, tree in enumerate(forest.estimators_):
+        mask[check_random_state(tree.random_state).randint(0, n_samples, n_drawn), position] = False
+    return mask
+
+
+def masked_rmse(total, counts, y):
+    """RMSE of the mean predictions total / counts over the rows with at least one prediction."""
+    scored = counts > 0
+    squared = np.where(scored, (total / np.maximum(counts, 1) - y) ** 2, 0.0)
+    return np.sqrt(squared.sum(axis=0) / np.maximum(scored.sum(axis=0), 1))
+
+
+def greedy_selection(predictions, y, budget_rmse):
+    """Trees added one at a time, each time the one whose mean with the chosen trees has the lowest RMSE.
+
+    EN : `predictions` holds the predictions of every tree (rows, trees), NaN where a row
+    is in the bag of the tree: the mean of a row only takes the chosen trees it is out of
+    the bag of, and rows without such a tree are left out of the RMSE. Stops at the first
+    subset whose RMSE is within `budget_rmse`; returns the chosen positions and their RMSE
+    (all the trees when the budget is never met).
+    FR : NaN là où une ligne est dans le sac de l'arbre : la moyenne d'une ligne ne prend
+    que les arbres choisis dont elle est hors du sac. S'arrête au premier sous-ensemble
+    dont la RMSE respecte le budget ; renvoie les positions choisies et leur RMSE.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    scored = ~np.isnan(predictions)
+    predictions = np.where(scored, predictions, 0.0)
+    total, counts = np.zeros(len(y)), np.zeros(len(y))
+    available = np.ones(predictions.shape[1], dtype=bool)
+    chosen, rmse = [], np.inf
+    for _ in range(predictions.shape[1]):
+        errors = masked_rmse(total[:, None] + predictions, counts[:, None] + scored, y[:, None])
+        errors[~available] = np.inf
+        best = int(np.argmin(errors))
+        chosen.append(best)
+        available[best] = False
+        total += predictions[:, best]
+        counts += scored[:, best]
+        rmse = float(errors[best])
+        if rmse <= budget_rmse:
+            break
+    return chosen, rmse
+
+
+def compress_forest(forest, X_train, y_train, tolerance=TOLERANCE, depth_caps=DEPTH_CAPS, rows=SELECTION_ROWS):
+    """Smallest forest (in nodes) found by depth capping and greedy tree selection within the RMSE budget.
+
+    EN : `X_train` holds the model features of the rows the forest was fitted on, and each
+    tree is only scored on its out-of-bag rows (at most `rows` of them are drawn). For
+    each depth cap, the trees of the fitted forest are capped and the fewest trees whose
+    out-of-bag RMSE stays within (1 + tolerance) x the one of the whole forest are kept;
+    nothing is refitted. The smaller caps are only tried while a cap meets the budget.
+    Returns the compressed forest (the forest itself when nothing is smaller) and a
+    summary of the choice.
+    FR : Chaque arbre n'est évalué que sur ses lignes hors du sac. Pour chaque profondeur,
+    les arbres de la forêt ajustée sont écrêtés puis le plus petit nombre d'arbres
+    respectant le budget de RMSE hors sac est gardé, sans réajustement. Renvoie la forêt
+    compressée et un résumé.
+    """
+    X_train = np.ascontiguousarray(X_train, dtype=np.float32)
+    y_train = np.asarray(y_train, dtype=np.float64)
+    mask = out_of_bag(forest, len(X_train))
+    if len(X_train) > rows:
+        drawn = np.sort(np.random.default_rng(42).choice(len(X_train), rows, replace=False))
+        X_train, y_train, mask = X_train[drawn], y_train[drawn], mask[drawn]
+    full_rmse = float(masked_rmse(np.where(mask, tree_predictions(forest, X_train), 0.0).sum(axis=1), mask.sum(axis=1), y_train))
+    budget = full_rmse * (1 + tolerance)
+    best, summary = forest, {'depth': None, 'trees': len(forest.estimators_), 'nodes': node_count(forest),
+                             'full_rmse': full_rmse, 'rmse': full_rmse}
+    for depth in depth_caps:
+        capped = with_trees(forest, [cap_depth(tree, depth) for tree in forest.estimators_])
+        chosen, rmse = greedy_selection(np.where(mask, tree_predictions(capped, X_train), np.nan), y_train, budget)
+        if rmse > budget:
+            logging.info(f"Depth cap {depth}: out-of-bag RMSE {rmse:.0f} above the budget {budget:.0f}, smaller caps skipped.")
+            break
+        candidate = with_trees(capped, [capped.estimators_[position] for position in sorted(chosen)])
+        logging.info(f"Depth cap {depth}: {len(chosen)} trees, {node_count(candidate):,} nodes, out-of-bag RMSE {rmse:.0f}.")
+        if node_count(candidate) < summary['nodes']:
+            if depth is not None:
+                candidate.max_depth = min(depth, forest.max_depth or depth)  # EN get_params() describes the served trees - FR get_params() décrit les arbres servis
+            best = candidate
+            summary = {'depth': depth, 'trees': len(chosen), 'nodes': node_count(candidate), 'full_rmse': full_rmse, 'rmse': rmse}
+    return best, summary
+
+
+def compress_pipeline(pipeline, X_train, y_train, tolerance=TOLERANCE, depth_caps=DEPTH_CAPS):
+    """Same pipeline with its forest compressed by `compress_forest` on the rows the pipeline was fitted on.
+
+    EN : The model features of the training rows are rebuilt as at fit time by a fresh copy
+    of the preprocessing (the spatial step leaves each row out of its own neighbourhood);
+    the fitted preprocessing and forest of `pipeline` are not modified.
+    FR : Les variables des lignes d'entraînement sont reconstruites comme à l'ajustement
+    par une copie du prétraitement ; le pipeline ajusté n'est pas modifié.
+    """
+    name, forest = pipeline.steps[-1]
+    if not is_forest(forest):
+        raise ValueError(f"Compression needs a forest model, not {type(forest).__name__}.")
+    features = clone(pipeline[:-1]).fit_transform(X_train, y_train)
+    compressed, summary = compress_forest(forest, features, y_train, tolerance, depth_caps)
+    return Pipeline(pipeline.steps[:-1] + [(name, compressed)]), summary
+
+
+def footprint(pipeline, X_test, y_test, repeat=200):
+    """Pickled size (MB), node count, single-row latency (ms, served engine), batch time (s) and RMSE of a pipeline."""
+    served = compile_pipeline(pipeline)
+    row = X_test.iloc[[0]]
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        served.predict(row)
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    predictions = pipeline.predict(X_test)
+    batch_time = time.perf_counter() - start
+    return (len(pickle.dumps(pipeline)) / 1e6, node_count(pipeline.steps[-1][1]), float(np.median(latencies) * 1000),
+            batch_time, float(np.sqrt(np.mean((predictions - np.asarray(y_test)) ** 2))))
+
+
+def compress_model(training, df, tolerance=TOLERANCE, depth_caps=DEPTH_CAPS):
+    """Compress the forest of a registry result; return the result of the compressed model, or `training` itself.
+
+    EN : `training` is the (name, model, metrics...) tuple of a forest builder and `df` its
+    cleaned dataset. The trees and the depth cap are chosen on the out-of-bag training
+    rows of the fitted forest itself, so the test rows are neither used to select nor to
+    accept the compressed model: its test metrics (the usual train/test metrics of the
+    registry) are not biased by the selection. When no subset is smaller, `training` is
+    returned as is.
+    FR : Les arbres et la profondeur sont choisis sur les lignes d'entraînement hors du
+    sac de la forêt ajustée ; les lignes de test ne servent ni à choisir ni à accepter le
+    modèle compressé, ses métriques de test ne sont donc pas biaisées.
+    """
+    name, model = training[0], training[1]
+    X_train, X_test, y_train, y_test = split_frame(df)
+    compressed, summary = compress_pipeline(model, X_train, y_train, tolerance, depth_caps)
+    if compressed[-1] is model[-1]:
+        logging.info(f"No tree subset within {tolerance:.1%} of the out-of-bag RMSE is smaller: the full forest is kept.")
+        return training
+
+    before, after = footprint(model, X_test, y_test), footprint(compressed, X_test, y_test)
+    log_table(f"Forest compression: {summary['trees']} trees, depth cap {summary['depth'] or '-'}, "
+              f"out-of-bag RMSE {summary['rmse']:.0f} for {summary['full_rmse']:.0f} (tolerance {tolerance:.1%})",
+              ['SIZE MB', 'NODES', 'ROW ms', 'BATCH s', 'TEST RMSE'],
+              [('full forest', before), ('compressed', after),
+               ('ratio', tuple(b / a if a else float('nan') for b, a in zip(before, after)))])
+    return (f"{name} (compressed)", compressed) + evaluate_model(compressed, X_train, X_test, y_train, y_test)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress the forest of the saved model and save it as the serving artifact.")
+    parser.add_argument('--model', default=None, help="Model artifact (default: the one of main_santo.py).")
+    parser.add_argument('--data', default='data/Kangaroo_cleaned.csv', help="Cleaned dataset of the training.")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Largest relative increase of the out-of-bag RMSE.")
+    args = parser.parse_args()
+
+    from dataset_cache_santo import load_dataset
+    from model_artifact_santo import ARTIFACT_PATH, load_artifact, save_artifact
+    path = args.model or ARTIFACT_PATH
+    artifact = load_artifact(path, mmap=False)
+    serving_model = artifact['model']
+    training = ('Random Forest', serving_model[1:])
+    result = compress_model(training, load_dataset(args.data), args.tolerance)
+    if result is training:
+        return
+    name, model, *metrics = result
+    save_artifact(Pipeline(serving_model.steps[:1] + model.steps), path,
+                  metrics=dict(zip(['train_r2', 'test_r2', 'train_rmse', 'test_rmse', 'train_mae', 'test_mae'], metrics)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
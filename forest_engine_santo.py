@@ -0,0 +1,203 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+
+BATCH_ROWS = 4096  # EN Rows traversed together, bounds the (rows, trees) node array - FR Lignes parcourues ensemble
+ENGINE_MAX_ROWS = 128  # EN Above, sklearn's compiled traversal is faster than the per-call savings - FR Au-delà, le parcours compilé de sklearn est plus rapide
+INTERVAL_QUANTILES = (0.1, 0.9)  # EN P10 and P90 of the tree predictions - FR P10 et P90 des prédictions des arbres
+
+
+def summarize(tree_predictions, quantiles=INTERVAL_QUANTILES):
+    """Forest prediction (mean in tree order, like sklearn) and the `quantiles` of the (rows, trees) tree predictions."""
+    mean = np.cumsum(tree_predictions, axis=1)[:, -1] / tree_predictions.shape[1]
+    return mean, np.quantile(tree_predictions, quantiles, axis=1).T
+
+
+def tree_predictions(forest, X):
+    """Prediction of every tree of a sklearn forest, shape (rows, trees), with sklearn's compiled traversal."""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    predictions = np.empty((len(X), len(forest.estimators_)))
+    for position, tree in enumerate(forest.estimators_):
+        predictions[:, position] = tree.predict(X, check_input=False)
+    return predictions
+
+
+class FlatForest:
+    """Trees of a fitted sklearn forest regressor in flat arrays, evaluated with NumPy over all trees at once.
+
+    EN : The nodes of every tree are concatenated into contiguous arrays (feature,
+    threshold, children, value) with global child indices; a leaf points to itself, so
+    `max_depth` vectorized steps bring every (row, tree) pair to its leaf without a branch.
+    `predict` takes a plain float array (the output of FeatureImputer), skips the input
+    validation and the joblib dispatch of sklearn, and returns the same values: float32
+    features compared with float64 thresholds, tree outputs summed in tree order.
+    FR : Les nœuds de tous les arbres sont concaténés dans des tableaux contigus ; une
+    feuille pointe vers elle-même. `predict` prend un tableau simple, sans pandas ni
+    validation, et renvoie les mêmes valeurs que sklearn.
+    """
+
+    def __init__(self, forest):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        if trees[0].n_outputs != 1:
+            raise ValueError("FlatForest only supports single-output regressors.")
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        node_offsets = np.repeat(offsets, sizes)
+        nodes = np.arange(sizes.sum())
+
+        left = np.concatenate([tree.children_left for tree in trees])
+        right = np.concatenate([tree.children_right for tree in trees])
+        leaf = left == -1
+        self.left = np.where(leaf, nodes, left + node_offsets).astype(np.int32)
+        self.right = np.where(leaf, nodes, right + node_offsets).astype(np.int32)
+        self.feature = np.where(leaf, 0, np.concatenate([tree.feature for tree in trees])).astype(np.int32)
+        self.threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+        self.value = np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64)
+        # EN Side of the missing values, learned by sklearn >= 1.3 - FR Côté des valeurs manquantes (sklearn >= 1.3)
+        missing = [getattr(tree, 'missing_go_to_left', None) for tree in trees]
+        self.missing_left = np.concatenate(missing).astype(bool) if all(m is not None for m in missing) else None
+        self.roots = offsets.astype(np.int32)
+        self.max_depth = max(tree.max_depth for tree in trees)
+        self.n_features_in_ = forest.n_features_in_
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        arrays = [self.left, self.right, self.feature, self.threshold, self.value, self.missing_left]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def leaves(self, X):
+        """Global index of the leaf reached by each row in each tree, shape (rows, trees)."""
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[node]]
+            go_left = values <= self.threshold[node]
+            if self.missing_left is not None:
+                go_left |= np.isnan(values) & self.missing_left[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _rows(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, the forest expects {self.n_features_in_}.")
+        return X
+
+    def tree_predictions(self, X):
+        """Prediction of every tree for each row of X, shape (rows, trees)."""
+        X = self._rows(X)
+        return np.concatenate([self.value[self.leaves(X[start:start + BATCH_ROWS])]
+                               for start in range(0, len(X), BATCH_ROWS)] or [np.empty((0, self.n_trees))])
+
+    def predict(self, X):
+        """Mean of the tree predictions for a 2D array (or one 1D row) of model features."""
+        X = self._rows(X)
+        predictions = np.empty(len(X))
+        for start in range(0, len(X), BATCH_ROWS):
+            # EN cumsum adds the trees one after the other, like sklearn - FR cumsum additionne les arbres dans l'ordre, comme sklearn
+            predictions[start:start + BATCH_ROWS] = np.cumsum(self.value[self.leaves(X[start:start + BATCH_ROWS])], axis=1)[:, -1]
+        return predictions / self.n_trees
+
+    def predict_interval(self, X, quantiles=INTERVAL_QUANTILES):
+        """Prediction and tree quantiles of each row, from the same traversal."""
+        return summarize(self.tree_predictions(X), quantiles)
+
+    def contributions(self, X):
+        """Path decomposition of the predictions: bias (rows,) and feature contributions (rows, features).
+
+        EN : At every split the change of node value (mean price of the node) is credited
+        to the split feature; averaged over the trees, the bias (mean root value) plus the
+        contributions of a row gives its prediction. All trees and rows are walked together
+        by batches, and the credits are added with one `bincount` per level.
+        FR : À chaque division, la variation de la valeur du nœud est attribuée à la variable
+        de division ; biais + contributions = prédiction. Tous les arbres et lignes sont
+        parcourus ensemble, avec un `bincount` par niveau.
+        """
+        X = self._rows(X)
+        n_features = self.n_features_in_
+        contributions = np.zeros((len(X), n_features))
+        for start in range(0, len(X), BATCH_ROWS):
+            batch = X[start:start + BATCH_ROWS]
+            rows = np.arange(len(batch))[:, None]
+            node = np.repeat(self.roots[None, :], len(batch), axis=0)
+            credits = np.zeros(len(batch) * n_features)
+            for _ in range(self.max_depth):
+                feature = self.feature[node]
+                values = batch[rows, feature]
+                go_left = values <= self.threshold[node]
+                if self.missing_left is not None:
+                    go_left |= np.isnan(values) & self.missing_left[node]
+                child = np.where(go_left, self.left[node], self.right[node])
+                # EN A leaf is its own child: no change, no credit - FR Une feuille est son propre enfant : aucun crédit
+                credits += np.bincount((rows * n_features + feature).ravel(),
+                                       weights=(self.value[child] - self.value[node]).ravel(), minlength=credits.size)
+                node = child
+            contributions[start:start + len(batch)] = credits.reshape(len(batch), n_features) / self.n_trees
+        bias = np.full(len(X), self.value[self.roots].mean())
+        return bias, contributions
+
+
+class CompiledPipeline:
+    """Serving pipeline whose forest runs on a FlatForest for small requests.
+
+    EN : Requests of up to `max_rows` rows go through the flat arrays; larger batches go
+    to the sklearn forest, whose compiled traversal wins once the per-call overhead is
+    spread over enough rows. Both give the same predictions.
+    FR : Les requêtes d'au plus `max_rows` lignes passent par les tableaux plats, les
+    gros lots par la forêt sklearn. Les deux donnent les mêmes prédictions.
+    """
+
+    def __init__(self, pipeline, max_rows=ENGINE_MAX_ROWS):
+        self.preprocessing = pipeline[:-1]
+        self.forest = pipeline.steps[-1][1]
+        self.engine = FlatForest(self.forest)
+        self.max_rows = max_rows
+
+    def predict(self, X):
+        features = self.preprocessing.transform(X)
+        return self.engine.predict(features) if len(features) <= self.max_rows else self.forest.predict(features)
+
+    def predict_interval(self, X, quantiles=INTERVAL_QUANTILES):
+        features = self.preprocessing.transform(X)
+        if len(features) <= self.max_rows:
+            return self.engine.predict_interval(features, quantiles)
+        return summarize(tree_predictions(self.forest, features), quantiles)
+
+
+def is_forest(model):
+    from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+    return isinstance(model, (RandomForestRegressor, ExtraTreesRegressor))
+
+
+def supports_intervals(model):
+    """True for a CompiledPipeline or a pipeline ending with a forest."""
+    return isinstance(model, CompiledPipeline) or (hasattr(model, 'steps') and is_forest(model.steps[-1][1]))
+
+
+def predict_interval(model, X, quantiles=INTERVAL_QUANTILES):
+    """Prediction and `quantiles` of the tree predictions of a forest pipeline, without a second model.
+
+    EN : The trees are evaluated once; their mean is the usual prediction (same value as
+    `predict`) and their quantiles give the interval. The interval shows how much the
+    trees disagree, a spread of the forest rather than a calibrated coverage.
+    FR : Les arbres sont évalués une fois ; leur moyenne est la prédiction habituelle et
+    leurs quantiles donnent l'intervalle (désaccord des arbres, pas une couverture calibrée).
+    """
+    if isinstance(model, CompiledPipeline):
+        return model.predict_interval(X, quantiles)
+    if not supports_intervals(model):
+        raise ValueError(f"{type(model.steps[-1][1]).__name__ if hasattr(model, 'steps') else type(model).__name__} "
+                         "has no per-tree predictions: intervals need a forest.")
+    return summarize(tree_predictions(model.steps[-1][1], model[:-1].transform(X)), quantiles)
+
+
+def compile_pipeline(pipeline):
+    """Pipeline with the same predictions, on the FlatForest engine when its model is a forest (unchanged otherwise)."""
+    if not is_forest(pipeline.steps[-1][1]):
+        return pipeline
+    return CompiledPipeline(pipeline)
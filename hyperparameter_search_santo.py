@@ -0,0 +1,144 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import math # EN : Number of rounds of the search - FR : Nombre de tours de la recherche
+import time # EN : Fit and predict timing - FR : Chronométrage de l'entraînement et de la prédiction
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+from joblib import Parallel, delayed # EN : One configuration per core - FR : Une configuration par cœur
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import ParameterSampler, train_test_split
+from sklearn.pipeline import Pipeline
+from preprocessing_santo import FeatureImputer, split_frame
+from spatial_features_santo import SpatialFeatures
+
+# EN : Search space of the forest - FR : Espace de recherche de la forêt
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200, 400],
+    'max_depth': [10, 15, 20, None],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': [1.0, 0.5, 'sqrt'],
+}
+
+
+def evaluate_model(model, X_train, X_test, y_train, y_test):
+    """R2, RMSE and MAE on the train and test sets, in the order of the model contract."""
+    y_pred_train = model.predict(X_train)
+    y_pred = model.predict(X_test)
+    return (r2_score(y_train, y_pred_train), r2_score(y_test, y_pred),
+            np.sqrt(mean_squared_error(y_train, y_pred_train)), np.sqrt(mean_squared_error(y_test, y_pred)),
+            mean_absolute_error(y_train, y_pred_train), mean_absolute_error(y_test, y_pred))
+
+
+def describe(params):
+    """Short name of a configuration: trees/depth/leaf/features, e.g. `200/20/1/0.5`."""
+    return f"{params['n_estimators']}/{params['max_depth'] or '-'}/{params['min_samples_leaf']}/{params['max_features']}"
+
+
+def log_table(title, columns, rows):
+    """Log a table in the layout of the results table of main_santo."""
+    width = 19 + 13 * len(columns)
+    logging.info(title)
+    logging.info("-" * width)
+    logging.info(f"| {'Config':<15} |" + "".join(f" {column:>10} |" for column in columns))
+    logging.info("-" * width)
+    for name, values in rows:
+        logging.info(f"| {name:<15} |" + "".join(f" {value:10.2f} |" if isinstance(value, float) else f" {value:>10} |" for value in values))
+    logging.info("-" * width)
+
+
+def _fit_and_score(params, X_fit, y_fit, X_val, y_val, X_test, y_test, seed):
+    """Fit one forest on a single core; return its timings and errors."""
+    model = RandomForestRegressor(**params, n_jobs=1, random_state=seed)
+    start = time.perf_counter()
+    model.fit(X_fit, y_fit)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_val_pred = model.predict(X_val)
+    predict_time = time.perf_counter() - start
+    y_test_pred = model.predict(X_test)
+    return {
+        'fit_s': fit_time,
+        'predict_us_per_row': predict_time / len(X_val) * 1e6,
+        'val_rmse': float(np.sqrt(mean_squared_error(y_val, y_val_pred))),
+        'test_rmse': float(np.sqrt(mean_squared_error(y_test, y_test_pred))),
+        'test_mae': float(mean_absolute_error(y_test, y_test_pred)),
+    }
+
+
+def successive_halving(X_train, y_train, X_test, y_test, n_configurations=27, factor=3, min_rows=2_000,
+                       rmse_tolerance=0.01, n_jobs=-1, seed=42):
+    """Successive halving over `n_configurations` forests sampled from PARAM_GRID.
+
+    EN : Every round fits the remaining configurations in parallel on a growing sample of
+    the training set, scores them on a validation split and keeps the best `1/factor`.
+    The last round uses the whole fitting set; its winner is the fastest configuration
+    to predict within `rmse_tolerance` of the best validation RMSE. The test set is only
+    reported, never used to choose.
+    FR : Chaque tour entraîne en parallèle les configurations restantes sur un échantillon
+    croissant, les évalue sur une validation et garde le meilleur tiers. Au dernier tour,
+    la configuration la plus rapide à prédire à moins de `rmse_tolerance` de la meilleure
+    RMSE est retenue. Le jeu de test est seulement rapporté.
+    """
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=0.2, random_state=seed)
+
+    # EN Spatial features and imputation fitted once, the workers share the float32 arrays - FR Ajustés une fois, tableaux float32 partagés
+    spatial = SpatialFeatures()
+    X_fit = spatial.fit_transform(X_fit, y_fit)
+    X_val, X_test = spatial.transform(X_val), spatial.transform(X_test)
+    imputer = FeatureImputer().fit(X_fit)
+    X_fit, X_val, X_test = imputer.transform(X_fit), imputer.transform(X_val), imputer.transform(X_test)
+    y_fit, y_val, y_test = np.asarray(y_fit), np.asarray(y_val), np.asarray(y_test)
+
+    candidates = list(ParameterSampler(PARAM_GRID, n_iter=n_configurations, random_state=seed))
+    rounds = max(1, math.ceil(math.log(len(candidates), factor)))
+    order = np.random.default_rng(seed).permutation(len(X_fit))
+    records = []
+
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for round_index in range(rounds):
+            last_round = round_index == rounds - 1 or len(candidates) <= factor
+            rows = len(X_fit) if last_round else min(len(X_fit), max(min_rows, len(X_fit) // factor ** (rounds - 1 - round_index)))
+            sample = order[:rows]
+            logging.info(f"Search round {round_index + 1}: {len(candidates)} configurations on {rows} rows...")
+            scores = parallel(delayed(_fit_and_score)(params, X_fit[sample], y_fit[sample], X_val, y_val, X_test, y_test, seed)
+                              for params in candidates)
+            for params, score in zip(candidates, scores):
+                records.append({'round': round_index + 1, 'rows': rows, 'params': params, **score})
+            if last_round:
+                break
+            ranking = np.argsort([score['val_rmse'] for score in scores], kind='stable')
+            candidates = [candidates[i] for i in ranking[:max(1, len(candidates) // factor)]]
+
+    final = records[-len(candidates):]
+    best_rmse = min(record['val_rmse'] for record in final)
+    winner = min((record for record in final if record['val_rmse'] <= best_rmse * (1 + rmse_tolerance)),
+                 key=lambda record: record['predict_us_per_row'])
+    return winner['params'], records
+
+
+def tune_random_forest_model(df, n_configurations=27, factor=3, n_jobs=-1):
+    """Search the forest hyperparameters, then refit the winner on the training set.
+
+    Same split and same return contract as `build_random_forest_model`.
+    """
+    X_train, X_test, y_train, y_test = split_frame(df)
+
+    start = time.perf_counter()
+    params, records = successive_halving(X_train, y_train, X_test, y_test, n_configurations, factor, n_jobs=n_jobs)
+    log_table(f"Hyperparameter search: {len(records)} fits in {time.perf_counter() - start:.1f} s",
+              ['ROUND', 'ROWS', 'FIT s', 'PRED us', 'VAL RMSE', 'TEST RMSE', 'TEST MAE'],
+              [(describe(record['params']), (record['round'], record['rows'], record['fit_s'], record['predict_us_per_row'],
+                                             record['val_rmse'], record['test_rmse'], record['test_mae']))
+               for record in records])
+    logging.info(f"Selected configuration: {params}")
+
+    rf_model = Pipeline([
+        ('spatial', SpatialFeatures()), # EN Neighbourhood price per m² and density (KD-tree) - FR Prix au m² et densité du voisinage
+        ('impute', FeatureImputer()),
+        ('model', RandomForestRegressor(**params, n_jobs=n_jobs, random_state=42)),
+    ])
+    rf_model.fit(X_train, y_train)
+    rf_model.named_steps['model'].set_params(n_jobs=None) # EN Serving processes pick their own parallelism - FR Les processus de service choisissent leur parallélisme
+
+    return ('Random Forest (tuned)', rf_model) + evaluate_model(rf_model, X_train, X_test, y_train, y_test)
@@ -0,0 +1,252 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import time # EN : Retrain timing - FR : Chronométrage du réentraînement
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+from joblib import dump, load # EN : State of the last run - FR : État de la dernière exécution
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+from data_cleaning_santo import (GIRAFFE_PATH, REQUIRED_COLUMNS, TOP_LOCALITIES, LookupStore, rename_columns, merge_giraffe,
+                                 fit_cleaning_state, clean_frame, save_vocabulary, _row_hashes, SeenRows)
+from dataset_cache_santo import load_dataset, save_dataset
+from model_artifact_santo import ARTIFACT_PATH, save_artifact, load_artifact
+from model_registry_santo import DEFAULT_MODEL, build_model
+from hyperparameter_search_santo import evaluate_model
+from preprocessing_santo import make_serving_pipeline, split_positions
+
+STATE_PATH = 'data/cache/incremental_state.joblib'  # EN Fingerprints, cleaned corpus and encoding of the last run - FR Empreintes, corpus nettoyé et encodage de la dernière exécution
+
+# EN : Drift thresholds above which the model is retrained from scratch - FR : Seuils de dérive au-delà desquels tout est réentraîné
+MAX_DELTA_FRACTION = 0.2  # EN Share of new, changed or removed listings - FR Part d'annonces nouvelles, modifiées ou supprimées
+MAX_LOCALITY_SHIFT = 0.02  # EN Share of listings whose locality would enter or leave the top - FR Part d'annonces dont la localité entrerait ou sortirait du top
+MAX_RMSE_INCREASE = 0.1  # EN RMSE of the current model on the delta vs its test RMSE - FR RMSE du modèle actuel sur le delta vs sa RMSE de test
+
+
+def listing_fingerprints(raw):
+    """Hash of each listing id: the rows of an id are combined, so any change of one row changes it."""
+    hashes = pd.Series(_row_hashes(raw), index=raw['id'].to_numpy())
+    return hashes.groupby(level=0).sum()  # EN uint64 sum wraps around, order free - FR Somme uint64 modulo 2^64, sans ordre
+
+
+def encoding_drift(cleaning_state, localities, delta, max_locality_shift=MAX_LOCALITY_SHIFT):
+    """Reasons why the one-hot and label encodings of `cleaning_state` no longer fit the data (empty if none).
+
+    EN : `localities` are the raw localities of the updated corpus, `delta` the
+    cleaned-but-not-encoded values of the new rows.
+    FR : `localities` sont les localités brutes du corpus mis à jour, `delta` les valeurs des nouvelles lignes.
+    """
+    reasons = []
+    top_localities = set(localities.value_counts().nlargest(cleaning_state.get('max_localities', TOP_LOCALITIES)).index)
+    moved = localities.isin(top_localities ^ set(cleaning_state['top_localities'])).mean()
+    if moved > max_locality_shift:
+        reasons.append(f"{moved:.1%} of the listings would change of locality bucket")
+    for column, categories in cleaning_state['categories'].items():
+        if column in ('locality', 'floodzonetype') or column not in delta.columns:
+            continue
+        unknown = set(delta[column].dropna()) - set(categories)
+        if unknown:
+            reasons.append(f"new '{column}' values: {sorted(map(str, unknown))[:5]}")
+    if 'floodzonetype' in delta.columns:
+        unknown = set(delta['floodzonetype'].dropna()) - set(cleaning_state['floodzone_classes'])
+        if unknown:
+            reasons.append(f"new 'floodzonetype' values: {sorted(map(str, unknown))[:5]}")
+    return reasons
+
+
+def _raw_categories(merged, index, cleaning_state):
+    """Stripped categorical values of the `index` rows of a merged frame, as `clean_frame` sees them before encoding."""
+    values = {}
+    for column in list(cleaning_state['categories']):
+        if column in merged.columns:
+            series = merged[column].iloc[index]
+            values[column] = series.astype(str).str.strip() if column in cleaning_state['object_columns'] else series
+    return pd.DataFrame(values)
+
+
+def _counted_localities(merged, cleaning_state):
+    """Stripped localities of the rows counted by `fit_cleaning_state` for the top localities, indexed by id.
+
+    EN : Those are the rows with the required values, before the price filter.
+    FR : Ce sont les lignes avec les valeurs requises, avant le filtre sur le prix.
+    """
+    required = [column for column in REQUIRED_COLUMNS if column not in cleaning_state['object_columns']]
+    rows = merged[merged[required].notna().all(axis=1)]
+    return rows['locality'].astype(str).str.strip().set_axis(rows['id'].to_numpy())
+
+
+def full_retrain(raw, output_path, model_key, artifact_path=ARTIFACT_PATH, state_path=STATE_PATH, encoding='one_hot'):
+    """Clean the whole file with `encoding`, train `model_key` from scratch and save the artifact and the incremental state."""
+    merged = merge_giraffe(raw.copy(), verbose=1)
+    if merged is None:
+        return None
+    cleaning_state = fit_cleaning_state([merged], encoding)  # EN The encoding is kept in the state - FR L'encodage est gardé dans l'état
+    keep = SeenRows().first_seen(_row_hashes(merged))
+    cleaned = clean_frame(merged[keep], cleaning_state)
+    save_dataset(cleaned, output_path)
+    if encoding == 'codes':
+        save_vocabulary(cleaning_state, output_path)
+
+    model_name, model, train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae = build_model(model_key, cleaned)
+    metrics = {'train_r2': train_r2, 'test_r2': test_r2, 'train_rmse': train_rmse,
+               'test_rmse': test_rmse, 'train_mae': train_mae, 'test_mae': test_mae}
+    save_artifact(make_serving_pipeline(cleaning_state, model), artifact_path, metrics=metrics)
+
+    ids = merged['id'].to_numpy()[cleaned.index]
+    forest = model.steps[-1][1]
+    dump({
+        'fingerprints': listing_fingerprints(raw),
+        'giraffe_sha256': LookupStore.file_hash(GIRAFFE_PATH),
+        'cleaning_state': cleaning_state,
+        'corpus': cleaned.set_axis(ids),
+        'localities': _counted_localities(merged[keep], cleaning_state),
+        'model_key': model_key,
+        'test_rmse': float(test_rmse),
+        'test_ids': ids[split_positions(len(cleaned))[1]],  # EN Test rows of the builder, held out by the updates - FR Lignes de test du builder, tenues à l'écart des mises à jour
+        'base_trees': len(forest.estimators_) if isinstance(forest, RandomForestRegressor) else 0,
+    }, state_path)
+    logging.info(f"Full retrain of {model_name} on {len(cleaned)} rows, test RMSE {test_rmse:.2f}.")
+    return 'full'
+
+
+def update_forest(forest, X_new, y_new, X_corpus, y_corpus, base_trees=0, trees_per_update=20, max_trees=400, seed=42):
+    """Add `trees_per_update` trees fitted on the new rows and as many older corpus rows, keeping at most `max_trees` trees.
+
+    EN : `X_corpus` ends with the `X_new` rows, so the window only samples the rows before
+    them. The first `base_trees` trees, fitted on the whole corpus by the full retrain, are
+    always kept; only the update trees slide, the oldest ones being dropped.
+    FR : `X_corpus` se termine par les lignes de `X_new` : la fenêtre n'échantillonne que
+    les lignes précédentes. Les `base_trees` premiers arbres, ajustés sur tout le corpus,
+    sont toujours gardés ; seuls les arbres des mises à jour glissent.
+    """
+    rng = np.random.default_rng(seed)
+    old_rows = len(X_corpus) - len(X_new)
+    sample = rng.choice(old_rows, size=min(old_rows, max(len(X_new), 1_000)), replace=False)
+    X_window = np.concatenate([X_new, X_corpus[sample]])
+    y_window = np.concatenate([y_new, y_corpus[sample]])
+
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + trees_per_update, n_jobs=-1)
+    forest.fit(X_window, y_window)
+    updates = forest.estimators_[base_trees:]
+    forest.estimators_ = forest.estimators_[:base_trees] + updates[-max(max_trees - base_trees, trees_per_update):]
+    forest.set_params(warm_start=False, n_estimators=len(forest.estimators_), n_jobs=None)
+    return forest
+
+
+def incremental_retrain(filepath='data/Kangaroo.csv', output_path='data/Kangaroo_cleaned.csv', model_key=DEFAULT_MODEL,
+                        artifact_path=ARTIFACT_PATH, state_path=STATE_PATH, max_delta_fraction=MAX_DELTA_FRACTION,
+                        max_rmse_increase=MAX_RMSE_INCREASE, trees_per_update=20, max_trees=400, encoding='one_hot'):
+    """Clean only the new or changed listings since the last run and update the model with them.
+
+    EN : The listings are compared by id with the fingerprints of the last run. The
+    model is retrained from scratch only on the first run or when a drift threshold is
+    exceeded (too large a delta, a changed Giraffe file or schema, an encoding that no
+    longer fits, a degraded RMSE on the delta). Otherwise a forest gets new trees with
+    `warm_start` and other models are refitted on the kept cleaned corpus, without
+    cleaning it again. `encoding` is the one `model_key` needs ('codes' for the native
+    gradient boosting); a state cleaned with another one is retrained from scratch.
+    Returns 'full', 'incremental' or 'unchanged'.
+    FR : Les annonces sont comparées par id avec la dernière exécution. Le modèle n'est
+    réentraîné de zéro qu'au premier passage ou si un seuil de dérive est dépassé.
+    Sinon, la forêt reçoit de nouveaux arbres (`warm_start`), sans tout renettoyer.
+    """
+    start = time.perf_counter()
+    raw = rename_columns(load_dataset(filepath, compact=False))
+    previous = load(state_path) if os.path.exists(state_path) else None
+    if previous is None or previous['model_key'] != model_key or 'test_ids' not in previous:
+        logging.info("No incremental state for this model: full retrain.")
+        return full_retrain(raw, output_path, model_key, artifact_path, state_path, encoding)
+    if previous['cleaning_state'].get('encoding', 'one_hot') != encoding:
+        logging.info(f"The last run used the '{previous['cleaning_state'].get('encoding', 'one_hot')}' encoding: full retrain.")
+        return full_retrain(raw, output_path, model_key, artifact_path, state_path, encoding)
+
+    # --- 1. EN Listings new, changed or removed since the last run - FR Annonces nouvelles, modifiées ou supprimées ---
+    fingerprints = listing_fingerprints(raw)
+    old = previous['fingerprints']
+    common = fingerprints.index.intersection(old.index)
+    changed = common[fingerprints[common].to_numpy() != old[common].to_numpy()]
+    new = fingerprints.index.difference(old.index)
+    removed = old.index.difference(fingerprints.index)
+    delta_ids = new.union(changed)
+    logging.info(f"{len(new)} new, {len(changed)} changed and {len(removed)} removed listings.")
+    if len(delta_ids) == 0 and len(removed) == 0:
+        logging.info("No listing changed since the last run.")
+        return 'unchanged'
+
+    delta_fraction = (len(delta_ids) + len(removed)) / max(len(old), 1)
+    if delta_fraction > max_delta_fraction:
+        logging.info(f"Delta of {delta_fraction:.1%} above {max_delta_fraction:.0%}: full retrain.")
+        return full_retrain(raw, output_path, model_key, artifact_path, state_path, encoding)
+    if LookupStore.file_hash(GIRAFFE_PATH) != previous['giraffe_sha256']:
+        logging.info("The Giraffe file changed: full retrain.")
+        return full_retrain(raw, output_path, model_key, artifact_path, state_path, encoding)
+
+    # --- 2. EN Cleaning of the delta only, with the encoding of the last run - FR Nettoyage du delta seul, avec l'encodage précédent ---
+    cleaning_state = previous['cleaning_state']
+    merged = merge_giraffe(raw[raw['id'].isin(delta_ids)].copy())
+    if merged is None:
+        return None
+    if set(merged.columns) != set(cleaning_state['dtypes']):
+        logging.info("The columns of the dataset changed: full retrain.")
+        return full_retrain(raw, output_path, model_key, artifact_path, state_path, encoding)
+    merged = merged[~pd.Series(_row_hashes(merged)).duplicated().to_numpy()].reset_index(drop=True)
+    try:
+        cleaned = clean_frame(merged, cleaning_state)
+    except (ValueError, TypeError) as error:
+        logging.info(f"The delta does not fit the column types of the last run ({error}): full retrain.")
+        return full_retrain(raw, output_path, model_key, artifact_path, state_path, encoding)
+    delta_categories = _raw_categories(merged, cleaned.index, cleaning_state)
+    ids = merged['id'].to_numpy()[cleaned.index]
+    cleaned = cleaned.set_axis(ids)
+
+    outdated = changed.union(removed)
+    corpus = pd.concat([previous['corpus'][~previous['corpus'].index.isin(outdated)], cleaned])
+    localities = pd.concat([previous['localities'][~previous['localities'].index.isin(outdated)],
+                            _counted_localities(merged, cleaning_state)])
+
+    reasons = encoding_drift(cleaning_state, localities, delta_categories)
+    if reasons:
+        logging.info(f"Encoding drift ({'; '.join(reasons)}): full retrain.")
+        return full_retrain(raw, output_path, model_key, artifact_path, state_path, encoding)
+
+    # --- 3. EN Model update - FR Mise à jour du modèle ---
+    artifact = load_artifact(artifact_path, mmap=False)
+    serving_model = artifact['model']
+    prepare, model = serving_model[1:-1], serving_model.steps[-1][1]  # EN Steps between the cleaner and the model - FR Étapes entre le nettoyage et le modèle
+    X_new, y_new = prepare.transform(cleaned.drop(columns='price')), cleaned['price'].to_numpy()
+    if len(cleaned):
+        delta_rmse = float(np.sqrt(mean_squared_error(y_new, model.predict(X_new))))
+        if delta_rmse > previous['test_rmse'] * (1 + max_rmse_increase):
+            logging.info(f"RMSE on the delta {delta_rmse:.2f} above the test RMSE {previous['test_rmse']:.2f} "
+                         f"+ {max_rmse_increase:.0%}: full retrain.")
+            return full_retrain(raw, output_path, model_key, artifact_path, state_path, encoding)
+
+    # EN The test listings of the full retrain stay out of the training, so the metrics are measured on unseen rows
+    # FR Les annonces de test du réentraînement complet restent hors de l'entraînement : les métriques portent sur des lignes non vues
+    test = corpus.index.isin(previous['test_ids']) & ~corpus.index.isin(delta_ids)
+    X_train, X_test = corpus[~test].drop(columns='price'), corpus[test].drop(columns='price')
+    y_train, y_test = corpus['price'].to_numpy()[~test], corpus['price'].to_numpy()[test]
+    if 'spatial' in serving_model.named_steps:
+        # EN The new listings join the KD-tree; each training row is left out of its own neighbourhood
+        # FR Les nouvelles annonces entrent dans l'arbre ; chaque ligne est exclue de son propre voisinage
+        spatial = serving_model.named_steps['spatial']
+        X_train, X_test = spatial.fit_transform(X_train, y_train), spatial.transform(X_test)
+    X_train, X_test = serving_model.named_steps['impute'].transform(X_train), serving_model.named_steps['impute'].transform(X_test)
+    X_new = X_train[len(X_train) - len(cleaned):]  # EN The delta rows are the last ones of the corpus - FR Les lignes du delta sont les dernières du corpus
+    if isinstance(model, RandomForestRegressor):
+        if len(cleaned):
+            update_forest(model, X_new, y_new, X_train, y_train, previous['base_trees'], trees_per_update, max_trees)
+    else:
+        model = clone(model).fit(X_train, y_train)  # EN Cheap models: refit on the cleaned corpus, no cleaning - FR Modèles rapides : réentraînés sur le corpus nettoyé
+        serving_model.steps[-1] = (serving_model.steps[-1][0], model)
+    metrics = dict(zip(['train_r2', 'test_r2', 'train_rmse', 'test_rmse', 'train_mae', 'test_mae'],
+                       evaluate_model(model, X_train, X_test, y_train, y_test)))
+
+    save_dataset(corpus.reset_index(drop=True), output_path)
+    save_artifact(serving_model, artifact_path, metrics=metrics)
+    dump({**previous, 'fingerprints': fingerprints, 'corpus': corpus, 'localities': localities,
+          'test_rmse': float(metrics['test_rmse'])}, state_path)
+    logging.info(f"Incremental update with {len(cleaned)} cleaned rows in {time.perf_counter() - start:.2f} s, "
+                 f"test RMSE {metrics['test_rmse']:.2f} on {int(test.sum())} held-out listings.")
+    return 'incremental'
@@ -0,0 +1,262 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import json # EN : Requests file and JSON baselines - FR : Fichier de requêtes et références JSON
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import sys # EN : Exit code of the comparison - FR : Code de sortie de la comparaison
+import time # EN : Latency measurement - FR : Mesure de la latence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor # EN : Concurrent replay - FR : Rejeu concurrent
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+from data_cleaning_santo import BINARY_COLUMNS, EPC_ORDER # EN : Labels of the cleaned codes - FR : Libellés des codes nettoyés
+from model_artifact_santo import ARTIFACT_PATH, load_artifact # EN : Versioned model artifact - FR : Artefact versionné du modèle
+from profiling_santo import peak_rss_mb # EN : Peak resident memory - FR : Mémoire résidente maximale
+
+# EN : The repository root requests.jsonl is the work backlog, the generated requests live next to the data
+# FR : Le requests.jsonl à la racine est le backlog, les requêtes générées sont à côté des données
+REQUESTS_PATH = 'data/load_requests.jsonl'
+BASELINE_PATH = 'reports/inference_baseline.json'  # EN Only written by `run --update-baseline` - FR Écrit seulement par `run --update-baseline`
+REPORT_PATH = 'reports/inference_report.json'  # EN Latest run, compared with the baseline - FR Dernière exécution, comparée à la référence
+MODES = ('single', 'batch', 'threads', 'processes')
+N_REQUESTS = 2_000
+BATCH_SIZE = 64  # EN Listings per request of the batch mode - FR Annonces par requête du mode lot
+WORKERS = 4  # EN Threads or processes of the concurrent modes - FR Threads ou processus des modes concurrents
+THRESHOLD = 0.2  # EN Relative change reported as a regression - FR Changement relatif signalé comme régression
+
+_model = None  # EN Model loaded once per worker process - FR Modèle chargé une fois par processus
+
+
+def load_serving_model(model_path=ARTIFACT_PATH):
+    """Model and version as the Streamlit app loads them: memory-mapped artifact, forest on the FlatForest engine."""
+    from forest_engine_santo import compile_pipeline
+    artifact = load_artifact(model_path)
+    return compile_pipeline(artifact['model']), artifact['version']
+
+
+# --- 1. EN : Synthetic appraisal requests - FR : Requêtes d'estimation synthétiques ---
+
+def _category_codes(cleaned, column, categories):
+    """Position in `categories` of the value of each row, from its code column or its one-hot group.
+
+    EN : A one-hot group with no column set is the first category, dropped by `drop_first`.
+    FR : Un groupe one-hot sans colonne à 1 est la première catégorie, retirée par `drop_first`.
+    """
+    if column in cleaned.columns:  # EN 'codes' encoding, -1 for a missing value - FR Encodage 'codes', -1 si absente
+        return cleaned[column].to_numpy(dtype=np.int64)
+    codes = np.zeros(len(cleaned), dtype=np.int64)
+    for position, category in enumerate(categories[1:], start=1):
+        dummy = f'{column}_{category}'
+        if dummy in cleaned.columns:
+            codes[cleaned[dummy].to_numpy(dtype=bool)] = position
+    return codes
+
+
+def decode_listings(cleaned, cleaning_state):
+    """Raw Kangaroo-format listings (dicts) from cleaned rows: category, EPC and flood zone codes back to their labels.
+
+    EN : Binary columns become booleans and missing values None, like the listings of the
+    app and of the prediction server.
+    FR : Les colonnes binaires deviennent des booléens et les valeurs manquantes None.
+    """
+    raw = {}
+    for column, categories in cleaning_state['categories'].items():
+        labels = np.array(cleaning_state['floodzone_classes'] if column == 'floodzonetype' else categories, dtype=object)
+        codes = _category_codes(cleaned, column, categories)
+        raw[column] = np.where(codes >= 0, labels[np.maximum(codes, 0)], None)
+    encoded = tuple(f'{column}_' for column in cleaning_state['categories'])
+    for column in cleaned.columns:
+        if column == 'price' or column in raw or column.startswith(encoded):
+            continue
+        values = cleaned[column]
+        if column == 'epcscore':
+            raw[column] = np.where(values >= 0, np.array(EPC_ORDER, dtype=object)[np.maximum(values, 0)], None)
+        elif column in BINARY_COLUMNS:
+            raw[column] = values.to_numpy(dtype=bool)
+        else:
+            raw[column] = values.astype(object).where(values.notna(), None).to_numpy()
+    listings = pd.DataFrame(raw).replace({'nan': None}).to_dict(orient='records')
+    return [{key: value.item() if isinstance(value, np.generic) else value for key, value in listing.items()}
+            for listing in listings]
+
+
+def generate_requests(df, cleaning_state, n_requests=N_REQUESTS, seed=42):
+    """Listings drawn from the cleaned dataset: whole rows (joint distribution kept), surfaces jittered by up to 10%."""
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.integers(0, len(df), n_requests)].reset_index(drop=True)
+    for column in ('habitablesurface', 'landsurface'):
+        if column in rows.columns:
+            rows[column] = (rows[column] * rng.uniform(0.9, 1.1, len(rows))).round()
+    return [{'id': position, 'listing': listing} for position, listing in enumerate(decode_listings(rows, cleaning_state))]
+
+
+def write_requests(requests, path=REQUESTS_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + '\n')
+
+
+def read_requests(path=REQUESTS_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# --- 2. EN : Replay in each mode - FR : Rejeu dans chaque mode ---
+
+def _timed_predict(model, listings):
+    start = time.perf_counter()
+    model.predict(pd.DataFrame(listings))
+    return time.perf_counter() - start
+
+
+def _init_worker(model_path):
+    """Load the serving model in each worker process (the memory map is shared)."""
+    global _model
+    _model, _ = load_serving_model(model_path)
+    _model.predict(pd.DataFrame([{}]))  # EN Warm-up outside the timings - FR Préchauffage hors des mesures
+
+
+def _replay_chunk(listings):
+    """Latency of each single-listing request of `listings`; runs in a worker process."""
+    return [_timed_predict(_model, [listing]) for listing in listings]
+
+
+def _summary(latencies, rows, elapsed):
+    latencies_ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {'requests': len(latencies), 'rows': rows, 'throughput_rps': len(latencies) / elapsed,
+            'rows_per_s': rows / elapsed, 'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def replay(model, listings, mode, batch_size=BATCH_SIZE, workers=WORKERS, model_path=ARTIFACT_PATH):
+    """Send every listing in `mode`; return its throughput, latency percentiles and peak memory.
+
+    EN : 'single' predicts one listing per request, 'batch' `batch_size` listings per
+    request, 'threads' and 'processes' send single-listing requests from `workers`
+    threads or worker processes (each process loads the model before the clock starts).
+    FR : 'single' prédit une annonce par requête, 'batch' `batch_size` annonces, 'threads'
+    et 'processes' envoient des requêtes d'une annonce depuis `workers` threads ou processus.
+    """
+    if mode == 'single':
+        start = time.perf_counter()
+        latencies = [_timed_predict(model, [listing]) for listing in listings]
+        result = _summary(latencies, len(listings), time.perf_counter() - start)
+    elif mode == 'batch':
+        batches = [listings[start:start + batch_size] for start in range(0, len(listings), batch_size)]
+        start = time.perf_counter()
+        latencies = [_timed_predict(model, batch) for batch in batches]
+        result = _summary(latencies, len(listings), time.perf_counter() - start)
+    elif mode == 'threads':
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            latencies = list(executor.map(lambda listing: _timed_predict(model, [listing]), listings))
+            result = _summary(latencies, len(listings), time.perf_counter() - start)
+    elif mode == 'processes':
+        chunks = [list(chunk) for chunk in np.array_split(np.array(listings, dtype=object), workers) if len(chunk)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as executor:
+            list(executor.map(int, range(workers)))  # EN Every worker started and loaded - FR Tous les processus démarrés et chargés
+            start = time.perf_counter()
+            latencies = [latency for chunk in executor.map(_replay_chunk, chunks) for latency in chunk]
+            result = _summary(latencies, len(listings), time.perf_counter() - start)
+        import resource
+        result['children_peak_rss_mb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1e3
+    else:
+        raise ValueError(f"Unknown mode '{mode}'. Available modes: {', '.join(MODES)}")
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run_suite(model_path=ARTIFACT_PATH, requests_path=REQUESTS_PATH, modes=MODES, batch_size=BATCH_SIZE, workers=WORKERS):
+    """Replay the requests file against the serving model in every mode; return the JSON-ready report."""
+    model, version = load_serving_model(model_path)
+    listings = [request['listing'] for request in read_requests(requests_path)]
+    _timed_predict(model, listings[:1])  # EN First call (imports, caches) outside the timings - FR Premier appel hors des mesures
+    report = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'model_path': model_path, 'model_version': version,
+              'model': type(getattr(model, 'engine', None) or model).__name__, 'requests_path': requests_path,
+              'requests': len(listings), 'batch_size': batch_size, 'workers': workers,
+              'python': sys.version.split()[0], 'cpus': os.cpu_count(), 'modes': {}}
+    for mode in modes:
+        report['modes'][mode] = replay(model, listings, mode, batch_size, workers, model_path)
+        logging.info(f"{mode}: {report['modes'][mode]['throughput_rps']:.0f} requests/s, p50 {report['modes'][mode]['p50_ms']:.2f} ms, "
+                     f"p99 {report['modes'][mode]['p99_ms']:.2f} ms")
+    return report
+
+
+# --- 3. EN : Comparison with a baseline - FR : Comparaison avec une référence ---
+
+# EN Metric -> True when a higher value is better - FR Métrique -> True si une valeur plus haute est meilleure
+METRICS = {'throughput_rps': True, 'p50_ms': False, 'p95_ms': False, 'p99_ms': False, 'peak_rss_mb': False,
+           'children_peak_rss_mb': False}
+
+
+def compare_baselines(old_path, new_path, threshold=THRESHOLD):
+    """Print every metric of two reports; return the (mode, metric) pairs worse by more than `threshold`."""
+    with open(old_path) as f:
+        old = json.load(f)['modes']
+    with open(new_path) as f:
+        new = json.load(f)['modes']
+
+    print("-" * 84)
+    print(f"| {'Mode / metric':<40} | {'OLD':>10} | {'NEW':>10} | {'CHANGE %':>10} |")
+    print("-" * 84)
+    regressions = []
+    for mode, metrics in new.items():
+        for metric, higher_is_better in METRICS.items():
+            before, after = old.get(mode, {}).get(metric), metrics.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            print(f"| {f'{mode} / {metric}':<40} | {before:10.2f} | {after:10.2f} | {change * 100:10.1f} |")
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((mode, metric))
+    print("-" * 84)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replayable inference benchmark of the serving model.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help="Write synthetic appraisal requests drawn from the cleaned dataset.")
+    generate.add_argument('--data', default='data/Kangaroo_cleaned.csv', help="Cleaned dataset of the training.")
+    generate.add_argument('--model', default=ARTIFACT_PATH, help="Artifact whose cleaning state decodes the categories.")
+    generate.add_argument('--requests', type=int, default=N_REQUESTS, help="Number of requests.")
+    generate.add_argument('--seed', type=int, default=42)
+    generate.add_argument('--output', default=REQUESTS_PATH, help="JSON lines file of the requests.")
+    run = commands.add_parser('run', help="Replay the requests in every mode and write a JSON report.")
+    run.add_argument('--model', default=ARTIFACT_PATH, help="Model artifact (default: the one of the Streamlit app).")
+    run.add_argument('--input', default=REQUESTS_PATH, help="JSON lines file of the requests.")
+    run.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    run.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    run.add_argument('--workers', type=int, default=WORKERS)
+    run.add_argument('--output', default=REPORT_PATH, help="JSON report of this run.")
+    run.add_argument('--update-baseline', action='store_true', help=f"Also write the report as the new baseline ({BASELINE_PATH}).")
+    compare = commands.add_parser('compare', help="Compare a report with the baseline; exit code 1 on a regression.")
+    compare.add_argument('new', nargs='?', default=REPORT_PATH, help="New JSON report (default: the one of the last run).")
+    compare.add_argument('--baseline', default=BASELINE_PATH, help="Reference JSON report.")
+    compare.add_argument('--threshold', type=float, default=THRESHOLD, help="Relative degradation reported as a regression.")
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        from dataset_cache_santo import load_dataset
+        cleaning_state = load_artifact(args.model)['preprocessing']['cleaning']
+        write_requests(generate_requests(load_dataset(args.data), cleaning_state, args.requests, args.seed), args.output)
+        logging.info(f"{args.requests} requests written in {args.output}")
+    elif args.command == 'run':
+        report = run_suite(args.model, args.input, args.modes, args.batch_size, args.workers)
+        for path in [args.output] + ([BASELINE_PATH] if args.update_baseline else []):
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            logging.info(f"Report saved in {path}")
+    else:
+        if not os.path.exists(args.baseline):
+            parser.error(f"No baseline in {args.baseline}: create it with `run --update-baseline`.")
+        regressions = compare_baselines(args.baseline, args.new, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(f'{mode} {metric}' for mode, metric in regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,91 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import http.client # EN : HTTP client of the standard library - FR : Client HTTP de la bibliothèque standard
+import json # EN : Request and response bodies - FR : Corps des requêtes et réponses
+import threading # EN : Concurrent clients - FR : Clients simultanés
+import time # EN : Latency measurement - FR : Mesure de la latence
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+
+# EN : Listing sent when no input file is given (same fields as the Streamlit wizard) - FR : Annonce envoyée sans fichier d'entrée
+DEFAULT_LISTING = {
+    'bedroomcount': 2, 'bathroomcount': 1, 'habitablesurface': 100, 'hasgarden': True,
+    'hasterrace': False, 'hasfireplace': False, 'hasairconditioning': False,
+    'buildingconstructionyear': 2000, 'type': 'HOUSE', 'subtype': 'HOUSE', 'epcscore': 'C',
+    'buildingcondition': 'GOOD', 'province': 'Brussels',
+}
+
+
+def load_listings(input_path, limit=10_000):
+    """Raw listings to send: rows of a Kangaroo-format CSV, or the default listing."""
+    if input_path is None:
+        return [DEFAULT_LISTING]
+    df = pd.read_csv(input_path, nrows=limit)
+    df = df.drop(columns=['price'], errors='ignore').astype(object).where(df.notna(), None)
+    return df.to_dict(orient='records')
+
+
+def run_client(host, port, listings, requests, latencies, errors, seed):
+    """One client sending `requests` sequential POST /predict requests."""
+    rng = np.random.default_rng(seed)
+    connection = http.client.HTTPConnection(host, port)
+    for _ in range(requests):
+        body = json.dumps(listings[rng.integers(len(listings))])
+        start = time.perf_counter()
+        try:
+            connection.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (ConnectionError, http.client.HTTPException) as error:
+            errors.append(str(error))
+            connection = http.client.HTTPConnection(host, port)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def load_test(host='127.0.0.1', port=8000, clients=32, requests=100, input_path=None):
+    """Send `clients` x `requests` concurrent requests and print client and server metrics."""
+    listings = load_listings(input_path)
+    latencies, errors = [], []
+    threads = [threading.Thread(target=run_client, args=(host, port, listings, requests, latencies, errors, seed))
+               for seed in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.asarray(latencies) * 1000
+    report = {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_p50_ms': float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else None,
+        'latency_p99_ms': float(np.percentile(latencies_ms, 99)) if len(latencies_ms) else None,
+    }
+    connection = http.client.HTTPConnection(host, port)
+    connection.request('GET', '/metrics')
+    report['server'] = json.loads(connection.getresponse().read())
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for prediction_server_santo.py.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--clients', type=int, default=32, help="Concurrent clients.")
+    parser.add_argument('--requests', type=int, default=100, help="Requests per client.")
+    parser.add_argument('--input', default=None, help="Kangaroo-format CSV to sample the listings from.")
+    args = parser.parse_args()
+    load_test(args.host, args.port, args.clients, args.requests, args.input)
+
+
+if __name__ == "__main__":
+    main()
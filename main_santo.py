@@ -1,39 +1,117 @@
 # --- EN : Importation des bibliothèques - FR : Importation des bibliothèques ---
+import argparse # EN : Command line options - FR : Options de la ligne de commande
 import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
-#import joblib # EN : Importing the Joblib library - FR : Importation de la bibliothèque Joblib
-from joblib import dump, load # EN : Importing the dump and load functions from Joblib - FR : Importation des fonctions dump et load de Joblib
-from data_cleaning_santo import data_cleaning
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+from model_artifact_santo import ARTIFACT_PATH, load_metadata, save_artifact # EN : Versioned model artifact - FR : Artefact versionné du modèle
+from data_cleaning_santo import ENCODINGS, GIRAFFE_PATH, data_cleaning
+from dataset_cache_santo import load_dataset # EN : Columnar cache of the datasets - FR : Cache colonnaire des datasets
 #from data_visualization_santo import create_visualizations
-#from model_linear_regression_building_santo import build_linear_regression_model
-from model_random_forest_regressor_building_santo import build_random_forest_model
-#from model_gradient_boosting_regressor_building_santo import build_gradient_boosting_model
+from model_registry_santo import MODELS, DEFAULT_MODEL, build_model # EN : Linear, gradient boosting and random forest models - FR : Modèles linéaire, gradient boosting et forêt aléatoire
+from preprocessing_santo import make_serving_pipeline
+from profiling_santo import start_run # EN : JSON run report of the stages - FR : Rapport JSON des étapes
+from stage_cache_santo import Stage, run_stages # EN : Content-hashed memoization of the stages - FR : Mémoïsation des étapes par empreinte de contenu
+from incremental_training_santo import incremental_retrain # EN : Retrain from the new listings only - FR : Réentraînement sur les nouvelles annonces seulement
+from cross_validation_santo import cross_validate # EN : Parallel K-fold evaluation with cached folds - FR : Évaluation K-fold parallèle avec folds en cache
+from forest_compression_santo import TOLERANCE, compress_model # EN : Tree selection and depth capping of the forest - FR : Sélection d'arbres et écrêtage de la forêt
 
 
 # --- EN : Setting up logging - FR : Configuration de la journalisation 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def main():
+def main(model_key=DEFAULT_MODEL, profile=False, cv_folds=0, cv_repeats=1, use_cache=True, encoding='one_hot', compress=None,
+         chunksize=None):
+    """Run the pipeline and write its run report (wall time, memory, shapes per stage) in reports/."""
+    with start_run('train', profile=profile):
+        run_pipeline(model_key, cv_folds, cv_repeats, use_cache, encoding, compress, chunksize)
 
-    logging.info("Start of the script execution.") # EN Log message indicating the start of the script execution - FR Message de log indiquant le début de l'exécution du script
 
-    # --- 1. EN Cleaning the data - FR Nettoyage des données ---
-    logging.info("Start of data cleaning...") # EN Log message indicating the start of data cleaning - FR Message de log indiquant le début du nettoyage des données
-    
-    cleaned_data = data_cleaning(
-        filepath='data/Kangaroo.csv',
-        output_path='data/Kangaroo_cleaned.csv'
-    )
+# --- EN : Stages of the pipeline, memoized by stage_cache_santo - FR : Étapes du pipeline, mémoïsées par stage_cache_santo ---
 
-    logging.debug("Cleaning data...") # EN Log message indicating that the data is being cleaned - FR Message de log indiquant que les données sont en cours de nettoyage
-    logging.debug(f"Data sample after cleaning:\n{cleaned_data.head()}") # EN Log message showing a sample of the cleaned data - FR Message de log affichant un échantillon des données nettoyées
-    logging.info("Data cleaning finished") # EN Log message indicating that the data cleaning is finished - FR Message de log indiquant que le nettoyage des données est terminé
+def clean_stage(filepath, output_path, encoding, chunksize=None):
+    """Cleaned dataset (its CSV path when cleaned by chunks) and fitted cleaning settings."""
+    return data_cleaning(filepath=filepath, output_path=output_path, chunksize=chunksize, return_state=True, encoding=encoding)
 
-    '''
-    print(df.shape)
-    print(df.head()) 
-    
 
+def cleaned_frame(cleaning):
+    """Cleaned DataFrame of the cleaning stage, loaded from its CSV (columnar cache) when it was cleaned by chunks."""
+    return load_dataset(cleaning[0]) if isinstance(cleaning[0], str) else cleaning[0]
+
+
+def train_stage(cleaning, model_key):
+    """(name, model, train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae) of the registered model."""
+    return build_model(model_key, cleaned_frame(cleaning)) # EN Any model of the registry - FR N'importe quel modèle du registre
+
+
+def compress_stage(cleaning, training, tolerance):
+    """Result of the trained forest compressed within `tolerance` of its out-of-bag RMSE."""
+    return compress_model(training, cleaned_frame(cleaning), tolerance) # EN Fewer and shallower trees - FR Moins d'arbres, moins profonds
+
+
+def evaluate_stage(cleaning, training, cv_folds, cv_repeats):
+    """Name and metrics of the trained model, with the K-fold metrics when `cv_folds` is set."""
+    model_name, model, train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae = training
+    metrics = {'train_r2': train_r2, 'test_r2': test_r2, 'train_rmse': train_rmse,
+               'test_rmse': test_rmse, 'train_mae': train_mae, 'test_mae': test_mae}
+    if cv_folds:
+        metrics.update(cross_validate(model, cleaned_frame(cleaning), n_splits=cv_folds, n_repeats=cv_repeats)) # EN Mean and spread over the folds - FR Moyenne et dispersion sur les folds
+    return model_name, metrics
+
+
+def save_stage(cleaning, training, evaluation, artifact_path):
+    """Save the serving pipeline; return the version of the artifact."""
+    serving_model = make_serving_pipeline(cleaning[1], training[1]) # EN Raw listing -> cleaning -> imputation -> model - FR Annonce brute -> nettoyage -> imputation -> modèle
+    return save_artifact(serving_model, artifact_path, metrics=evaluation[1])['version'] # EN Save the model, its features and preprocessing in one uncompressed file - FR Enregistrer le modèle, ses colonnes et son prétraitement dans un seul fichier non compressé
+
+
+def _saved_version(artifact_path):
+    """Version of the artifact on disk, None when it is missing."""
+    return load_metadata(artifact_path)['version'] if os.path.exists(artifact_path) else None
+
+
+def cleaned_path(encoding):
+    """Cleaned CSV of an encoding: the one-hot file stays the one read by the other scripts."""
+    return 'data/Kangaroo_cleaned.csv' if encoding == 'one_hot' else f'data/Kangaroo_cleaned_{encoding}.csv'
+
+
+def run_pipeline(model_key=DEFAULT_MODEL, cv_folds=0, cv_repeats=1, use_cache=True, encoding='one_hot', compress=None,
+                 chunksize=None):
+
+    logging.info("Start of the script execution.") # EN Log message indicating the start of the script execution - FR Message de log indiquant le début de l'exécution du script
+
+    # EN : Each stage is keyed by its source, parameters and inputs; an unchanged stage is loaded
+    # from data/cache/stages instead of being run, so a new model costs no cleaning time.
+    # FR : Chaque étape est identifiée par sa source, ses paramètres et ses entrées ; une étape
+    # inchangée est chargée depuis data/cache/stages au lieu d'être relancée.
+    filepath = 'data/Kangaroo.csv'
+    output_path = cleaned_path(encoding)
+    model_stage = 'compression' if compress is not None else 'training' # EN The compressed forest is evaluated and saved instead - FR La forêt compressée est évaluée et enregistrée à sa place
+    stages = [
+        # --- 1. EN Cleaning the data - FR Nettoyage des données ---
+        Stage('cleaning', clean_stage, params={'filepath': filepath, 'output_path': output_path, 'encoding': encoding, 'chunksize': chunksize},
+              files=[filepath, GIRAFFE_PATH], modules=['data_cleaning_santo'],
+              valid=lambda output: os.path.exists(output_path)), # EN The cleaned CSV is read by the other scripts - FR Le CSV nettoyé est lu par les autres scripts
+        # --- 3. EN Training the model - FR Entraînement du modèle ---
+        Stage('training', train_stage, depends=['cleaning'], params={'model_key': model_key}, modules=['model_registry_santo']),
+        # --- 3.1. EN Compressing the forest - FR Compression de la forêt ---
+        *([Stage('compression', compress_stage, depends=['cleaning', 'training'], params={'tolerance': compress},
+                 modules=['forest_compression_santo'])] if compress is not None else []),
+        # --- 4. EN Evaluating the model - FR Évaluation du modèle ---
+        Stage('evaluation', evaluate_stage, depends={'cleaning': 'cleaning', 'training': model_stage},
+              params={'cv_folds': cv_folds, 'cv_repeats': cv_repeats}, modules=['cross_validation_santo']),
+        # --- 5. EN Saving the model - FR Sauvegarde du modèle ---
+        Stage('saving', save_stage, depends={'cleaning': 'cleaning', 'training': model_stage, 'evaluation': 'evaluation'},
+              params={'artifact_path': ARTIFACT_PATH},
+              modules=['model_artifact_santo', 'preprocessing_santo'],
+              valid=lambda version: _saved_version(ARTIFACT_PATH) == version), # EN Not overwritten by another run since - FR Pas remplacé depuis par une autre exécution
+    ]
+
+    logging.info(f"Running the pipeline with the '{model_key}' model... ")
+    outputs = run_stages(stages, targets=['evaluation', 'saving'], force=not use_cache)
+    model_name, metrics = outputs['evaluation']
+    logging.info(f"{model_name} model ready, artifact {outputs['saving']} in {ARTIFACT_PATH}.")
+
+    '''
     # --- 2. EN Visualize the data - FR Visualisation des données ---
 
     logging.info("Creating the visualizations... ") # EN Log message indicating the start of visualization creation - FR Message de log indiquant le début de la création de visualisations
@@ -42,16 +120,11 @@ def main():
 
     logging.info("Visualizations created and saved in the 'figures' folder.") # EN Log message indicating that the visualizations have been created and saved - FR Message de log indiquant que les visualisations ont été créées et enregistrées
     '''
-    # --- 3. EN Training the model - FR Entraînement du modèle ---
-
-    #model_name, model, train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae = build_linear_regression_model(cleaned_data)
-    logging.info("Training the Random Forest model... ")
-    model_name, model, train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae = build_random_forest_model(cleaned_data)
-    logging.info(f"{model_name} model trained successfully.")
-    #model_name, model, train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae = build_gradient_boosting_model(cleaned_data)
-    
-    # --- 4. EN Displaying the results - FR Affichage des résultats ---
+    # --- 6. EN Displaying the results - FR Affichage des résultats ---
 
+    train_r2, test_r2 = metrics['train_r2'], metrics['test_r2']
+    train_rmse, test_rmse = metrics['train_rmse'], metrics['test_rmse']
+    train_mae, test_mae = metrics['train_mae'], metrics['test_mae']
     logging.info("-" * 58) # EN Log message indicating the start of the results display - FR Message de log indiquant le début de l'affichage des résultats
     logging.info(f"| {'Metric':<15} | {'TRAIN':>10} | {'TEST':>10} | {'DIFF':>10} |") # EN Log message showing the header of the results table - FR Message de log affichant l'en-tête du tableau des résultats
     logging.info("-" * 58) # EN Log message indicating the start of the results display - FR Message de log indiquant le début de l'affichage des résultats
@@ -61,17 +134,27 @@ def main():
     logging.info(f"| {'MAE':<15} | {train_mae:10.2f} | {test_mae:10.2f} | {abs(train_mae - test_mae):10.2f} |") # EN Log message showing the MAE - FR Message de log affichant le MAE
     logging.info("-" * 58) # EN Log message indicating the end of the results display - FR Message de log indiquant la fin de l'affichage des résultats
 
-    # --- 5. EN Saving the model - FR Sauvegarde du modèle ---
-
-    logging.info("Saving the trained model...") # EN Log message indicating the start of model saving - FR Message de log indiquant le début de la sauvegarde du modèle
-
-    with open("model_random_forest_regressor_building_santo.pkl", "wb") as f:
-        dump(model, 'model_random_forest_regressor_building_santo_compression.pkl', compress=('lzma', 9)) # EN Save the model to a file - FR Enregistrer le modèle dans un fichier
-
-    logging.info("Model saved successfully.")
-
     logging.info("Script execution finished") # EN Log message indicating the end of the script execution - FR Message de log indiquant la fin de l'exécution du script
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Immo Eliza: cleaning, training and saving of the model.")
+    parser.add_argument('--model', choices=list(MODELS), default=DEFAULT_MODEL, help="Model to train and save.")
+    parser.add_argument('--tune', action='store_true', help="Search the Random Forest hyperparameters (same as --model random_forest_tuned).")
+    parser.add_argument('--incremental', action='store_true', help="Clean and learn only the listings new or changed since the last run (full retrain on drift).")
+    parser.add_argument('--cv', type=int, default=0, metavar='K', help="Also evaluate the model with K-fold cross-validation (cached folds and models).")
+    parser.add_argument('--cv-repeats', type=int, default=1, help="Repetitions of the K-fold split with other shuffles.")
+    parser.add_argument('--encoding', choices=ENCODINGS, default=None, help="Categorical columns as one-hot columns or integer codes (default: 'codes' for gradient_boosting_native, 'one_hot' otherwise).")
+    parser.add_argument('--compress', type=float, nargs='?', const=TOLERANCE, default=None, metavar='TOLERANCE',
+                        help=f"Compress the forest (fewer, shallower trees) while its out-of-bag RMSE rises by at most TOLERANCE (default {TOLERANCE}).")
+    parser.add_argument('--chunksize', type=int, default=None, help="Clean the raw file by chunks of this many rows, with bounded memory.")
+    parser.add_argument('--no-cache', action='store_true', help="Run every stage again and overwrite its cached output.")
+    parser.add_argument('--profile', action='store_true', help="Also dump cProfile and tracemalloc profiles next to the run report.")
+    args = parser.parse_args()
+    model_key = 'random_forest_tuned' if args.tune else args.model
+    encoding = args.encoding or ('codes' if model_key == 'gradient_boosting_native' else 'one_hot')
+    if args.incremental:
+        incremental_retrain(output_path=cleaned_path(encoding), model_key=model_key, encoding=encoding)
+    else:
+        main(model_key, profile=args.profile, cv_folds=args.cv, cv_repeats=args.cv_repeats, use_cache=not args.no_cache, encoding=encoding, compress=args.compress,
+             chunksize=args.chunksize)
 
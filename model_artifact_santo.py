@@ -0,0 +1,96 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import json # EN : Metadata of the artifact, readable without the model - FR : Métadonnées lisibles sans le modèle
+import time # EN : Version and timing of the artifacts - FR : Version et chronométrage des artefacts
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import uuid # EN : Unique part of the version - FR : Partie unique de la version
+# EN : joblib (and sklearn through the pickle) are imported when a model is saved or loaded,
+# so reading the metadata stays fast - FR : joblib est importé au chargement du modèle seulement
+
+ARTIFACT_PATH = 'model_random_forest_regressor_building_santo.pkl'  # EN The file opened by the Streamlit app - FR Le fichier ouvert par l'application Streamlit
+ARTIFACT_FORMAT = 1  # EN Bumped when the bundle layout changes - FR Incrémenté si la structure du paquet change
+
+
+def metadata_path(path=ARTIFACT_PATH):
+    """JSON file written next to the artifact: version, features, provinces and metrics."""
+    return os.path.splitext(path)[0] + '.meta.json'
+
+
+def _metadata(artifact):
+    """Small, model-free part of an artifact."""
+    cleaning = (artifact.get('preprocessing') or {}).get('cleaning')
+    features = artifact.get('features') or []
+    if cleaning is not None and 'province' in cleaning['categories']:
+        provinces = [province for province in cleaning['categories']['province'] if province != 'nan']
+    else:  # EN The first province has no one-hot column (drop_first) - FR La première province n'a pas de colonne
+        provinces = sorted(feature[len('province_'):] for feature in features if feature.startswith('province_'))
+    return {'format': artifact['format'], 'version': artifact['version'], 'features': features,
+            'provinces': provinces, 'metrics': artifact['metrics']}
+
+
+def save_artifact(model, path=ARTIFACT_PATH, metrics=None, compress=0):
+    """Save the serving pipeline, its feature list and preprocessing parameters in one versioned file.
+
+    EN : `compress=0` (the default) writes the numpy arrays of the trees uncompressed, so
+    `load_artifact` can memory-map them instead of decompressing; any joblib codec
+    (('zlib', 3), ('lz4', 3), ('lzma', 9)...) can still be given for a smaller file.
+    FR : `compress=0` (par défaut) écrit les tableaux des arbres sans compression pour que
+    `load_artifact` les lise en mémoire partagée au lieu de les décompresser.
+    """
+    imputer = model.named_steps.get('impute')
+    cleaner = model.named_steps.get('clean')
+    artifact = {
+        'format': ARTIFACT_FORMAT,
+        # EN The timestamp changes once per second: the random suffix keeps two saves in the same second apart
+        # FR L'horodatage change une fois par seconde : le suffixe aléatoire distingue deux sauvegardes de la même seconde
+        'version': f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}",
+        'model': model,
+        'features': list(imputer.feature_names_) if imputer is not None else None,
+        'preprocessing': {
+            'cleaning': cleaner.state_ if cleaner is not None else None,
+            'imputation': imputer.fill_values_ if imputer is not None else None,
+        },
+        'metrics': {name: float(value) for name, value in (metrics or {}).items()},
+    }
+    from joblib import dump
+    start = time.perf_counter()
+    dump(artifact, path, compress=compress)
+    with open(metadata_path(path), 'w') as f:
+        json.dump(_metadata(artifact), f)
+    logging.info(f"Model artifact {artifact['version']} saved in {path} "
+                 f"({os.path.getsize(path) / 1e6:.1f} MB, {time.perf_counter() - start:.2f} s).")
+    return artifact
+
+
+def load_artifact(path=ARTIFACT_PATH, mmap=True):
+    """Load an artifact saved by `save_artifact`.
+
+    EN : With `mmap=True` the numpy arrays of an uncompressed artifact are read through a
+    memory map (no decompression, pages shared between processes); compressed files are
+    always decompressed. A file holding only a model is returned as an artifact too.
+    FR : Avec `mmap=True`, les tableaux d'un artefact non compressé sont lus en mémoire
+    partagée ; un fichier ne contenant qu'un modèle est aussi accepté.
+    """
+    from joblib import load
+    artifact = load(path, mmap_mode='r' if mmap else None)
+    if not isinstance(artifact, dict) or 'format' not in artifact:
+        artifact = {'format': 0, 'version': None, 'model': artifact, 'features': None, 'preprocessing': {}, 'metrics': {}}
+    return artifact
+
+
+def load_metadata(path=ARTIFACT_PATH):
+    """Version, features, provinces and metrics of an artifact, without loading its model.
+
+    EN : Reads the JSON written by `save_artifact`; for an older artifact without it, the
+    model is loaded once and the JSON is written.
+    FR : Lit le JSON écrit par `save_artifact` ; pour un ancien artefact, le modèle est
+    chargé une fois et le JSON est écrit.
+    """
+    meta_path = metadata_path(path)
+    if os.path.exists(meta_path) and os.path.getmtime(meta_path) >= os.path.getmtime(path):
+        with open(meta_path) as f:
+            return json.load(f)
+    metadata = _metadata(load_artifact(path))
+    with open(meta_path, 'w') as f:
+        json.dump(metadata, f)
+    return metadata
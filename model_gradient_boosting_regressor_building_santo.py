@@ -0,0 +1,62 @@
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.pipeline import Pipeline
+import numpy as np
+from data_cleaning_santo import CATEGORICAL_COLUMNS
+from preprocessing_santo import FeatureImputer, split_frame
+from spatial_features_santo import SPATIAL_COLUMNS, SpatialFeatures
+
+def build_gradient_boosting_model(df, native_categories=False):
+    # Séparation des variables explicatives (X) et de la variable cible (y), puis division en ensembles d'entraînement et de test
+    X_train, X_test, y_train, y_test = split_frame(df)
+
+    # EN With native_categories, the integer code columns of data_cleaning(..., encoding='codes') are split by category sets
+    # FR Avec native_categories, les colonnes de codes entiers sont divisées par ensembles de catégories
+    options = {}
+    if native_categories:
+        categorical = [column for column in X_train.columns if column in CATEGORICAL_COLUMNS]
+        if not categorical:
+            raise ValueError("Native categories need the cleaned dataset with integer codes: data_cleaning(..., encoding='codes').")
+        # EN Same column order as the FeatureImputer output, the spatial features last - FR Même ordre que la sortie du FeatureImputer
+        options['categorical_features'] = [column in categorical for column in list(X_train.columns) + SPATIAL_COLUMNS]
+
+    # Boosting sur histogrammes : les colonnes sont discrétisées en 255 classes, bien plus rapide que GradientBoostingRegressor
+    gb_model = Pipeline([
+        ('spatial', SpatialFeatures()), # EN Neighbourhood price per m² and density (KD-tree) - FR Prix au m² et densité du voisinage
+        ('impute', FeatureImputer()),
+        ('model', HistGradientBoostingRegressor(
+            max_iter=500,
+            learning_rate=0.05,
+            max_leaf_nodes=31,
+            early_stopping=True,
+            random_state=42,
+            **options
+        )),
+    ])
+
+    # Entraînement du modèle
+    gb_model.fit(X_train, y_train)
+
+    # Prédictions
+    y_pred = gb_model.predict(X_test)
+    y_pred_train = gb_model.predict(X_train)
+
+    # Évaluation des performances
+    y_r2 = r2_score(y_test, y_pred)
+    X_r2 = r2_score(y_train, y_pred_train)
+    y_mae = mean_absolute_error(y_test, y_pred)
+    X_mae = mean_absolute_error(y_train, y_pred_train)
+    y_rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    X_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
+
+    # Affichage des résultats
+    print(f"R2 Score : {y_r2}")
+    print(f"Mean Absolute Error : {y_mae}")
+    print(f"Root Mean Squared Error : {y_rmse}")
+
+    return 'Gradient Boosting' + (' (native categories)' if native_categories else ''), gb_model, X_r2, y_r2, X_rmse, y_rmse, X_mae, y_mae
+
+
+def build_native_gradient_boosting_model(df):
+    """Gradient boosting on the integer codes of the 'codes' encoding, one category set per split."""
+    return build_gradient_boosting_model(df, native_categories=True)
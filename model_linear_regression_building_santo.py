@@ -0,0 +1,39 @@
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.pipeline import Pipeline
+import numpy as np
+from preprocessing_santo import FeatureImputer, split_frame
+from spatial_features_santo import SpatialFeatures
+
+def build_linear_regression_model(df):
+    # Séparation des variables explicatives (X) et de la variable cible (y), puis division en ensembles d'entraînement et de test
+    X_train, X_test, y_train, y_test = split_frame(df)
+
+    # Imputation (médiane/mode) et encodage ajustés sur X_train, enregistrés avec le modèle
+    lr_model = Pipeline([
+        ('spatial', SpatialFeatures()), # EN Neighbourhood price per m² and density (KD-tree) - FR Prix au m² et densité du voisinage
+        ('impute', FeatureImputer()),
+        ('model', LinearRegression()),
+    ])
+
+    # Entraînement du modèle
+    lr_model.fit(X_train, y_train)
+
+    # Prédictions
+    y_pred = lr_model.predict(X_test)
+    y_pred_train = lr_model.predict(X_train)
+
+    # Évaluation des performances
+    y_r2 = r2_score(y_test, y_pred)
+    X_r2 = r2_score(y_train, y_pred_train)
+    y_mae = mean_absolute_error(y_test, y_pred)
+    X_mae = mean_absolute_error(y_train, y_pred_train)
+    y_rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    X_rmse = np.sqrt(mean_squared_error(y_train, y_pred_train))
+
+    # Affichage des résultats
+    print(f"R2 Score : {y_r2}")
+    print(f"Mean Absolute Error : {y_mae}")
+    print(f"Root Mean Squared Error : {y_rmse}")
+
+    return 'Linear Regression', lr_model, X_r2, y_r2, X_rmse, y_rmse, X_mae, y_mae
@@ -0,0 +1,26 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+from model_linear_regression_building_santo import build_linear_regression_model
+from model_gradient_boosting_regressor_building_santo import build_gradient_boosting_model, build_native_gradient_boosting_model
+from model_random_forest_regressor_building_santo import build_random_forest_model
+from hyperparameter_search_santo import tune_random_forest_model
+
+# EN : Every builder takes the cleaned dataset and returns
+# (name, model, train_r2, test_r2, train_rmse, test_rmse, train_mae, test_mae)
+# on the same train/test split (test_size=0.2, random_state=42).
+# FR : Chaque fonction prend le jeu nettoyé et renvoie le même tuple, sur la même division.
+MODELS = {
+    'linear': build_linear_regression_model,
+    'gradient_boosting': build_gradient_boosting_model,
+    'gradient_boosting_native': build_native_gradient_boosting_model,  # EN Needs the 'codes' encoding - FR Nécessite l'encodage 'codes'
+    'random_forest': build_random_forest_model,
+    'random_forest_tuned': tune_random_forest_model,
+}
+
+DEFAULT_MODEL = 'random_forest'
+
+
+def build_model(name, df):
+    """Train the registered model `name` on the cleaned dataset `df`."""
+    if name not in MODELS:
+        raise ValueError(f"Unknown model '{name}'. Available models: {', '.join(MODELS)}")
+    return MODELS[name](df)
@@ -0,0 +1,207 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import itertools # EN : Combinations of the wizard inputs - FR : Combinaisons des entrées de l'assistant
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import threading # EN : Streamlit sessions run in threads - FR : Les sessions Streamlit tournent dans des threads
+import time # EN : Warm-up timing - FR : Chronométrage du préchauffage
+from collections import OrderedDict # EN : LRU order of the entries - FR : Ordre LRU des entrées
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+# EN : pandas and joblib are imported on the first prediction, the Streamlit app imports this module at startup
+# FR : pandas et joblib sont importés à la première prédiction, l'application importe ce module au démarrage
+
+CACHE_PATH = 'data/cache/prediction_cache.joblib'  # EN Written by the warm-up job - FR Écrit par le préchauffage
+CACHE_SIZE = 50_000  # EN Default number of cached predictions - FR Nombre de prédictions gardées par défaut
+CACHE_FORMAT = 3  # EN Entries hold (price, P10, P90), keys keep the case of the strings - FR Entrées (prix, P10, P90), clés sensibles à la casse
+
+# --- EN : Input space of the Streamlit wizard - FR : Espace des entrées de l'assistant Streamlit ---
+# EN Property type of the form -> (type, subtype) of the Kangaroo dataset - FR Type de bien du formulaire -> (type, subtype) du dataset Kangaroo
+PROPERTY_TYPES = {
+    "House": ("HOUSE", "HOUSE"),
+    "Apartment": ("APARTMENT", "APARTMENT"),
+    "Villa": ("HOUSE", "VILLA"),
+    "Chalet": ("HOUSE", "CHALET"),
+    "Others": ("HOUSE", "OTHER_PROPERTY"),
+}
+EPC_SCORES = ["A+", "A", "B", "C", "D", "E", "F", "G"]
+BUILDING_CONDITIONS = ["Good", "Just Renovated", "To Be Done Up", "To Renovate", "To Restore"]
+
+
+def wizard_listing(bedroom_count, bathroom_count, habitable_surface, has_garden, has_terrace, has_fireplace,
+                   has_air_conditioning, construction_year, property_type, epc_score, building_condition, province):
+    """Raw Kangaroo-format listing built from the answers of the wizard."""
+    kangaroo_type, kangaroo_subtype = PROPERTY_TYPES[property_type]
+    return {
+        'bedroomcount': bedroom_count,
+        'bathroomcount': bathroom_count,
+        'habitablesurface': habitable_surface,
+        'hasgarden': has_garden,
+        'hasterrace': has_terrace,
+        'hasfireplace': has_fireplace,
+        'buildingconstructionyear': construction_year,
+        'hasairconditioning': has_air_conditioning,
+        'type': kangaroo_type,
+        'subtype': kangaroo_subtype,
+        'epcscore': epc_score,
+        'buildingcondition': building_condition.upper().replace(' ', '_'),
+        'province': province,
+    }
+
+
+def common_listings(provinces, bedroom_counts=(1, 2, 3, 4), bathroom_counts=(1, 2), habitable_surfaces=(100,)):
+    """Listings of the warm-up: every type, EPC score, condition and province, with common room counts.
+
+    EN : The other answers keep the default values of the wizard.
+    FR : Les autres réponses gardent les valeurs par défaut de l'assistant.
+    """
+    for property_type, epc_score, condition, province, bedrooms, bathrooms, surface in itertools.product(
+            PROPERTY_TYPES, EPC_SCORES, BUILDING_CONDITIONS, provinces, bedroom_counts, bathroom_counts, habitable_surfaces):
+        yield wizard_listing(bedrooms, bathrooms, surface, False, False, False, False, 2000,
+                             property_type, epc_score, condition, province)
+
+
+# --- EN : LRU cache of the predictions - FR : Cache LRU des prédictions ---
+def _normalize(value):
+    """Same key for equal answers: True/1, 3/3.0 and ' GOOD'/'GOOD' are the same.
+
+    EN : Strings are only stripped, like `strip_strings` in the cleaning: 'good' and 'GOOD'
+    are different categories for the model, so they get different keys.
+    FR : Les textes sont seulement nettoyés des espaces, comme dans le nettoyage : 'good'
+    et 'GOOD' sont des catégories différentes pour le modèle.
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+class PredictionCache:
+    """Predicted price (and P10/P90 for a forest) of each normalized listing, with LRU eviction and hit/miss counters.
+
+    EN : The key is the sorted (field, normalized value) tuple of the raw listing, so a
+    repeated answer returns its price without touching the model. Safe to share between
+    the threads of the Streamlit sessions; the model runs outside the lock.
+    FR : La clé est le tuple trié (champ, valeur normalisée) de l'annonce : une réponse
+    déjà vue est servie sans le modèle. Partageable entre les sessions Streamlit.
+    """
+
+    def __init__(self, model, maxsize=CACHE_SIZE, version=None):
+        self.model = model
+        self.maxsize = maxsize
+        self.version = version  # EN Artifact version of the predictions - FR Version de l'artefact des prédictions
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(listing):
+        return tuple(sorted((field, _normalize(value)) for field, value in listing.items()))
+
+    def _store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def _predict_frame(self, frame):
+        """(price, P10, P90) of each row, in one pass over the trees; NaN bounds when the model is not a forest."""
+        from forest_engine_santo import predict_interval, supports_intervals
+        if supports_intervals(self.model):
+            prices, bounds = predict_interval(self.model, frame)
+            return [(float(price), float(low), float(high)) for price, (low, high) in zip(prices, bounds)]
+        return [(float(price), float('nan'), float('nan')) for price in self.model.predict(frame)]
+
+    def predict_interval(self, listing):
+        """(price, P10, P90) of one raw listing (dict)."""
+        return self._lookup(listing)
+
+    def _lookup(self, listing):
+        """Cached entry of the listing, computed by `_predict_frame` on a miss."""
+        key = self.key(listing)
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+        import pandas as pd
+        entry = self._predict_frame(pd.DataFrame([listing]))[0]
+        with self.lock:
+            self._store(key, entry)
+        return entry
+
+    def predict(self, listing):
+        """Predicted price of one raw listing (dict)."""
+        return self.predict_interval(listing)[0]
+
+    def warm_up(self, listings, batch_size=4096):
+        """Predict the uncached `listings` in batches (one model call per batch); return how many were added."""
+        import pandas as pd
+        added = 0
+        batch = []
+        for listing in itertools.chain(listings, [None]):
+            if listing is not None:
+                key = self.key(listing)
+                if key not in self.entries:
+                    batch.append((key, listing))
+            if batch and (listing is None or len(batch) >= batch_size):
+                entries = self._predict_frame(pd.DataFrame([listing for _, listing in batch]))
+                with self.lock:
+                    for (key, _), entry in zip(batch, entries):
+                        self._store(key, entry)
+                added += len(batch)
+                batch = []
+        return added
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize,
+                'hit_rate': self.hits / requests if requests else 0.0}
+
+    def save(self, path=CACHE_PATH):
+        from joblib import dump
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        dump({'format': CACHE_FORMAT, 'version': self.version, 'entries': list(self.entries.items())}, path)
+
+    @classmethod
+    def load(cls, model, path=CACHE_PATH, maxsize=CACHE_SIZE, version=None):
+        """Cache filled from `path` when it was computed with the same artifact `version`, empty otherwise."""
+        cache = cls(model, maxsize, version)
+        if os.path.exists(path):
+            from joblib import load
+            saved = load(path)
+            if saved.get('format') == CACHE_FORMAT and saved['version'] == version:
+                for key, price in saved['entries'][-maxsize:]:
+                    cache.entries[key] = price
+            else:
+                logging.info(f"Prediction cache {path} was computed with another model version or format, ignored.")
+        return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the predictions of the common answers of the Streamlit wizard.")
+    parser.add_argument('--model', default=None, help="Model artifact (default: the one of main_santo.py).")
+    parser.add_argument('--output', default=CACHE_PATH, help="Cache file read by the Streamlit app.")
+    parser.add_argument('--size', type=int, default=CACHE_SIZE, help="Maximum number of cached predictions.")
+    args = parser.parse_args()
+
+    from model_artifact_santo import ARTIFACT_PATH, load_artifact
+    artifact = load_artifact(args.model or ARTIFACT_PATH)
+    cleaning = artifact['preprocessing']['cleaning']
+    provinces = [province for province in cleaning['categories']['province'] if province != 'nan']
+
+    cache = PredictionCache(artifact['model'], args.size, artifact['version'])
+    start = time.perf_counter()
+    added = cache.warm_up(common_listings(provinces))
+    cache.save(args.output)
+    logging.info(f"{added} predictions computed in {time.perf_counter() - start:.2f} s and saved in {args.output}.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
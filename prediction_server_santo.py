@@ -0,0 +1,200 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import asyncio # EN : Event loop of the server - FR : Boucle d'événements du serveur
+import json # EN : Request and response bodies - FR : Corps des requêtes et réponses
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import time # EN : Latency measurement - FR : Mesure de la latence
+from collections import deque # EN : Recent latencies for the percentiles - FR : Latences récentes pour les percentiles
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+from model_artifact_santo import ARTIFACT_PATH, load_artifact # EN : Versioned model artifact - FR : Artefact versionné du modèle
+from forest_engine_santo import compile_pipeline # EN : Low-latency forest inference - FR : Inférence de forêt à faible latence
+
+# --- EN Setting up logging - FR Configuration de la journalisation
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+# EN : Micro-batching of the concurrent requests - FR : Regroupement des requêtes simultanées en petits lots
+class MicroBatcher:
+    """Collect the rows of concurrent requests and score them with one `predict` call per batch.
+
+    EN : A batch is closed when `max_batch_size` rows are waiting or `batch_window_ms`
+    after its first row. The model runs in a thread so the event loop keeps accepting.
+    FR : Un lot est fermé à `max_batch_size` lignes ou `batch_window_ms` après sa première
+    ligne. Le modèle tourne dans un thread pour que la boucle continue d'accepter.
+    """
+
+    def __init__(self, model, batch_window_ms=5.0, max_batch_size=256, latency_window=10_000):
+        self.model = model
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue()
+        self.latencies = deque(maxlen=latency_window)
+        self.batch_sizes = deque(maxlen=latency_window)
+        self.requests = 0
+        self.rows = 0
+        self.started = time.perf_counter()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    async def predict(self, rows):
+        """Predicted prices of a list of raw listings (dicts)."""
+        start = time.perf_counter()
+        futures = []
+        for row in rows:
+            future = asyncio.get_running_loop().create_future()
+            await self.queue.put((row, future))
+            futures.append(future)
+        predictions = await asyncio.gather(*futures)
+        self.latencies.append(time.perf_counter() - start)
+        self.requests += 1
+        return predictions
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _predict_batch(self, rows):
+        """Prediction or exception of each row: the batch in one call, its rows one by one when it fails.
+
+        EN : Rows of other clients share the batch, so a bad row only fails its own request.
+        FR : Les lignes d'autres clients partagent le lot : une mauvaise ligne ne fait échouer que sa requête.
+        """
+        try:
+            return [float(prediction) for prediction in self.model.predict(pd.DataFrame(rows))]
+        except Exception:
+            logging.exception("Batch prediction failed, scoring its rows one by one")
+        results = []
+        for row in rows:
+            try:
+                results.append(float(self.model.predict(pd.DataFrame([row]))[0]))
+            except Exception as error:
+                results.append(error)
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            results = await loop.run_in_executor(None, self._predict_batch, [row for row, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.batch_sizes.append(len(batch))
+            self.rows += len(batch)
+
+    def metrics(self):
+        """Latency percentiles (ms), throughput and batch sizes since the start."""
+        elapsed = time.perf_counter() - self.started
+        latencies = np.asarray(self.latencies) * 1000
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': len(self.batch_sizes),
+            'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'latency_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'throughput_rps': self.requests / elapsed if elapsed else 0.0,
+            'uptime_s': elapsed,
+        }
+
+
+# EN : ASGI application - FR : Application ASGI
+class PredictionServer:
+    """ASGI app: POST /predict, GET /metrics and GET /health. The model is loaded once at startup."""
+
+    def __init__(self, model_path=ARTIFACT_PATH, batch_window_ms=5.0, max_batch_size=256):
+        self.model_path = model_path
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_size = max_batch_size
+        self.batcher = None
+
+    async def startup(self):
+        logging.info(f"Loading the model from {self.model_path}...")
+        model = compile_pipeline(load_artifact(self.model_path)['model'])  # EN Small batches on the flat forest engine - FR Petits lots sur le moteur de forêt à plat
+        self.batcher = MicroBatcher(model, self.batch_window_ms, self.max_batch_size)
+        self.batcher.start()
+        logging.info("Prediction server ready.")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await self.startup()
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await self.batcher.stop()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        elif scope['type'] == 'http':
+            await self.handle_http(scope, receive, send)
+
+    async def handle_http(self, scope, receive, send):
+        method, path = scope['method'], scope['path']
+        if method == 'GET' and path == '/health':
+            return await self.respond(send, 200, {'status': 'ok'})
+        if method == 'GET' and path == '/metrics':
+            return await self.respond(send, 200, self.batcher.metrics())
+        if method == 'POST' and path == '/predict':
+            body = b''
+            while True:
+                message = await receive()
+                body += message.get('body', b'')
+                if not message.get('more_body'):
+                    break
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                return await self.respond(send, 400, {'error': 'invalid JSON'})
+            rows = payload if isinstance(payload, list) else [payload]
+            try:
+                predictions = await self.batcher.predict(rows)
+            except Exception as error:
+                return await self.respond(send, 422, {'error': str(error)})
+            return await self.respond(send, 200, {'predictions': predictions})
+        return await self.respond(send, 404, {'error': 'not found'})
+
+    @staticmethod
+    async def respond(send, status, content):
+        body = json.dumps(content).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching prediction server (ASGI).")
+    parser.add_argument('--model', default=ARTIFACT_PATH, help="Model artifact saved by main_santo.py.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--batch-window-ms', type=float, default=5.0, help="Time window to collect a batch.")
+    parser.add_argument('--max-batch-size', type=int, default=256, help="Maximum rows per predict call.")
+    args = parser.parse_args()
+
+    import uvicorn # EN Only needed to run the server - FR Seulement pour lancer le serveur
+    app = PredictionServer(args.model, args.batch_window_ms, args.max_batch_size)
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+import pandas as pd # EN : Importing the Pandas library - FR : Importation de la bibliothèque Pandas
+from sklearn.base import BaseEstimator, TransformerMixin # EN : Base classes of sklearn transformers - FR : Classes de base des transformers sklearn
+from sklearn.model_selection import train_test_split # EN : Train/test split of the cleaned dataset - FR : Division entraînement/test du dataset nettoyé
+from sklearn.pipeline import Pipeline # EN : Chaining of the preprocessing and the model - FR : Enchaînement du prétraitement et du modèle
+from profiling_santo import stage # EN : Stage timing of the training runs - FR : Chronométrage des étapes de l'entraînement
+from data_cleaning_santo import (BINARY_COLUMNS, GIRAFFE_COLUMNS, GIRAFFE_PATH, fit_cleaning_state,
+                                 clean_frame, merge_giraffe, rename_columns)
+
+
+def split_positions(n_rows, test_size=0.2, random_state=42):
+    """Train and test row positions of `split_frame`."""
+    return train_test_split(np.arange(n_rows), test_size=test_size, random_state=random_state)
+
+
+def split_frame(df, target='price', test_size=0.2, random_state=42):
+    """X_train, X_test, y_train, y_test of the cleaned dataset, copying each feature row once.
+
+    EN : Same rows as `train_test_split(df.drop(columns=target), df[target], ...)`, without
+    the full copy made by `drop`.
+    FR : Mêmes lignes que `train_test_split(df.drop(columns=target), ...)`, sans la copie
+    complète faite par `drop`.
+    """
+    train_rows, test_rows = split_positions(len(df), test_size, random_state)
+    features = df.columns != target
+    return (df.iloc[train_rows, features], df.iloc[test_rows, features],
+            df[target].iloc[train_rows], df[target].iloc[test_rows])
+
+
+def prepare_raw_frame(X):
+    """Rename the raw Kangaroo columns and add the Giraffe columns when an 'id' is given."""
+    X = rename_columns(X.copy())
+    # EN Parquet/Arrow inputs give None where the CSV gives NaN - FR Les entrées Parquet donnent None au lieu de NaN
+    object_cols = X.select_dtypes(include=['object']).columns
+    X[object_cols] = X[object_cols].where(X[object_cols].notna(), np.nan)
+    if 'id' in X.columns and not set(GIRAFFE_COLUMNS) <= set(X.columns) and os.path.exists(GIRAFFE_PATH):
+        X = merge_giraffe(X)
+    return X
+
+
+# EN : Cleaning of raw listings with the settings of the training file - FR : Nettoyage des annonces brutes avec les paramètres du fichier d'entraînement
+class KangarooCleaner(BaseEstimator, TransformerMixin):
+    """Fitted version of `data_cleaning` for raw Kangaroo rows (no row is dropped)."""
+
+    @classmethod
+    def from_state(cls, state):
+        """Cleaner fitted with the state returned by `data_cleaning(..., return_state=True)`."""
+        cleaner = cls()
+        cleaner.state_ = dict(state)
+        return cleaner
+
+    def fit(self, X, y=None):
+        """Compute the cleaning settings on a raw Kangaroo frame."""
+        self.state_ = fit_cleaning_state([prepare_raw_frame(X)])
+        return self
+
+    def transform(self, X):
+        """Cleaned features of each raw row, without the price."""
+        X = clean_frame(prepare_raw_frame(X), self.state_, training=False)
+        return X.drop(columns=['price'])
+
+
+# EN : Imputation and encoding fitted on the training set - FR : Imputation et encodage ajustés sur l'ensemble d'entraînement
+class FeatureImputer(BaseEstimator, TransformerMixin):
+    """Median/mode imputation and category codes fitted on X_train, in the training column order.
+
+    EN : Missing numeric values get the training median, missing categories the training mode.
+    A column absent from the input is added: one-hot and binary columns with 0, the other
+    ones with their median or mode. The output is a float32 array ready for the model.
+    FR : Médiane pour les valeurs numériques, mode pour les catégories. Une colonne absente
+    est ajoutée (0 pour le one-hot et les binaires). Sortie : un tableau float32.
+    """
+
+    def fit(self, X, y=None):
+        """Learn the columns, medians, modes and category codes of X."""
+        with stage('imputation.fit'):
+            return self._fit(X)
+
+    def _fit(self, X):
+        self.feature_names_ = X.columns.tolist()
+
+        # EN Numeric columns: median - FR Colonnes numériques : médiane
+        numeric_cols = X.select_dtypes(include=[np.number]).columns
+        fill_values = X[numeric_cols].median().to_dict()
+
+        # EN Categorical columns: most frequent value (mode) - FR Colonnes catégorielles : valeur la plus fréquente (mode)
+        categorical_cols = X.select_dtypes(include=['object', 'category', 'bool']).columns
+        for col in categorical_cols:
+            fill_values[col] = X[col].mode()[0]
+
+        # EN One-hot and binary columns are 0 when they are absent - FR Les colonnes one-hot et binaires absentes valent 0
+        for col in self.feature_names_:
+            if pd.api.types.is_bool_dtype(X[col]) or X[col].dtype == np.uint8 or col in BINARY_COLUMNS:
+                fill_values[col] = 0
+        self.fill_values_ = fill_values
+
+        # EN Category codes of the training set, reused for every input - FR Codes des catégories de l'entraînement
+        self.categories_ = {
+            col: X[col].astype('category').cat.categories
+            for col in X.select_dtypes(include=['object', 'category']).columns
+        }
+        return self
+
+    def transform(self, X):
+        """Impute, encode and order X like the training set."""
+        with stage('imputation.transform') as measured:
+            if list(X.columns) != self.feature_names_:
+                X = X.reindex(columns=self.feature_names_)
+            if self.categories_:
+                X = X.assign(**{col: pd.Categorical(X[col].fillna(self.fill_values_[col]), categories=categories).codes
+                                for col, categories in self.categories_.items()})
+            # EN One float32 copy, then only the columns with missing values are filled - FR Une seule copie float32, puis seules les colonnes incomplètes sont remplies
+            values = X.to_numpy(dtype=np.float32)
+            missing = np.isnan(values)
+            for position in np.flatnonzero(missing.any(axis=0)):
+                fill_value = self.fill_values_.get(self.feature_names_[position], np.nan)
+                values[missing[:, position], position] = fill_value
+            return measured.shape(values)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.feature_names_, dtype=object)
+
+
+def make_serving_pipeline(cleaning_state, model):
+    """Raw listing -> price pipeline: the fitted cleaner followed by the trained model pipeline."""
+    return Pipeline([('clean', KangarooCleaner.from_state(cleaning_state))] + list(model.steps))
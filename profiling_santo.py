@@ -0,0 +1,214 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import cProfile # EN : Function-level profile of the hot paths - FR : Profil par fonction des chemins critiques
+import io # EN : Text buffer of the profile statistics - FR : Tampon texte des statistiques du profil
+import json # EN : Machine-readable run reports - FR : Rapports d'exécution lisibles par machine
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import pstats # EN : Sorting of the profile - FR : Tri du profil
+import sys # EN : Command line of the run - FR : Ligne de commande de l'exécution
+import time # EN : Wall time of the stages - FR : Durée des étapes
+import tracemalloc # EN : Python allocations of the hot paths - FR : Allocations Python des chemins critiques
+from contextlib import contextmanager
+
+try:
+    import resource # EN : Peak resident memory (Unix only) - FR : Mémoire résidente maximale (Unix seulement)
+except ImportError:
+    resource = None
+
+REPORT_DIR = 'reports'  # EN One JSON file per run - FR Un fichier JSON par exécution
+
+_active_report = None  # EN Report of the running pipeline, None outside `start_run` - FR Rapport en cours, None hors de `start_run`
+
+
+def current_rss_mb():
+    """Resident memory of the process now, in MB (None when unknown)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """Highest resident memory of the process since its start, in MB (None when unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3  # EN Bytes on macOS, kB on Linux - FR Octets sur macOS, ko sur Linux
+
+
+class Stage:
+    """Measures of one stage; `shape(df)` records the rows and columns of its output and returns it."""
+
+    def __init__(self, record):
+        self.record = record
+
+    def count(self, rows, columns=None):
+        self.record['rows'] = int(rows)
+        if columns is not None:
+            self.record['columns'] = int(columns)
+
+    def note(self, **values):
+        self.record.update(values)
+
+    def shape(self, df):
+        if df is not None and hasattr(df, 'shape'):
+            self.count(df.shape[0], df.shape[1] if len(df.shape) > 1 else 1)
+        return df
+
+
+class _NoStage:
+    """Stage used when no run is active: measures nothing."""
+
+    @staticmethod
+    def count(rows, columns=None):
+        pass
+
+    @staticmethod
+    def note(**values):
+        pass
+
+    @staticmethod
+    def shape(df):
+        return df
+
+
+class RunReport:
+    """Wall time, memory and data shape of every stage of a run, saved as JSON.
+
+    EN : Stages can be nested; the name of a nested stage is prefixed by its parents
+    ('training/model.fit/imputation.fit'). With `profile=True`, the whole run is also
+    profiled with cProfile and tracemalloc, and the hot paths are saved next to the report.
+    FR : Les étapes peuvent être imbriquées. Avec `profile=True`, toute l'exécution est
+    aussi profilée (cProfile et tracemalloc) et les chemins critiques sont enregistrés.
+    """
+
+    def __init__(self, name, profile=False, report_dir=REPORT_DIR):
+        self.name = name
+        self.profile = profile
+        self.report_dir = report_dir
+        self.run_id = f"{name}_{time.strftime('%Y%m%d-%H%M%S')}"
+        self.stages = []
+        self.path = []
+        self.started = time.perf_counter()
+        self.profiler = None
+
+    @contextmanager
+    def stage(self, name):
+        self.path.append(name)
+        record = {'name': '/'.join(self.path), 'depth': len(self.path) - 1}
+        self.stages.append(record)
+        rss_before = current_rss_mb()
+        traced_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        start = time.perf_counter()
+        try:
+            yield Stage(record)
+        finally:
+            record['wall_s'] = time.perf_counter() - start
+            record['rss_mb'] = current_rss_mb()
+            record['rss_delta_mb'] = record['rss_mb'] - rss_before if rss_before is not None else None
+            record['peak_rss_mb'] = peak_rss_mb()
+            if traced_before is not None:
+                record['python_alloc_delta_mb'] = (tracemalloc.get_traced_memory()[0] - traced_before) / 1e6
+            self.path.pop()
+
+    def start(self):
+        if self.profile:
+            tracemalloc.start(10)
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def finish(self):
+        """Stop the profilers and write the report (and the profiles); return the report path."""
+        os.makedirs(self.report_dir, exist_ok=True)
+        report = {
+            'run_id': self.run_id,
+            'command': sys.argv,
+            'python': sys.version.split()[0],
+            'total_s': time.perf_counter() - self.started,
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': self.stages,
+        }
+        if self.profiler is not None:
+            self.profiler.disable()
+            profile_path = os.path.join(self.report_dir, f'{self.run_id}.prof')
+            self.profiler.dump_stats(profile_path)
+            text = io.StringIO()
+            pstats.Stats(self.profiler, stream=text).sort_stats('cumulative').print_stats(40)
+            with open(os.path.join(self.report_dir, f'{self.run_id}.cprofile.txt'), 'w') as f:
+                f.write(text.getvalue())
+            snapshot = tracemalloc.take_snapshot()
+            report['tracemalloc_peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            with open(os.path.join(self.report_dir, f'{self.run_id}.tracemalloc.txt'), 'w') as f:
+                for statistic in snapshot.statistics('lineno')[:40]:
+                    f.write(f"{statistic}\n")
+            report['profiles'] = [profile_path]
+
+        path = os.path.join(self.report_dir, f'{self.run_id}.json')
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"Run report saved in {path}")
+        return path
+
+
+@contextmanager
+def start_run(name, profile=False, report_dir=REPORT_DIR):
+    """Collect the stages of the code run inside this block into one JSON report."""
+    global _active_report
+    report = RunReport(name, profile, report_dir).start()
+    _active_report = report
+    try:
+        yield report
+    finally:
+        _active_report = None
+        report.finish()
+
+
+@contextmanager
+def stage(name):
+    """Measure a stage of the active run; does nothing outside `start_run`."""
+    if _active_report is None:
+        yield _NoStage
+    else:
+        with _active_report.stage(name) as measured:
+            yield measured
+
+
+def compare_reports(old_path, new_path, threshold=0.2):
+    """Print the wall time and memory of each stage of two reports; return the stages slower by more than `threshold`."""
+    with open(old_path) as f:
+        old = {record['name']: record for record in json.load(f)['stages']}
+    with open(new_path) as f:
+        new = json.load(f)['stages']
+
+    print("-" * 84)
+    print(f"| {'Stage':<40} | {'OLD s':>10} | {'NEW s':>10} | {'PEAK MB':>10} |")
+    print("-" * 84)
+    regressions = []
+    for record in new:
+        before = old.get(record['name'], {}).get('wall_s')
+        print(f"| {record['name'][-40:]:<40} | {before if before is not None else float('nan'):10.3f} | "
+              f"{record['wall_s']:10.3f} | {record.get('peak_rss_mb') or float('nan'):10.1f} |")
+        if before and record['wall_s'] > before * (1 + threshold) and record['wall_s'] - before > 0.05:
+            regressions.append(record['name'])
+    print("-" * 84)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two run reports of main_santo.py.")
+    parser.add_argument('old', help="Reference run report (JSON).")
+    parser.add_argument('new', help="New run report (JSON).")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Relative slowdown reported as a regression.")
+    args = parser.parse_args()
+    regressions = compare_reports(args.old, args.new, args.threshold)
+    if regressions:
+        print(f"Slower stages: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
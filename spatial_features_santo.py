@@ -0,0 +1,116 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import numpy as np # EN : Importing the NumPy library - FR : Importation de la bibliothèque NumPy
+from sklearn.base import BaseEstimator, TransformerMixin # EN : Base classes of sklearn transformers - FR : Classes de base des transformers sklearn
+from sklearn.neighbors import KDTree # EN : Spatial index of the training listings - FR : Index spatial des annonces d'entraînement
+from profiling_santo import stage # EN : Stage timing of the training runs - FR : Chronométrage des étapes de l'entraînement
+
+EARTH_RADIUS_KM = 6371.0
+N_NEIGHBORS = 10  # EN Neighbours of the median price per m² - FR Voisins du prix médian au m²
+RADIUS_KM = 1.0  # EN Radius of the listing density - FR Rayon de la densité d'annonces
+QUERY_CHUNK = 100_000  # EN Rows per bulk query, bounds the neighbour arrays - FR Lignes par requête groupée
+SPATIAL_COLUMNS = ['nearby_price_per_m2', 'nearby_listings']
+
+
+def unit_vectors(latitude, longitude):
+    """3D points on the unit sphere: their straight-line distance grows with the great-circle distance."""
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    cos_latitude = np.cos(latitude)
+    return np.column_stack([cos_latitude * np.cos(longitude), cos_latitude * np.sin(longitude), np.sin(latitude)])
+
+
+def chord_length(radius_km):
+    """Straight-line distance between two unit-sphere points `radius_km` apart on the Earth."""
+    return 2 * np.sin(radius_km / (2 * EARTH_RADIUS_KM))
+
+
+class SpatialFeatures(BaseEstimator, TransformerMixin):
+    """Neighbourhood features from the latitude and longitude, over a KD-tree of the training listings.
+
+    EN : Adds the median price per m² of the `n_neighbors` nearest training listings and
+    the number of training listings within `radius_km`. The tree is fitted with the
+    pipeline and pickled with it, so a single listing costs one O(log n) query at
+    serving time. `fit_transform` leaves each training row out of its own neighbourhood,
+    so the model never sees its own price through these columns. Rows without
+    coordinates get NaN, imputed by the next step.
+    FR : Ajoute le prix médian au m² des `n_neighbors` annonces d'entraînement les plus
+    proches et le nombre d'annonces dans un rayon de `radius_km`. L'arbre est enregistré
+    avec le pipeline. `fit_transform` exclut chaque ligne d'entraînement de son propre
+    voisinage.
+    """
+
+    def __init__(self, n_neighbors=N_NEIGHBORS, radius_km=RADIUS_KM, leaf_size=40):
+        self.n_neighbors = n_neighbors
+        self.radius_km = radius_km
+        self.leaf_size = leaf_size
+
+    @staticmethod
+    def _points(X):
+        """Unit vectors of the rows of X and the mask of the rows with both coordinates."""
+        latitude = np.asarray(X['latitude'], dtype=np.float64)
+        longitude = np.asarray(X['longitude'], dtype=np.float64)
+        located = ~(np.isnan(latitude) | np.isnan(longitude))
+        return unit_vectors(latitude[located], longitude[located]), located
+
+    def _fit(self, X, y):
+        """Build the tree; return the tree position of each row of X (-1 when it is not indexed)."""
+        if y is None:
+            raise ValueError("SpatialFeatures needs the prices to compute the price per m².")
+        points, located = self._points(X)
+        surface = np.asarray(X['habitablesurface'], dtype=np.float64)[located]
+        price_per_m2 = np.asarray(y, dtype=np.float64)[located] / surface
+        indexed = np.isfinite(price_per_m2) & (surface > 0)
+
+        self.tree_ = KDTree(points[indexed], leaf_size=self.leaf_size)
+        self.price_per_m2_ = price_per_m2[indexed]
+        positions = np.full(len(X), -1, dtype=np.int64)
+        positions[np.flatnonzero(located)[indexed]] = np.arange(indexed.sum())
+        return positions
+
+    def fit(self, X, y=None):
+        with stage('spatial.fit'):
+            self._fit(X, y)
+        return self
+
+    def fit_transform(self, X, y=None, **fit_params):
+        """Fit the tree on X and compute the features of X, each row without itself."""
+        with stage('spatial.fit_transform') as measured:
+            positions = self._fit(X, y)
+            return measured.shape(self._add_features(X, positions))
+
+    def transform(self, X):
+        """Neighbourhood features of new listings (all indexed listings count)."""
+        with stage('spatial.transform') as measured:
+            return measured.shape(self._add_features(X, np.full(len(X), -1, dtype=np.int64)))
+
+    def _add_features(self, X, positions):
+        points, located = self._points(X)
+        price_per_m2 = np.full(len(X), np.nan)
+        listings = np.full(len(X), np.nan)
+        if len(points) and self.tree_.data.shape[0]:
+            price_per_m2[located], listings[located] = self._query(points, positions[located])
+        return X.assign(nearby_price_per_m2=price_per_m2.astype(np.float32), nearby_listings=listings.astype(np.float32))
+
+    def _query(self, points, positions):
+        """Median price per m² of the neighbours and count within the radius, by chunks of QUERY_CHUNK rows.
+
+        EN : An indexed row (`positions >= 0`) asks for one more neighbour and drops itself;
+        when duplicates at the same place hide it, the farthest neighbour is dropped instead.
+        FR : Une ligne indexée demande un voisin de plus et s'en retire ; si des doublons au
+        même endroit la cachent, le voisin le plus éloigné est retiré.
+        """
+        indexed_rows = self.tree_.data.shape[0]
+        k = min(self.n_neighbors, indexed_rows)
+        extra = int((positions >= 0).any() and indexed_rows > k)
+        medians = np.empty(len(points))
+        counts = np.empty(len(points))
+        radius = chord_length(self.radius_km)
+        for start in range(0, len(points), QUERY_CHUNK):
+            chunk, own = points[start:start + QUERY_CHUNK], positions[start:start + QUERY_CHUNK]
+            neighbors = self.tree_.query(chunk, k=k + extra, return_distance=False, sort_results=True)
+            if extra:
+                drop = neighbors == own[:, None]
+                drop[~drop.any(axis=1), -1] = True
+                neighbors = neighbors[~drop].reshape(len(chunk), k)
+            medians[start:start + len(chunk)] = np.median(self.price_per_m2_[neighbors], axis=1)
+            counts[start:start + len(chunk)] = self.tree_.query_radius(chunk, radius, count_only=True) - (own >= 0)
+        return medians, counts
@@ -0,0 +1,276 @@
+# --- EN : Importing libraries - FR : Importation des bibliothèques ---
+import argparse # EN : Command line interface - FR : Interface en ligne de commande
+import ast # EN : Local imports of the stage modules - FR : Imports locaux des modules des étapes
+import hashlib # EN : Content keys of the stages - FR : Clés de contenu des étapes
+import inspect # EN : Source of the stage functions - FR : Source des fonctions des étapes
+import json # EN : Memo of the input file hashes - FR : Mémo des empreintes des fichiers d'entrée
+import logging # EN : Importing the logging library - FR : Importation de la bibliothèque de journalisation
+import os # EN : Importing the OS library - FR : Importation de la bibliothèque OS
+import sys # EN : Module of the stage functions - FR : Module des fonctions des étapes
+import time # EN : Age of the cache entries - FR : Âge des entrées du cache
+from graphlib import TopologicalSorter # EN : Order of the stages - FR : Ordre des étapes
+from profiling_santo import stage # EN : Stage timing of the training runs - FR : Chronométrage des étapes de l'entraînement
+
+STAGE_CACHE_DIR = 'data/cache/stages'  # EN One joblib file per stage output - FR Un fichier joblib par sortie d'étape
+MAX_CACHE_BYTES = 4 * 1024 ** 3  # EN Least recently used outputs are removed above - FR Les sorties les moins récentes sont supprimées au-delà
+LIBRARIES = ('numpy', 'pandas', 'sklearn', 'joblib')  # EN Versions in every key: the outputs are pickled objects - FR Versions dans chaque clé : les sorties sont des objets sérialisés
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_MISSING = object()
+
+
+def _digest(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _module_path(module_name):
+    """File of a module of this repository, None for the libraries."""
+    if module_name == '__main__':
+        path = getattr(sys.modules['__main__'], '__file__', None)
+        return os.path.abspath(path) if path else None
+    path = os.path.join(REPO_DIR, module_name.split('.')[0] + '.py')
+    return path if os.path.exists(path) else None
+
+
+def _local_imports(path):
+    """Modules of this repository imported by the file `path`."""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    return {found for found in map(_module_path, names) if found is not None}
+
+
+def source_hash(module_names):
+    """Hash of the source of `module_names` and of every repository module they import, directly or not.
+
+    EN : The libraries are covered by their versions (LIBRARIES), so only the files of
+    this repository are read.
+    FR : Les bibliothèques sont couvertes par leurs versions ; seuls les fichiers du dépôt sont lus.
+    """
+    pending = {found for found in map(_module_path, module_names) if found is not None}
+    seen = set()
+    while pending:
+        path = pending.pop()
+        seen.add(path)
+        pending |= _local_imports(path) - seen
+    digest = hashlib.sha256()
+    for path in sorted(seen):
+        digest.update(os.path.relpath(path, REPO_DIR).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def function_source(function):
+    """Source of a function, or its bytecode when the source is not available (interactive session)."""
+    try:
+        return inspect.getsource(function)
+    except (OSError, TypeError):
+        return function.__code__.co_code + repr(function.__code__.co_consts).encode()
+
+
+def library_versions():
+    from importlib.metadata import PackageNotFoundError, version
+    versions = {}
+    for name in LIBRARIES:
+        try:
+            versions[name] = version('scikit-learn' if name == 'sklearn' else name)
+        except PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+# --- 1. EN : Size-bounded artifact cache - FR : Cache d'artefacts de taille bornée ---
+
+class ArtifactCache:
+    """Stage outputs stored as joblib files named by stage and content key, with LRU eviction by size.
+
+    EN : A hit touches the file, so the modification time orders the entries by last use;
+    after each write the oldest entries are removed until the directory fits in `max_bytes`.
+    The hashes of the input files are memorized by size and modification time, so an
+    unchanged CSV is not read again to compute a key.
+    FR : Une lecture touche le fichier, la date de modification classe donc les entrées par
+    dernier usage ; après chaque écriture les plus anciennes sont supprimées jusqu'à tenir
+    dans `max_bytes`. Les empreintes des fichiers d'entrée sont mémorisées.
+    """
+
+    def __init__(self, directory=STAGE_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.hashes_path = os.path.join(directory, 'file_hashes.json')
+
+    def path(self, name, key):
+        return os.path.join(self.directory, f'{name}-{key[:20]}.joblib')
+
+    def entries(self):
+        """(path, bytes, last use) of every stored output, most recently used first."""
+        entries = []
+        for file in os.listdir(self.directory):
+            if file.endswith('.joblib'):
+                stat = os.stat(os.path.join(self.directory, file))
+                entries.append((os.path.join(self.directory, file), stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2], reverse=True)
+
+    def get(self, name, key, default=_MISSING):
+        from joblib import load
+        path = self.path(name, key)
+        if not os.path.exists(path):
+            return default
+        os.utime(path)  # EN Most recently used - FR Utilisé le plus récemment
+        return load(path)
+
+    def put(self, name, key, value):
+        from joblib import dump
+        path = self.path(name, key)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        dump(value, temporary)
+        os.replace(temporary, path)  # EN Never a half-written entry - FR Jamais d'entrée à moitié écrite
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Remove the least recently used outputs beyond `max_bytes` (never `keep`); return the removed paths."""
+        removed, total = [], 0
+        for path, size, _ in self.entries():
+            total += size
+            if total > self.max_bytes and path != keep:
+                os.remove(path)
+                removed.append(path)
+                total -= size
+        for path in removed:
+            logging.info(f"Stage cache: evicted {os.path.basename(path)}")
+        return removed
+
+    def file_hash(self, path):
+        """SHA-256 of an input file, read again only when its size or modification time changed."""
+        from data_cleaning_santo import LookupStore
+        memo = {}
+        if os.path.exists(self.hashes_path):
+            with open(self.hashes_path) as f:
+                memo = json.load(f)
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        entry = memo.get(os.path.abspath(path))
+        if entry is None or entry['signature'] != signature:
+            entry = {'signature': signature, 'sha256': LookupStore.file_hash(path)}
+            memo[os.path.abspath(path)] = entry
+            with open(self.hashes_path, 'w') as f:
+                json.dump(memo, f)
+        return entry['sha256']
+
+
+# --- 2. EN : DAG of memoized stages - FR : DAG d'étapes mémoïsées ---
+
+class Stage:
+    """One step of the DAG: `function(**outputs of depends, **params)`.
+
+    EN : Its key hashes the source of `function`, of the `modules` it relies on (default:
+    the module of `function`) and of their local imports, the `params`, the content of the
+    input `files`, the library versions and the keys of its upstream stages. `depends` lists
+    the upstream stages, or maps argument names to them ({'training': 'compression'}).
+    `valid(output)` can reject a cached output whose side effect (a written file) is gone.
+    FR : Sa clé combine la source, les paramètres, le contenu des fichiers d'entrée, les
+    versions des bibliothèques et les clés des étapes amont. `valid(output)` peut refuser
+    une sortie en cache dont l'effet (un fichier écrit) a disparu.
+    """
+
+    def __init__(self, name, function, depends=(), params=None, files=(), modules=None, valid=None):
+        self.name = name
+        self.function = function
+        self.inputs = dict(depends) if isinstance(depends, dict) else {upstream: upstream for upstream in depends}
+        self.depends = tuple(self.inputs.values())
+        self.params = params or {}
+        self.files = tuple(files)
+        self.modules = tuple(modules) if modules is not None else (function.__module__,)
+        self.valid = valid
+
+    def key(self, cache, upstream_keys):
+        return _digest(self.name, function_source(self.function), source_hash(self.modules),
+                       json.dumps(self.params, sort_keys=True, default=repr), json.dumps(library_versions(), sort_keys=True),
+                       *(cache.file_hash(path) for path in self.files), *upstream_keys)
+
+
+def run_stages(stages, targets=None, cache=None, force=False):
+    """Run the stages needed for the outputs of `targets` (default: the stages nothing depends on).
+
+    EN : Every key is computed first, from the sources, parameters and inputs only. A stage
+    whose output is in the cache is skipped and its output loaded; the outputs of its
+    upstream stages are then not even loaded. `force=True` runs every needed stage again
+    and overwrites its cached output. Returns {stage name: output} of the loaded or run stages.
+    FR : Toutes les clés sont calculées d'abord. Une étape en cache est sautée et sa sortie
+    chargée ; les sorties de ses étapes amont ne sont alors pas chargées. `force=True`
+    relance les étapes et remplace leurs sorties en cache.
+    """
+    cache = cache or ArtifactCache()
+    graph = {item.name: item for item in stages}
+    order = list(TopologicalSorter({name: item.depends for name, item in graph.items()}).static_order())
+    keys = {}
+    for name in order:
+        keys[name] = graph[name].key(cache, [keys[upstream] for upstream in graph[name].depends])
+    if targets is None:
+        used = {upstream for item in stages for upstream in item.depends}
+        targets = [name for name in order if name not in used]
+
+    outputs = {}
+
+    def output(name):
+        if name in outputs:
+            return outputs[name]
+        item = graph[name]
+        value = _MISSING
+        if not force and os.path.exists(cache.path(name, keys[name])):
+            with stage(name) as measured:
+                measured.note(cached=True)
+                value = cache.get(name, keys[name])
+            if item.valid is not None and not item.valid(value):
+                logging.info(f"Stage '{name}': cached output no longer valid, running it again.")
+                value = _MISSING
+            else:
+                logging.info(f"Stage '{name}' unchanged ({keys[name][:12]}), output loaded from the cache.")
+        if value is _MISSING:
+            inputs = {argument: output(upstream) for argument, upstream in item.inputs.items()}  # EN Before the stage, so they are not nested in it - FR Avant l'étape, pour ne pas être imbriquées
+            with stage(name) as measured:
+                measured.note(cached=False)
+                value = item.function(**inputs, **item.params)
+                cache.put(name, keys[name], value)
+        outputs[name] = value
+        return value
+
+    for name in targets:
+        output(name)
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outputs stored in the stage cache of main_santo.py.")
+    parser.add_argument('--dir', default=STAGE_CACHE_DIR, help="Stage cache directory.")
+    parser.add_argument('--clear', action='store_true', help="Remove every stored output.")
+    args = parser.parse_args()
+    cache = ArtifactCache(args.dir)
+    entries = cache.entries()
+    print("-" * 66)
+    print(f"| {'Output':<36} | {'MB':>10} | {'AGE h':>10} |")
+    print("-" * 66)
+    for path, size, used in entries:
+        print(f"| {os.path.basename(path)[:36]:<36} | {size / 1e6:10.1f} | {(time.time() - used) / 3600:10.1f} |")
+    print("-" * 66)
+    print(f"{len(entries)} outputs, {sum(entry[1] for entry in entries) / 1e6:.1f} MB (limit {cache.max_bytes / 1e6:.0f} MB)")
+    if args.clear:
+        for path, _, _ in entries:
+            os.remove(path)
+        print("Stage cache cleared.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
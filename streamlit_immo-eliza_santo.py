@@ -1,15 +1,36 @@
-import pandas as pd
+import os
 import streamlit as st
-#import joblib
-from joblib import dump, load # EN : Importing the dump and load functions from Joblib - FR : Importation des fonctions dump et load de Joblib
-from PIL import Image
+# EN : Light imports only: sklearn, pandas and joblib are imported with the model, at the first prediction
+# FR : Imports légers seulement : sklearn, pandas et joblib sont importés avec le modèle, à la première prédiction
+from model_artifact_santo import ARTIFACT_PATH, load_metadata # EN : Versioned model artifact - FR : Artefact versionné du modèle
+from prediction_cache_santo import (CACHE_PATH, CACHE_SIZE, PredictionCache, PROPERTY_TYPES, EPC_SCORES,
+                                    BUILDING_CONDITIONS, wizard_listing) # EN : LRU cache of the predictions - FR : Cache LRU des prédictions
 
-# --- Fonction pour le chargement du modèle ---
+# --- Fonction pour le chargement du modèle et de son cache de prédictions (une fois par processus, à la première prédiction) ---
 @st.cache_resource
-def load_model():
-    with open("model_random_forest_regressor_building_santo.pkl", "rb") as f:
-        model = load(f)
-    return model
+def load_prediction_cache():
+    from model_artifact_santo import load_artifact
+    from forest_engine_santo import compile_pipeline
+    artifact = load_artifact(ARTIFACT_PATH)  # EN Memory-mapped, no decompression - FR En mémoire partagée, sans décompression
+    size = int(os.environ.get('IMMO_PREDICTION_CACHE_SIZE', CACHE_SIZE))
+    model = compile_pipeline(artifact['model'])  # EN Forest on flat NumPy arrays: one row in well under a millisecond - FR Forêt en tableaux NumPy plats
+    # EN Filled by `python prediction_cache_santo.py` when it was run for this model - FR Rempli par le préchauffage s'il a été lancé pour ce modèle
+    return PredictionCache.load(model, CACHE_PATH, size, artifact['version'])
+
+# --- Explications (contributions des variables), mises en cache par version du modèle ---
+@st.cache_resource
+def load_explanation_cache():
+    from explanation_santo import ExplanationCache
+    prediction_cache = load_prediction_cache()  # Même modèle compilé que les prédictions
+    try:
+        return ExplanationCache(prediction_cache.model, version=prediction_cache.version)
+    except ValueError:
+        return None  # Modèle sans forêt : pas d'explication
+
+# --- Provinces du modèle, lues dans les métadonnées JSON de l'artefact (sans le dataset ni le modèle) ---
+@st.cache_resource
+def load_provinces():
+    return sorted(load_metadata(ARTIFACT_PATH)['provinces'])
 
 # --- Ajout du style et de la police ---
 st.markdown("""
@@ -93,27 +114,17 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Charger ton logo
-logo = Image.open("logo.png")  # Chemin vers ton logo
-
 # Ligne contenant le logo et le titre
 st.markdown('<div class="logo-title-container">', unsafe_allow_html=True)
 col1, col2 = st.columns([2, 5])  # Ajuste les proportions selon la taille du logo
 
 with col1:
-    st.image(logo, width=200)  # Ajuste la taille du logo ici
+    st.image("logo.png", width=200)  # Ajuste la taille du logo ici (Streamlit lit le fichier lui-même)
 
 with col2:
     st.title("Real estate appraisal")
 st.markdown('</div>', unsafe_allow_html=True)
 
-# -- Chargement des données nettoyées ---
-df = pd.read_csv("data/Kangaroo_cleaned.csv")
-
-# --- Chargement du modèle et des colonnes attendues ---
-model = load_model()  # Chargement du modèle
-expected_columns = load('model_features.pkl')  # fichier contenant la liste des colonnes d'entrée
-
 # --- Utilisation de session_state pour gérer les étapes du formulaire ---
 if 'step' not in st.session_state:
     st.session_state.step = 1
@@ -130,11 +141,8 @@ def step_1():
     st.session_state.has_air_conditioning = st.checkbox("Has air conditioning", value=False)
     st.session_state.construction_year = st.number_input("Construction year", min_value=1800, max_value=2023, value=2000)
     
-    # Liste des provinces
-    province_columns = [col.replace("province_", "") for col in df.columns if col.startswith("province_")]
-
     # Menu déroulant pour la province
-    province_choice = st.selectbox("Choice a province", sorted(province_columns))
+    province_choice = st.selectbox("Choice a province", load_provinces())
     
     col1, col2 = st.columns([3, 1])
     with col2:
@@ -148,14 +156,10 @@ def step_1():
                 st.rerun()  # Utilisation de st.rerun()
 def step_2():
     st.subheader("Step 2: Energy and Property Condition")
-    epc_score = st.selectbox("EPC Score (Energy Performance Certificate)", ["A+", "A", "B", "C", "D", "E", "F", "G"])
-    epc_score_mapping = {
-        "A+": 0, "A": 1, "B": 2, "C": 3, "D": 4, "E": 5, "F": 6, "G": 7
-    }
-    st.session_state.epc_score_value = epc_score_mapping[epc_score]
+    st.session_state.epc_score = st.selectbox("EPC Score (Energy Performance Certificate)", EPC_SCORES)
     
-    st.session_state.property_type = st.selectbox("Property type", ["House", "Apartment", "Villa", "Chalet", "Others"])
-    st.session_state.building_condition = st.selectbox("Building condition", ["Good", "Just Renovated", "To Be Done Up", "To Renovate", "To Restore"])
+    st.session_state.property_type = st.selectbox("Property type", list(PROPERTY_TYPES))
+    st.session_state.building_condition = st.selectbox("Building condition", BUILDING_CONDITIONS)
     
     col1, col2 = st.columns([3, 1])
     with col2:
@@ -170,40 +174,29 @@ def step_2():
 def step_3():
     st.subheader("Step 3: Finalize and Predict")
     
-    input_data = pd.DataFrame({
-        'bedroomcount': [st.session_state.bedroom_count],
-        'bathroomcount': [st.session_state.bathroom_count],
-        'habitablesurface': [st.session_state.habitable_surface],
-        'hasgarden': [st.session_state.has_garden],
-        'hasterrace': [st.session_state.has_terrace],
-        'hasfireplace': [st.session_state.has_fireplace],
-        'constructionyear': [st.session_state.construction_year],
-        'hasairconditioning': [st.session_state.has_air_conditioning],
-        'type_HOUSE': [1 if st.session_state.property_type == 'House' else 0],
-        'type_APARTMENT': [1 if st.session_state.property_type == 'Apartment' else 0],
-        'type_VILLA': [1 if st.session_state.property_type == 'Villa' else 0],
-        'type_CHALLET': [1 if st.session_state.property_type == 'Chalet' else 0],
-        'epcscore': [st.session_state.epc_score_value],
-        'buildingcondition_GOOD': [1 if st.session_state.building_condition == 'Good' else 0],
-        'buildingcondition_JUST_RENOVATED': [1 if st.session_state.building_condition == 'Just Renovated' else 0],
-        'buildingcondition_TO_BE_DONE_UP': [1 if st.session_state.building_condition == 'To Be Done Up' else 0],
-        'buildingcondition_TO_RENOVATE': [1 if st.session_state.building_condition == 'To Renovate' else 0],
-        'buildingcondition_TO_RESTORE': [1 if st.session_state.building_condition == 'To Restore' else 0],
-        f'province_{st.session_state.province_choice}': [1],  # Utiliser seulement la province
-        # Retirer la ligne suivante qui faisait référence à locality_choice
-        # f'locality_{st.session_state.locality_choice}': [1],  
-    })
-    
-    # --- Adapter input_data aux colonnes du modèle ---
-    for col in expected_columns:
-        if col not in input_data.columns:
-            input_data[col] = 0  # Ajouter les colonnes manquantes avec valeur 0
-
-    input_data = input_data[expected_columns]  # Réordonner les colonnes
-
-    # --- Prédiction ---
-    prediction = model.predict(input_data)
-    st.success(f'Predicted Price: {prediction[0]:,.2f} €')
+    # --- Annonce au format brut Kangaroo : le pipeline du modèle la nettoie et l'impute comme à l'entraînement ---
+    listing = wizard_listing(
+        st.session_state.bedroom_count, st.session_state.bathroom_count, st.session_state.habitable_surface,
+        st.session_state.has_garden, st.session_state.has_terrace, st.session_state.has_fireplace,
+        st.session_state.has_air_conditioning, st.session_state.construction_year, st.session_state.property_type,
+        st.session_state.epc_score, st.session_state.building_condition, st.session_state.province_choice,
+    )
+
+    # --- Prédiction (servie par le cache si ces réponses ont déjà été vues) ---
+    prediction_cache = load_prediction_cache()  # Chargement du modèle (nettoyage, imputation et forêt aléatoire)
+    prediction, low, high = prediction_cache.predict_interval(listing)
+    st.success(f'Predicted Price: {prediction:,.2f} €')
+    if low == low:  # Fourchette P10-P90 des arbres de la forêt (NaN pour les autres modèles)
+        st.info(f'Likely range (P10-P90 of the forest trees): {low:,.0f} € - {high:,.0f} €')
+    explanation_cache = load_explanation_cache()
+    if explanation_cache is not None:
+        with st.expander("Why this price?"):
+            bias, contributions = explanation_cache.explain(listing)
+            lines = [f"- Average price of the training listings: **{bias:,.0f} €**"]
+            lines += [f"- {name}: **{value:+,.0f} €**" for name, value in contributions]
+            st.markdown("\n".join(lines))
+    stats = prediction_cache.stats()
+    st.caption(f"Prediction cache: {stats['hits']} hits, {stats['misses']} misses, {stats['size']}/{stats['maxsize']} entries")
 
     col1, col2 = st.columns([3, 1])
     with col2:
@@ -1,8 +1,9 @@
 import pandas as pd
 import streamlit as st
+from dataset_cache_santo import load_dataset
 
 # Chargement du fichier CSV
-df = pd.read_csv("data/Kangaroo_cleaned.csv")
+df = load_dataset("data/Kangaroo_cleaned.csv")
 
 # Optionnel : ajuste l'affichage de Pandas (utile pour print(df.head()) par exemple)
 pd.set_option('display.max_columns', None)